@@ -0,0 +1,216 @@
+"""Compact binary archive of games and positions, read back with mmap.
+
+Layout (little-endian):
+
+* header: magic ``b'SCHA'``, version (u16), reserved (u16), game count
+  (u64), offset of the index (u64);
+* one record per game: the start position from ``Board.pack`` (PACKED_SIZE
+  bytes), result (u8, index into ``Chess_pgn.RESULTS``), reserved (u8),
+  move count (u32), then the moves from ``encode_move`` (u16 each);
+* the index: one u64 record offset per game.
+
+A position on its own is stored as a game without moves. Readers map the
+file and hand out memoryviews, so opening an archive and jumping to game
+``n`` does not parse anything before it.
+
+Run ``python Chess_archive.py --help`` for the command line interface.
+"""
+import argparse
+import mmap
+import struct
+import sys
+from array import array
+
+from Chess_pgn import RESULTS, game_result, read_games, recorded_moves, replay_game, start_board
+from Chess_rules import PACKED_SIZE, Board, decode_move, encode_move
+
+MAGIC = b'SCHA'
+VERSION = 1
+HEADER = struct.Struct('<4sHHQQ')
+RECORD = struct.Struct(f'<{PACKED_SIZE}sBBI')
+_NATIVE_LITTLE_ENDIAN = sys.byteorder == 'little'
+
+
+class ArchiveWriter:
+    """Append games to a new archive; the index is written by ``close``."""
+
+    def __init__(self, path):
+        self.stream = open(path, 'wb')
+        self.offsets = array('Q')
+        self.stream.write(HEADER.pack(MAGIC, VERSION, 0, 0, 0))
+
+    def add_game(self, start, moves, result='*'):
+        """Store ``moves`` played from ``start`` (a Board or packed bytes)."""
+        packed = start.pack() if isinstance(start, Board) else bytes(start)
+        if len(packed) != PACKED_SIZE:
+            raise ValueError(f"Packed position must be {PACKED_SIZE} bytes")
+        codes = array('H', (encode_move(move) for move in moves))
+        if not _NATIVE_LITTLE_ENDIAN:
+            codes.byteswap()
+        self.offsets.append(self.stream.tell())
+        self.stream.write(RECORD.pack(packed, RESULTS.index(result), 0, len(codes)))
+        codes.tofile(self.stream)
+
+    def add_position(self, board):
+        self.add_game(board, ())
+
+    def add_board(self, board, start, result=None):
+        """Store the game played on ``board``, from its first move to now.
+
+        ``start`` is the position the game began from (a Board or packed
+        bytes). ``result`` is the recorded result, e.g. from the PGN; when
+        it is missing or ``'*'`` the result is read from the board.
+        """
+        if result is None or result == '*':
+            result = game_result(board)
+        self.add_game(start, recorded_moves(board), result)
+
+    def close(self):
+        if self.stream.closed:
+            return
+        index_offset = self.stream.tell()
+        offsets = array('Q', self.offsets)
+        if not _NATIVE_LITTLE_ENDIAN:
+            offsets.byteswap()
+        offsets.tofile(self.stream)
+        self.stream.seek(0)
+        self.stream.write(HEADER.pack(MAGIC, VERSION, 0, len(self.offsets), index_offset))
+        self.stream.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ArchiveGame:
+    """One game in a mapped archive; ``start`` and ``moves`` are memoryviews."""
+
+    def __init__(self, start, result, moves):
+        self.start = start
+        self.result = result
+        self.moves = moves
+
+    def __len__(self):
+        return len(self.moves)
+
+    def board(self):
+        """The start position as a Board."""
+        return Board.from_packed(self.start)
+
+    def decoded_moves(self):
+        return [decode_move(code) for code in self.moves]
+
+    def replay(self):
+        """Return the Board after playing every move with make_move."""
+        board = self.board()
+        for code in self.moves:
+            board.make_move(decode_move(code))
+        return board
+
+
+class ArchiveReader:
+    """Random access to the games of an archive through a read-only mmap."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as stream:
+            self.map = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.map)
+        if len(self.view) < HEADER.size:
+            self.close()
+            raise ValueError(f"{path} is too short to be an archive")
+        magic, version, _, count, index_offset = HEADER.unpack_from(self.view)
+        if magic != MAGIC or version != VERSION or not index_offset:
+            self.close()
+            raise ValueError(f"{path} is not a complete version {VERSION} archive")
+        self.count = count
+        self.offsets = self._words(index_offset, count, 'Q')
+
+    def _words(self, offset, count, code):
+        size = struct.calcsize(code)
+        view = self.view[offset:offset + count * size]
+        if _NATIVE_LITTLE_ENDIAN:
+            return view.cast(code)
+        words = array(code, view)
+        words.byteswap()
+        return words
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, number):
+        if number < 0:
+            number += self.count
+        if not 0 <= number < self.count:
+            raise IndexError("game number out of range")
+        offset = self.offsets[number]
+        _, result, _, move_count = RECORD.unpack_from(self.view, offset)
+        start_view = self.view[offset:offset + PACKED_SIZE]
+        moves = self._words(offset + RECORD.size, move_count, 'H')
+        return ArchiveGame(start_view, RESULTS[result], moves)
+
+    def __iter__(self):
+        for number in range(self.count):
+            yield self[number]
+
+    def close(self):
+        self.offsets = None
+        self.view.release()
+        try:
+            self.map.close()
+        except BufferError:
+            # ArchiveGames still point into the map; it is unmapped once they go.
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def convert_pgn(stream, path):
+    """Write every game of a PGN stream to an archive; returns ``(games, errors)``."""
+    games = errors = 0
+    with ArchiveWriter(path) as writer:
+        for game in read_games(stream):
+            try:
+                board = replay_game(game)
+            except ValueError:
+                errors += 1
+                continue
+            writer.add_board(board, start_board(game.headers), game.result)
+            games += 1
+    return games, errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert PGN to a binary archive or inspect one.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    convert = subparsers.add_parser('convert', help="write the games of a PGN file to an archive")
+    convert.add_argument('pgn')
+    convert.add_argument('archive')
+    info = subparsers.add_parser('info', help="summarise an archive")
+    info.add_argument('archive')
+    args = parser.parse_args(argv)
+
+    if args.command == 'convert':
+        with open(args.pgn) as stream:
+            games, errors = convert_pgn(stream, args.archive)
+        print(f"{games} games written, {errors} skipped")
+        return 1 if errors else 0
+
+    with ArchiveReader(args.archive) as reader:
+        moves = 0
+        results = dict.fromkeys(RESULTS, 0)
+        for game in reader:
+            moves += len(game)
+            results[game.result] += 1
+        print(f"{len(reader)} games, {moves} moves")
+        print(' '.join(f"{result}: {count}" for result, count in results.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""Analyse many positions at once on a pool of worker processes.
+
+A position is either a FEN string or a sequence of moves (UCI strings or
+move tuples) played from the initial position. Positions are sent to the
+workers in chunks and reports are yielded as each chunk finishes, so the
+input can be a generator over a file of any size.
+
+Run ``python Chess_batch.py --help`` for the command line interface.
+"""
+import argparse
+import itertools
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from Chess_perft import perft
+from Chess_rules import Board, move_to_uci, parse_uci
+from Chess_search import find_best_move
+from Chess_transposition import TranspositionTable
+
+DEFAULT_CHUNK_SIZE = 64
+# Small per-worker table: batch searches are shallow and there may be many workers.
+BATCH_HASH_MB = 1
+
+
+class PositionReport:
+    def __init__(self, index, fen=None, legal_moves=0, check=False, checkmate=False,
+                 stalemate=False, best_move=None, score=None, error=None):
+        self.index = index
+        self.fen = fen
+        self.legal_moves = legal_moves
+        self.check = check
+        self.checkmate = checkmate
+        self.stalemate = stalemate
+        self.best_move = best_move
+        self.score = score
+        self.error = error
+
+    @property
+    def status(self):
+        if self.error is not None:
+            return 'error'
+        if self.checkmate:
+            return 'checkmate'
+        if self.stalemate:
+            return 'stalemate'
+        return 'check' if self.check else 'normal'
+
+    def __repr__(self):
+        best = move_to_uci(self.best_move) if self.best_move else None
+        return (f"PositionReport(index={self.index}, status={self.status!r}, "
+                f"legal_moves={self.legal_moves}, best_move={best!r})")
+
+
+def position_to_board(position):
+    """Build a Board from a FEN string or a sequence of moves from the start."""
+    if isinstance(position, str):
+        return Board.from_fen(position)
+    board = Board()
+    for move in position:
+        if isinstance(move, str):
+            move = parse_uci(move)
+        start, end = move[0], move[1]
+        if (start, end) not in board.legal_moves(board.current_turn):
+            raise ValueError(f"Illegal move {move_to_uci(move)} in {board.to_fen()}")
+        board.make_move(move)
+    return board
+
+
+def analyse_position(index, position, search_depth=None, tt=None):
+    """Return a PositionReport for one position; errors are reported, not raised."""
+    try:
+        board = position_to_board(position)
+    except (ValueError, TypeError, IndexError) as e:
+        # Malformed input of any shape is reported, never allowed to stop the batch.
+        return PositionReport(index, error=str(e) or type(e).__name__)
+
+    moves = board.legal_moves(board.current_turn)
+    check = board.is_in_check(board.current_turn)
+    report = PositionReport(index, board.to_fen(), perft(board, 1), check,
+                            check and not moves, not check and not moves)
+    if search_depth and moves:
+        result = find_best_move(board, search_depth, tt=tt)
+        report.best_move = result.best_move
+        report.score = result.score
+    return report
+
+
+def _analyse_chunk(chunk, search_depth):
+    tt = TranspositionTable(BATCH_HASH_MB) if search_depth else None
+    return [analyse_position(index, position, search_depth, tt) for index, position in chunk]
+
+
+def analyse_batch(positions, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, search_depth=None):
+    """Yield a PositionReport for every position, in completion order.
+
+    ``workers`` defaults to one process per CPU; ``workers=0`` analyses in
+    this process. Only a few chunks per worker are in flight at a time, so
+    ``positions`` is consumed lazily. Reports carry the input index for
+    callers that need the original order.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    numbered = enumerate(positions)
+    chunks = iter(lambda: list(itertools.islice(numbered, chunk_size)), [])
+
+    if workers == 0:
+        for chunk in chunks:
+            yield from _analyse_chunk(chunk, search_depth)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for chunk in itertools.islice(chunks, 2 * workers):
+            pending.add(executor.submit(_analyse_chunk, chunk, search_depth))
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                for chunk in itertools.islice(chunks, 1):
+                    pending.add(executor.submit(_analyse_chunk, chunk, search_depth))
+                yield from future.result()
+
+
+def _read_positions(stream):
+    # One position per line: a FEN, or UCI moves from the initial position.
+    for line in stream:
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        yield line if '/' in line else line.split()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyse a file of positions in parallel.")
+    parser.add_argument('file', help="one FEN or move list per line ('-' for stdin)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="worker processes (default: CPU count, 0 for none)")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--depth', type=int, default=None, help="also search each position")
+    args = parser.parse_args(argv)
+
+    stream = sys.stdin if args.file == '-' else open(args.file)
+    errors = 0
+    try:
+        for report in analyse_batch(_read_positions(stream), args.workers, args.chunk_size,
+                                    args.depth):
+            line = f"{report.index}\t{report.status}\t{report.legal_moves}"
+            if report.error is not None:
+                line += f"\t{report.error}"
+                errors += 1
+            elif report.best_move is not None:
+                line += f"\t{move_to_uci(report.best_move)}\t{report.score}"
+            print(line)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
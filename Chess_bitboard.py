@@ -0,0 +1,437 @@
+"""Bitboard implementation of the Board API.
+
+Squares are numbered ``row * 8 + col`` with row 0 being black's back rank,
+matching the ``(row, col)`` tuples used by ``Chess_rules.Board``. Each piece
+type and color is one 64-bit integer; pieces are only materialised as
+``Piece`` objects when a caller asks for them through ``get_piece``.
+"""
+from Chess_rules import (BISHOP_DIRECTIONS, BLACK, COLOR_CODES, COLOR_NAMES, KING_OFFSETS,
+                         KNIGHT_OFFSETS, ROOK_DIRECTIONS, WHITE, Pawn, Knight, Bishop, Rook,
+                         Queen, King)
+
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+
+PIECE_CLASSES = (Pawn, Knight, Bishop, Rook, Queen, King)
+PROMOTION_TYPES = {'queen': QUEEN, 'rook': ROOK, 'bishop': BISHOP, 'knight': KNIGHT}
+
+WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE = 1, 2, 4, 8
+ALL_CASTLING = 15
+
+
+def _square(row, col):
+    return row * 8 + col
+
+
+def _leaper_table(offsets):
+    table = []
+    for sq in range(64):
+        row, col = divmod(sq, 8)
+        mask = 0
+        for dr, dc in offsets:
+            r, c = row + dr, col + dc
+            if 0 <= r < 8 and 0 <= c < 8:
+                mask |= 1 << _square(r, c)
+        table.append(mask)
+    return table
+
+
+KNIGHT_ATTACKS = _leaper_table(KNIGHT_OFFSETS)
+KING_ATTACKS = _leaper_table(KING_OFFSETS)
+# PAWN_ATTACKS[color][sq] are the squares a pawn of that color on sq attacks.
+PAWN_ATTACKS = (_leaper_table([(-1, -1), (-1, 1)]),
+                _leaper_table([(1, -1), (1, 1)]))
+
+# Ray directions (dr, dc) come from Chess_rules. Directions that increase the
+# square index find their nearest blocker with the lowest set bit, the others
+# with the highest.
+
+
+def _ray_table(dr, dc):
+    table = []
+    for sq in range(64):
+        row, col = divmod(sq, 8)
+        mask = 0
+        r, c = row + dr, col + dc
+        while 0 <= r < 8 and 0 <= c < 8:
+            mask |= 1 << _square(r, c)
+            r, c = r + dr, c + dc
+        table.append(mask)
+    return table
+
+
+def _is_positive(dr, dc):
+    return dr * 8 + dc > 0
+
+
+RAYS = {direction: _ray_table(*direction) for direction in ROOK_DIRECTIONS + BISHOP_DIRECTIONS}
+ROOK_MASKS = [RAYS[(0, 1)][sq] | RAYS[(1, 0)][sq] | RAYS[(0, -1)][sq] | RAYS[(-1, 0)][sq]
+              for sq in range(64)]
+BISHOP_MASKS = [RAYS[(1, 1)][sq] | RAYS[(1, -1)][sq] | RAYS[(-1, 1)][sq] | RAYS[(-1, -1)][sq]
+                for sq in range(64)]
+
+# Slider attacks are memoised per square keyed by the occupancy of the
+# squares the piece can see, so each distinct blocker pattern is computed once.
+_ROOK_LOOKUP = [{} for _ in range(64)]
+_BISHOP_LOOKUP = [{} for _ in range(64)]
+
+
+def _slide(sq, occupancy, directions):
+    attacks = 0
+    for direction in directions:
+        ray = RAYS[direction][sq]
+        blockers = ray & occupancy
+        if blockers:
+            if _is_positive(*direction):
+                first = (blockers & -blockers).bit_length() - 1
+            else:
+                first = blockers.bit_length() - 1
+            ray ^= RAYS[direction][first]
+        attacks |= ray
+    return attacks
+
+
+def rook_attacks(sq, occupancy):
+    key = occupancy & ROOK_MASKS[sq]
+    table = _ROOK_LOOKUP[sq]
+    attacks = table.get(key)
+    if attacks is None:
+        attacks = table[key] = _slide(sq, key, ROOK_DIRECTIONS)
+    return attacks
+
+
+def bishop_attacks(sq, occupancy):
+    key = occupancy & BISHOP_MASKS[sq]
+    table = _BISHOP_LOOKUP[sq]
+    attacks = table.get(key)
+    if attacks is None:
+        attacks = table[key] = _slide(sq, key, BISHOP_DIRECTIONS)
+    return attacks
+
+
+# Castling rights that survive a move touching the given square.
+CASTLING_MASK = [ALL_CASTLING] * 64
+CASTLING_MASK[_square(7, 4)] &= ~(WHITE_KINGSIDE | WHITE_QUEENSIDE)
+CASTLING_MASK[_square(7, 7)] &= ~WHITE_KINGSIDE
+CASTLING_MASK[_square(7, 0)] &= ~WHITE_QUEENSIDE
+CASTLING_MASK[_square(0, 4)] &= ~(BLACK_KINGSIDE | BLACK_QUEENSIDE)
+CASTLING_MASK[_square(0, 7)] &= ~BLACK_KINGSIDE
+CASTLING_MASK[_square(0, 0)] &= ~BLACK_QUEENSIDE
+
+
+def _bits(bb):
+    while bb:
+        low = bb & -bb
+        yield low.bit_length() - 1
+        bb ^= low
+
+
+class BitBoard:
+    def __init__(self):
+        self.pieces = [[0] * 6, [0] * 6]
+        self.occupancy = [0, 0]
+        self.castling = ALL_CASTLING
+        self.ep_square = None
+        self.current_turn = 'white'
+        self.game_over = False
+        self.winner = None
+        self.selected_piece = None
+        self.valid_moves = []
+        self.check = False
+        self.checkmate = False
+        self.stalemate = False
+        self.promoting_pawn = None
+        self._setup_board()
+
+    def _setup_board(self):
+        back_rank = (ROOK, KNIGHT, BISHOP, QUEEN, KING, BISHOP, KNIGHT, ROOK)
+        for col in range(8):
+            self._put(BLACK, back_rank[col], _square(0, col))
+            self._put(BLACK, PAWN, _square(1, col))
+            self._put(WHITE, PAWN, _square(6, col))
+            self._put(WHITE, back_rank[col], _square(7, col))
+
+    @classmethod
+    def from_board(cls, board):
+        """Build a BitBoard from an object-based ``Chess_rules.Board``."""
+        bitboard = cls.__new__(cls)
+        bitboard.pieces = [[0] * 6, [0] * 6]
+        bitboard.occupancy = [0, 0]
+        for row in range(8):
+            for col in range(8):
+                piece = board.grid[row][col]
+                if piece is not None:
+                    side = piece.color_code
+                    bitboard._put(side, PIECE_CLASSES.index(type(piece)), _square(row, col))
+        castling = 0
+        for side, row, kingside, queenside in ((WHITE, 7, WHITE_KINGSIDE, WHITE_QUEENSIDE),
+                                               (BLACK, 0, BLACK_KINGSIDE, BLACK_QUEENSIDE)):
+            king = board.grid[row][4]
+            if not isinstance(king, King) or king.color != COLOR_NAMES[side] or king.has_moved:
+                continue
+            for col, right in ((7, kingside), (0, queenside)):
+                rook = board.grid[row][col]
+                if isinstance(rook, Rook) and rook.color == king.color and not rook.has_moved:
+                    castling |= right
+        bitboard.castling = castling
+        target = board.en_passant_target
+        bitboard.ep_square = _square(*target) if target is not None else None
+        bitboard.current_turn = board.current_turn
+        bitboard.game_over = board.game_over
+        bitboard.winner = board.winner
+        bitboard.selected_piece = None
+        bitboard.valid_moves = []
+        bitboard.check = board.check
+        bitboard.checkmate = board.checkmate
+        bitboard.stalemate = board.stalemate
+        bitboard.promoting_pawn = None
+        return bitboard
+
+    @property
+    def en_passant_target(self):
+        if self.ep_square is None:
+            return None
+        return divmod(self.ep_square, 8)
+
+    @property
+    def grid(self):
+        return [[self.get_piece((row, col)) for col in range(8)] for row in range(8)]
+
+    def _put(self, side, ptype, sq):
+        bit = 1 << sq
+        self.pieces[side][ptype] |= bit
+        self.occupancy[side] |= bit
+
+    def _remove(self, side, ptype, sq):
+        bit = 1 << sq
+        self.pieces[side][ptype] &= ~bit
+        self.occupancy[side] &= ~bit
+
+    def _piece_at(self, sq):
+        bit = 1 << sq
+        for side in (WHITE, BLACK):
+            if self.occupancy[side] & bit:
+                for ptype, bb in enumerate(self.pieces[side]):
+                    if bb & bit:
+                        return side, ptype
+        return None
+
+    def get_piece(self, position):
+        row, col = position
+        if not (0 <= row < 8 and 0 <= col < 8):
+            return None
+        found = self._piece_at(_square(row, col))
+        if found is None:
+            return None
+        side, ptype = found
+        piece = PIECE_CLASSES[ptype](COLOR_NAMES[side], position)
+        if ptype == PAWN:
+            piece.has_moved = row != (6 if side == WHITE else 1)
+        elif ptype == KING:
+            rights = (WHITE_KINGSIDE | WHITE_QUEENSIDE) if side == WHITE else (BLACK_KINGSIDE | BLACK_QUEENSIDE)
+            piece.has_moved = not self.castling & rights
+        elif ptype == ROOK:
+            piece.has_moved = not self.castling & self._rook_right(side, row, col)
+        return piece
+
+    @staticmethod
+    def _rook_right(side, row, col):
+        if side == WHITE and row == 7:
+            return {7: WHITE_KINGSIDE, 0: WHITE_QUEENSIDE}.get(col, 0)
+        if side == BLACK and row == 0:
+            return {7: BLACK_KINGSIDE, 0: BLACK_QUEENSIDE}.get(col, 0)
+        return 0
+
+    def _attacked(self, sq, attacker, occupancy, exclude=0):
+        """Return True if ``attacker`` hits ``sq``, ignoring pieces on ``exclude``."""
+        keep = ~exclude
+        enemy = self.pieces[attacker]
+        if KNIGHT_ATTACKS[sq] & enemy[KNIGHT] & keep:
+            return True
+        if PAWN_ATTACKS[attacker ^ 1][sq] & enemy[PAWN] & keep:
+            return True
+        if KING_ATTACKS[sq] & enemy[KING] & keep:
+            return True
+        straight = (enemy[ROOK] | enemy[QUEEN]) & keep
+        if straight and rook_attacks(sq, occupancy) & straight:
+            return True
+        diagonal = (enemy[BISHOP] | enemy[QUEEN]) & keep
+        if diagonal and bishop_attacks(sq, occupancy) & diagonal:
+            return True
+        return False
+
+    def is_square_under_attack(self, position, color):
+        side = COLOR_CODES[color]
+        return self._attacked(_square(*position), side ^ 1, self.occupancy[0] | self.occupancy[1])
+
+    def is_in_check(self, color):
+        side = COLOR_CODES[color]
+        king = self.pieces[side][KING]
+        if not king:
+            return False
+        return self._attacked(king.bit_length() - 1, side ^ 1, self.occupancy[0] | self.occupancy[1])
+
+    def _generate(self, side):
+        """Yield legal moves as ``(from_sq, to_sq, ptype)`` for ``side``."""
+        mine = self.pieces[side]
+        own = self.occupancy[side]
+        opp = self.occupancy[side ^ 1]
+        occupancy = own | opp
+        king_bb = mine[KING]
+        king_sq = king_bb.bit_length() - 1 if king_bb else None
+        ep_bit = 1 << self.ep_square if self.ep_square is not None else 0
+
+        for ptype in range(6):
+            for from_sq in _bits(mine[ptype]):
+                if ptype == PAWN:
+                    targets = PAWN_ATTACKS[side][from_sq] & (opp | ep_bit)
+                    step = -8 if side == WHITE else 8
+                    one = from_sq + step
+                    if 0 <= one < 64 and not occupancy >> one & 1:
+                        targets |= 1 << one
+                        start_row = 6 if side == WHITE else 1
+                        two = one + step
+                        if from_sq // 8 == start_row and not occupancy >> two & 1:
+                            targets |= 1 << two
+                elif ptype == KNIGHT:
+                    targets = KNIGHT_ATTACKS[from_sq] & ~own
+                elif ptype == BISHOP:
+                    targets = bishop_attacks(from_sq, occupancy) & ~own
+                elif ptype == ROOK:
+                    targets = rook_attacks(from_sq, occupancy) & ~own
+                elif ptype == QUEEN:
+                    targets = (rook_attacks(from_sq, occupancy) | bishop_attacks(from_sq, occupancy)) & ~own
+                else:
+                    targets = KING_ATTACKS[from_sq] & ~own
+
+                from_bit = 1 << from_sq
+                for to_sq in _bits(targets):
+                    to_bit = 1 << to_sq
+                    captured = to_bit & opp
+                    if ptype == PAWN and to_bit == ep_bit:
+                        captured = 1 << (to_sq - step)
+                    after = (occupancy & ~from_bit & ~captured) | to_bit
+                    target_king = to_sq if ptype == KING else king_sq
+                    if target_king is None or not self._attacked(target_king, side ^ 1, after, captured):
+                        yield from_sq, to_sq, ptype
+
+        if king_sq is not None:
+            yield from self._castling_moves(side, king_sq, occupancy)
+
+    def _castling_moves(self, side, king_sq, occupancy):
+        if side == WHITE:
+            kingside, queenside = WHITE_KINGSIDE, WHITE_QUEENSIDE
+        else:
+            kingside, queenside = BLACK_KINGSIDE, BLACK_QUEENSIDE
+        if not self.castling & (kingside | queenside):
+            return
+        enemy = side ^ 1
+        if self._attacked(king_sq, enemy, occupancy):
+            return
+        if (self.castling & kingside and not occupancy & (0b11 << (king_sq + 1)) and
+                not self._attacked(king_sq + 1, enemy, occupancy) and
+                not self._attacked(king_sq + 2, enemy, occupancy)):
+            yield king_sq, king_sq + 2, KING
+        if (self.castling & queenside and not occupancy & (0b111 << (king_sq - 3)) and
+                not self._attacked(king_sq - 1, enemy, occupancy) and
+                not self._attacked(king_sq - 2, enemy, occupancy)):
+            yield king_sq, king_sq - 2, KING
+
+    def legal_moves(self, color=None):
+        """Return legal moves for ``color`` as ``(start, end)`` position pairs."""
+        side = COLOR_CODES[color or self.current_turn]
+        return [(divmod(from_sq, 8), divmod(to_sq, 8)) for from_sq, to_sq, _ in self._generate(side)]
+
+    def _has_legal_move(self, side):
+        for _ in self._generate(side):
+            return True
+        return False
+
+    def is_checkmate(self, color):
+        side = COLOR_CODES[color]
+        return self.is_in_check(color) and not self._has_legal_move(side)
+
+    def is_stalemate(self, color):
+        side = COLOR_CODES[color]
+        return not self.is_in_check(color) and not self._has_legal_move(side)
+
+    def select_piece(self, position):
+        piece = self.get_piece(position)
+        if piece is not None and piece.color == self.current_turn:
+            side = COLOR_CODES[self.current_turn]
+            from_sq = _square(*position)
+            self.selected_piece = piece
+            self.valid_moves = [divmod(to_sq, 8) for start, to_sq, _ in self._generate(side)
+                                if start == from_sq]
+            return True
+        return False
+
+    def _apply(self, side, from_sq, to_sq, ptype):
+        enemy = side ^ 1
+        to_bit = 1 << to_sq
+        if self.occupancy[enemy] & to_bit:
+            for captured_type in range(6):
+                if self.pieces[enemy][captured_type] & to_bit:
+                    self._remove(enemy, captured_type, to_sq)
+                    break
+        elif ptype == PAWN and to_sq == self.ep_square:
+            self._remove(enemy, PAWN, to_sq + (8 if side == WHITE else -8))
+
+        self._remove(side, ptype, from_sq)
+        self._put(side, ptype, to_sq)
+
+        if ptype == KING and abs(to_sq - from_sq) == 2:
+            if to_sq > from_sq:
+                self._remove(side, ROOK, from_sq + 3)
+                self._put(side, ROOK, from_sq + 1)
+            else:
+                self._remove(side, ROOK, from_sq - 4)
+                self._put(side, ROOK, from_sq - 1)
+
+        self.castling &= CASTLING_MASK[from_sq] & CASTLING_MASK[to_sq]
+        if ptype == PAWN and abs(to_sq - from_sq) == 16:
+            self.ep_square = (from_sq + to_sq) // 2
+        else:
+            self.ep_square = None
+
+    def _finish_turn(self):
+        self.current_turn = 'black' if self.current_turn == 'white' else 'white'
+        self.check = self.is_in_check(self.current_turn)
+        no_moves = not self._has_legal_move(COLOR_CODES[self.current_turn])
+        self.checkmate = self.check and no_moves
+        self.stalemate = not self.check and no_moves
+        if no_moves:
+            self.game_over = True
+            self.winner = ('white' if self.current_turn == 'black' else 'black') if self.check else None
+
+    def move_piece(self, end_pos):
+        if self.selected_piece is None:
+            return False
+
+        if end_pos in self.valid_moves:
+            side = COLOR_CODES[self.current_turn]
+            start_pos = self.selected_piece.position
+            ptype = PIECE_CLASSES.index(type(self.selected_piece))
+            self._apply(side, _square(*start_pos), _square(*end_pos), ptype)
+
+            self.selected_piece = None
+            self.valid_moves = []
+
+            if ptype == PAWN and end_pos[0] in (0, 7):
+                self.promoting_pawn = self.get_piece(end_pos)
+                return True
+
+            self._finish_turn()
+            return True
+        return False
+
+    def promote_pawn(self, piece_type):
+        if not self.promoting_pawn or piece_type not in PROMOTION_TYPES:
+            return False
+
+        side = COLOR_CODES[self.current_turn]
+        sq = _square(*self.promoting_pawn.position)
+        self._remove(side, PAWN, sq)
+        self._put(side, PROMOTION_TYPES[piece_type], sq)
+        self.promoting_pawn = None
+        self._finish_turn()
+        return True
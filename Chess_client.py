@@ -0,0 +1,135 @@
+"""Thin pygame client for Chess_server.
+
+The board on screen mirrors the ``state`` messages sent by the server. Clicks
+go through the usual ChessGame handling on that mirror, and a finished move
+is sent to the server as UCI; the server's reply then replaces the board.
+
+Run ``python Chess_client.py --help`` for the command line interface.
+"""
+import argparse
+import json
+import socket
+import sys
+import threading
+
+import pygame
+
+from Chess_pgn import recorded_moves
+from Chess_rules import Board, move_to_uci
+from Chess_server import DEFAULT_PORT
+from Two_player_chess import ChessGame, init_display
+
+SERVER_EVENT = pygame.USEREVENT + 1
+
+
+def board_from_state(state):
+    """Build the mirror Board for a ``state`` message."""
+    board = Board.from_fen(state['fen'])
+    # The server knows the game history (repetitions); take its verdict.
+    board.check = state['check']
+    board.checkmate = state['checkmate']
+    board.stalemate = state['stalemate']
+    board.game_over = state['game_over']
+    board.winner = state['winner']
+    board.draw_reason = state['draw_reason']
+    return board
+
+
+class ServerConnection:
+    """A line-based JSON connection; incoming messages become pygame events."""
+
+    def __init__(self, host='127.0.0.1', port=DEFAULT_PORT):
+        self.socket = socket.create_connection((host, port))
+        self.stream = self.socket.makefile('rwb')
+        self.thread = None
+
+    def send(self, message):
+        self.stream.write(json.dumps(message).encode() + b'\n')
+        self.stream.flush()
+
+    def start(self):
+        self.thread = threading.Thread(target=self._read, daemon=True)
+        self.thread.start()
+
+    def _read(self):
+        try:
+            for line in self.stream:
+                pygame.event.post(pygame.event.Event(SERVER_EVENT, message=json.loads(line)))
+        except (OSError, ValueError):
+            pass
+        pygame.event.post(pygame.event.Event(SERVER_EVENT, message={'type': 'closed'}))
+
+    def close(self):
+        try:
+            self.send({'cmd': 'quit'})
+        except OSError:
+            pass
+        self.socket.close()
+
+
+class NetworkGame(ChessGame):
+    def __init__(self, connection, game_id=None):
+        super().__init__(pgn_path=None)
+        self.connection = connection
+        self.game_id = game_id
+        self.color = None
+
+    def handle_click(self, position):
+        board = self.board
+        if self.color != board.current_turn or board.game_over:
+            return
+        played = len(board.move_stack)
+        super().handle_click(position)
+        # Send the move once it is complete, including the promotion choice.
+        if len(board.move_stack) > played and not board.promoting_pawn:
+            self.connection.send({'cmd': 'move', 'move': move_to_uci(recorded_moves(board)[-1])})
+
+    def handle_event(self, event):
+        if event.type != SERVER_EVENT:
+            return False
+        message = event.message
+        kind = message.get('type')
+        if kind == 'joined':
+            self.game_id = message['game']
+            self.color = message['color']
+            pygame.display.set_caption(f"Chess - game {self.game_id} as {self.color}")
+        elif kind == 'state':
+            self.board = board_from_state(message)
+        elif kind == 'error':
+            print(f"server: {message['message']}", file=sys.stderr)
+            if self.color is not None:
+                # A rejected move was already shown; ask for the real position.
+                self.connection.send({'cmd': 'state'})
+        elif kind == 'left':
+            print(f"{message['color']} left the game", file=sys.stderr)
+        elif kind == 'closed':
+            print("connection closed", file=sys.stderr)
+        return True
+
+    def run(self):
+        # Server events can only be posted once pygame is up.
+        init_display()
+        self.connection.start()
+        if self.game_id is None:
+            self.connection.send({'cmd': 'new'})
+        else:
+            self.connection.send({'cmd': 'join', 'game': self.game_id})
+        try:
+            super().run()
+        finally:
+            self.connection.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play a game hosted by Chess_server.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--join', type=int, default=None, metavar='GAME',
+                        help="join an existing game instead of creating one")
+    args = parser.parse_args(argv)
+    NetworkGame(ServerConnection(args.host, args.port), args.join).run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
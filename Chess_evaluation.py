@@ -0,0 +1,290 @@
+"""Position evaluation: material, piece-square tables, mobility, king safety
+and pawn structure.
+
+Material and piece-square terms are kept up to date by ``Chess_rules.Board``
+as moves are made (``eval_mg``, ``eval_eg`` and ``phase``), so reading them
+costs nothing. The other terms are computed from the board on request.
+``evaluate_batch`` scores many packed positions at once, with NumPy when
+it is installed; NumPy is only imported on the first batch, so importing
+the rules does not pay for it.
+
+This module does not import ``Chess_rules``; the board imports the tables
+from here. Scores are in centipawns, positive for white unless stated.
+"""
+_numpy = None
+
+# Middlegame and endgame values; the endgame favours pawns slightly more.
+PIECE_VALUES_MG = {'p': 82, 'N': 337, 'B': 365, 'R': 477, 'Q': 1025, 'K': 0}
+PIECE_VALUES_EG = {'p': 94, 'N': 281, 'B': 297, 'R': 512, 'Q': 936, 'K': 0}
+# Game phase weights; 24 means all minor and major pieces are on the board.
+PHASE_WEIGHTS = {'p': 0, 'N': 1, 'B': 1, 'R': 2, 'Q': 4, 'K': 0}
+MAX_PHASE = 24
+
+# Piece-square tables from white's side, row 0 is the eighth rank, so
+# ``table[row * 8 + col]`` matches ``Board.grid[row][col]``.
+_PAWN = (
+    0, 0, 0, 0, 0, 0, 0, 0,
+    50, 50, 50, 50, 50, 50, 50, 50,
+    10, 10, 20, 30, 30, 20, 10, 10,
+    5, 5, 10, 25, 25, 10, 5, 5,
+    0, 0, 0, 20, 20, 0, 0, 0,
+    5, -5, -10, 0, 0, -10, -5, 5,
+    5, 10, 10, -20, -20, 10, 10, 5,
+    0, 0, 0, 0, 0, 0, 0, 0)
+_PAWN_EG = (
+    0, 0, 0, 0, 0, 0, 0, 0,
+    80, 80, 80, 80, 80, 80, 80, 80,
+    50, 50, 50, 50, 50, 50, 50, 50,
+    30, 30, 30, 30, 30, 30, 30, 30,
+    20, 20, 20, 20, 20, 20, 20, 20,
+    10, 10, 10, 10, 10, 10, 10, 10,
+    0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0)
+_KNIGHT = (
+    -50, -40, -30, -30, -30, -30, -40, -50,
+    -40, -20, 0, 0, 0, 0, -20, -40,
+    -30, 0, 10, 15, 15, 10, 0, -30,
+    -30, 5, 15, 20, 20, 15, 5, -30,
+    -30, 0, 15, 20, 20, 15, 0, -30,
+    -30, 5, 10, 15, 15, 10, 5, -30,
+    -40, -20, 0, 5, 5, 0, -20, -40,
+    -50, -40, -30, -30, -30, -30, -40, -50)
+_BISHOP = (
+    -20, -10, -10, -10, -10, -10, -10, -20,
+    -10, 0, 0, 0, 0, 0, 0, -10,
+    -10, 0, 5, 10, 10, 5, 0, -10,
+    -10, 5, 5, 10, 10, 5, 5, -10,
+    -10, 0, 10, 10, 10, 10, 0, -10,
+    -10, 10, 10, 10, 10, 10, 10, -10,
+    -10, 5, 0, 0, 0, 0, 5, -10,
+    -20, -10, -10, -10, -10, -10, -10, -20)
+_ROOK = (
+    0, 0, 0, 0, 0, 0, 0, 0,
+    5, 10, 10, 10, 10, 10, 10, 5,
+    -5, 0, 0, 0, 0, 0, 0, -5,
+    -5, 0, 0, 0, 0, 0, 0, -5,
+    -5, 0, 0, 0, 0, 0, 0, -5,
+    -5, 0, 0, 0, 0, 0, 0, -5,
+    -5, 0, 0, 0, 0, 0, 0, -5,
+    0, 0, 0, 5, 5, 0, 0, 0)
+_QUEEN = (
+    -20, -10, -10, -5, -5, -10, -10, -20,
+    -10, 0, 0, 0, 0, 0, 0, -10,
+    -10, 0, 5, 5, 5, 5, 0, -10,
+    -5, 0, 5, 5, 5, 5, 0, -5,
+    0, 0, 5, 5, 5, 5, 0, -5,
+    -10, 5, 5, 5, 5, 5, 0, -10,
+    -10, 0, 5, 0, 0, 0, 0, -10,
+    -20, -10, -10, -5, -5, -10, -10, -20)
+_KING_MG = (
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -20, -30, -30, -40, -40, -30, -30, -20,
+    -10, -20, -20, -20, -20, -20, -20, -10,
+    20, 20, 0, 0, 0, 0, 20, 20,
+    20, 30, 10, 0, 0, 10, 30, 20)
+_KING_EG = (
+    -50, -40, -30, -20, -20, -30, -40, -50,
+    -30, -20, -10, 0, 0, -10, -20, -30,
+    -30, -10, 20, 30, 30, 20, -10, -30,
+    -30, -10, 30, 40, 40, 30, -10, -30,
+    -30, -10, 30, 40, 40, 30, -10, -30,
+    -30, -10, 20, 30, 30, 20, -10, -30,
+    -30, -30, 0, 0, 0, 0, -30, -30,
+    -50, -30, -30, -30, -30, -30, -30, -50)
+PST_MG = {'p': _PAWN, 'N': _KNIGHT, 'B': _BISHOP, 'R': _ROOK, 'Q': _QUEEN, 'K': _KING_MG}
+PST_EG = {'p': _PAWN_EG, 'N': _KNIGHT, 'B': _BISHOP, 'R': _ROOK, 'Q': _QUEEN, 'K': _KING_EG}
+
+
+def _square_scores(values, tables):
+    # (color_code, symbol) -> 64 signed scores; black reads the table mirrored.
+    scores = {}
+    for symbol, table in tables.items():
+        scores[0, symbol] = tuple(values[symbol] + table[sq] for sq in range(64))
+        scores[1, symbol] = tuple(-(values[symbol] + table[(7 - sq // 8) * 8 + sq % 8])
+                                  for sq in range(64))
+    return scores
+
+
+SQUARE_SCORES_MG = _square_scores(PIECE_VALUES_MG, PST_MG)
+SQUARE_SCORES_EG = _square_scores(PIECE_VALUES_EG, PST_EG)
+
+# Weights for the terms computed on request.
+MOBILITY_WEIGHTS = {'N': 4, 'B': 5, 'R': 2, 'Q': 1}
+PAWN_SHIELD_BONUS = 12
+DOUBLED_PAWN_PENALTY = 15
+ISOLATED_PAWN_PENALTY = 12
+PASSED_PAWN_BONUS = (0, 5, 10, 20, 35, 60, 100, 0)
+
+
+def material_terms(grid):
+    """Return ``(mg, eg, phase)`` for a grid, rescanned from scratch."""
+    mg = eg = phase = 0
+    for row in range(8):
+        for col in range(8):
+            piece = grid[row][col]
+            if piece is not None:
+                key = (piece.color_code, piece.symbol)
+                mg += SQUARE_SCORES_MG[key][row * 8 + col]
+                eg += SQUARE_SCORES_EG[key][row * 8 + col]
+                phase += PHASE_WEIGHTS[piece.symbol]
+    return mg, eg, phase
+
+
+def taper(mg, eg, phase):
+    """Blend middlegame and endgame scores by the remaining material."""
+    phase = min(phase, MAX_PHASE)
+    return (mg * phase + eg * (MAX_PHASE - phase)) // MAX_PHASE
+
+
+def material_score(board):
+    """Material and piece-square score from the board's incremental terms."""
+    return taper(board.eval_mg, board.eval_eg, board.phase)
+
+
+def mobility(board):
+    """Pseudo-legal reach of the minor and major pieces, white minus black."""
+    score = 0
+    grid = board.grid
+    for color, sign in (('white', 1), ('black', -1)):
+        for piece in board.get_pieces(color):
+            weight = MOBILITY_WEIGHTS.get(piece.symbol)
+            if weight:
+                reach = 0
+                for row, col in board.attacked_squares(piece):
+                    target = grid[row][col]
+                    if target is None or target.color_code != piece.color_code:
+                        reach += 1
+                score += sign * weight * reach
+    return score
+
+
+def king_safety(board):
+    """Pawn shield in front of each king, scaled down as material comes off."""
+    score = 0
+    grid = board.grid
+    for color, sign in (('white', 1), ('black', -1)):
+        king = board.king_position(color)
+        if king is None:
+            continue
+        forward = -1 if color == 'white' else 1
+        shield = 0
+        for col in (king[1] - 1, king[1], king[1] + 1):
+            if not 0 <= col < 8:
+                continue
+            for distance in (1, 2):
+                row = king[0] + forward * distance
+                piece = grid[row][col] if 0 <= row < 8 else None
+                if piece is not None and piece.symbol == 'p' and piece.color == color:
+                    shield += 1 if distance == 1 else 0.5
+                    break
+        score += sign * int(shield * PAWN_SHIELD_BONUS)
+    return score * min(board.phase, MAX_PHASE) // MAX_PHASE
+
+
+def pawn_structure(board):
+    """Doubled, isolated and passed pawns, white minus black."""
+    files = {'white': [[] for _ in range(8)], 'black': [[] for _ in range(8)]}
+    for color in files:
+        for piece in board.get_pieces(color):
+            if piece.symbol == 'p':
+                files[color][piece.position[1]].append(piece.position[0])
+
+    score = 0
+    for color, sign in (('white', 1), ('black', -1)):
+        own, other = files[color], files['black' if color == 'white' else 'white']
+        for col, rows in enumerate(own):
+            if not rows:
+                continue
+            score -= sign * DOUBLED_PAWN_PENALTY * (len(rows) - 1)
+            neighbours = [c for c in (col - 1, col + 1) if 0 <= c < 8]
+            if not any(own[c] for c in neighbours):
+                score -= sign * ISOLATED_PAWN_PENALTY * len(rows)
+            blockers = [r for c in [col] + neighbours for r in other[c]]
+            for row in rows:
+                # Passed if no enemy pawn stands ahead on this or a neighbouring file.
+                if color == 'white':
+                    passed, advanced = all(r > row for r in blockers), 7 - row
+                else:
+                    passed, advanced = all(r < row for r in blockers), row
+                if passed:
+                    score += sign * PASSED_PAWN_BONUS[advanced]
+    return score
+
+
+def evaluate(board, full=True):
+    """Score ``board`` from the side to move's point of view.
+
+    With ``full=False`` only the incremental material and piece-square terms
+    are used, which is what the search calls at every leaf.
+    """
+    score = material_score(board)
+    if full:
+        score += mobility(board) + king_safety(board) + pawn_structure(board)
+    return score if board.current_turn == 'white' else -score
+
+
+# Packed positions (``Board.pack``) store ``type | colour << 3`` per square,
+# with types numbered as in Chess_rules.PACKED_TYPES.
+_PACKED_SYMBOLS = (None, 'p', 'N', 'B', 'R', 'Q', 'K')
+
+
+def _packed_table(scores):
+    table = [[0] * 64 for _ in range(16)]
+    for code in range(16):
+        piece_type, color_code = code & 7, code >> 3
+        if 0 < piece_type < len(_PACKED_SYMBOLS):
+            table[code] = list(scores[color_code, _PACKED_SYMBOLS[piece_type]])
+    return table
+
+
+PACKED_MG = _packed_table(SQUARE_SCORES_MG)
+PACKED_EG = _packed_table(SQUARE_SCORES_EG)
+PACKED_PHASE = [PHASE_WEIGHTS[_PACKED_SYMBOLS[code & 7]] if 0 < code & 7 < 7 else 0
+                for code in range(16)]
+
+
+def _evaluate_packed(data):
+    mg = eg = phase = 0
+    for sq in range(64):
+        code = data[sq]
+        if code:
+            mg += PACKED_MG[code][sq]
+            eg += PACKED_EG[code][sq]
+            phase += PACKED_PHASE[code]
+    return taper(mg, eg, phase)
+
+
+def _load_numpy():
+    """Import NumPy on first use; returns None when it is not installed."""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+        except ImportError:
+            numpy = False
+        _numpy = numpy
+    return _numpy or None
+
+
+def evaluate_batch(positions):
+    """Material and piece-square scores, white's view, for many positions.
+
+    ``positions`` holds Boards or bytes from ``Board.pack``. Uses NumPy to
+    score the whole batch in a few array operations when it is installed.
+    """
+    packed = [position.pack() if hasattr(position, 'pack') else bytes(position)
+              for position in positions]
+    np = _load_numpy() if packed else None
+    if np is None:
+        return [_evaluate_packed(data) for data in packed]
+
+    codes = np.frombuffer(b''.join(data[:64] for data in packed), dtype=np.uint8)
+    codes = codes.reshape(len(packed), 64)
+    squares = np.arange(64)
+    mg = np.asarray(PACKED_MG, dtype=np.int64)[codes, squares].sum(axis=1)
+    eg = np.asarray(PACKED_EG, dtype=np.int64)[codes, squares].sum(axis=1)
+    phase = np.minimum(np.asarray(PACKED_PHASE, dtype=np.int64)[codes].sum(axis=1), MAX_PHASE)
+    return ((mg * phase + eg * (MAX_PHASE - phase)) // MAX_PHASE).tolist()
@@ -0,0 +1,261 @@
+"""Load test Chess_server with a swarm of simulated players.
+
+Players are paired into games; white creates a game and black joins it, then
+both play random (or engine-chosen) legal moves until the game ends or a ply
+limit is reached. The server applies every move through
+select_piece/move_piece, the same path as a human player.
+
+The report gives moves per second, the round trip latency of a move as seen
+by the player, the time the server spent validating and applying it and,
+for a server in this process, the memory held by each game.
+
+Run ``python Chess_loadtest.py --help`` for the command line interface.
+"""
+import argparse
+import asyncio
+import gc
+import json
+import random
+import sys
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+from Chess_rules import Board, expand_promotions, move_to_uci
+from Chess_search import find_best_move
+from Chess_server import GameServer
+
+DEFAULT_PLIES = 100
+PERCENTILES = (50, 90, 99)
+# Shared by every game, so not counted in a game's memory.
+_SHARED_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType)
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of ``values``; None when there are none."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def deep_size(root):
+    """Bytes held by ``root`` and every object reachable from it, counted once."""
+    seen = set()
+    pending = [root]
+    size = 0
+    while pending:
+        obj = pending.pop()
+        if id(obj) in seen or isinstance(obj, _SHARED_TYPES):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        pending.extend(gc.get_referents(obj))
+    return size
+
+
+class TimingExecutor(ThreadPoolExecutor):
+    """A thread pool that records how long each job takes to run."""
+
+    def __init__(self, max_workers=None):
+        super().__init__(max_workers)
+        self.durations = []
+
+    def submit(self, fn, /, *args, **kwargs):
+        def timed():
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.durations.append(time.perf_counter() - start)
+        return super().submit(timed)
+
+
+class LoadReport:
+    def __init__(self, players, games, moves, elapsed, latencies, validations=(),
+                 game_memory=(), errors=0):
+        self.players = players
+        self.games = games
+        self.moves = moves
+        self.elapsed = elapsed
+        self.latencies = list(latencies)
+        self.validations = list(validations)
+        self.game_memory = list(game_memory)
+        self.errors = errors
+
+    @property
+    def moves_per_second(self):
+        return self.moves / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def memory_per_game(self):
+        if not self.game_memory:
+            return None
+        return sum(self.game_memory) / len(self.game_memory)
+
+    def summary(self):
+        lines = [f"{self.players} players, {self.games} games, {self.moves} moves "
+                 f"in {self.elapsed:.2f}s ({self.moves_per_second:.0f} moves/s), "
+                 f"{self.errors} errors"]
+        for name, values in (('round trip', self.latencies), ('validation', self.validations)):
+            if values:
+                points = ', '.join(f"p{p} {percentile(values, p) * 1000:.2f}ms" for p in PERCENTILES)
+                lines.append(f"{name}: {points}")
+        if self.game_memory:
+            lines.append(f"memory per game: {self.memory_per_game / 1024:.1f} KiB "
+                         f"(max {max(self.game_memory) / 1024:.1f} KiB)")
+        return '\n'.join(lines)
+
+
+class Bot:
+    """One simulated player speaking the server's JSON-lines protocol."""
+
+    def __init__(self, reader, writer, rng, depth=None, max_plies=DEFAULT_PLIES):
+        self.reader = reader
+        self.writer = writer
+        self.rng = rng
+        self.depth = depth
+        self.max_plies = max_plies
+        self.color = None
+        self.game_id = None
+        self.latencies = []
+        self.errors = 0
+
+    async def send(self, **message):
+        self.writer.write(json.dumps(message).encode() + b'\n')
+        await self.writer.drain()
+
+    async def receive(self, kind):
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                raise ConnectionError("server closed the connection")
+            message = json.loads(line)
+            if message['type'] in (kind, 'error'):
+                return message
+
+    async def seat(self, game_id=None):
+        if game_id is None:
+            await self.send(cmd='new')
+        else:
+            await self.send(cmd='join', game=game_id)
+        message = await self.receive('joined')
+        if message['type'] == 'error':
+            raise ConnectionError(message['message'])
+        self.game_id = message['game']
+        self.color = message['color']
+
+    async def choose_move(self, board):
+        if self.depth:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(None, find_best_move, board, self.depth)
+            move = result.best_move
+        else:
+            moves = sorted(board.legal_moves(board.current_turn))
+            move = self.rng.choice(expand_promotions(board, moves))
+        return move_to_uci(move)
+
+    async def play(self):
+        """Play until the game ends or ``max_plies``; returns the plies seen."""
+        plies = 0
+        sent = None
+        while True:
+            message = await self.receive('state')
+            if message['type'] == 'error':
+                self.errors += 1
+                sent = None
+                await self.send(cmd='state')
+                continue
+            if message['last_move'] is not None:
+                plies += 1
+                if sent is not None:
+                    self.latencies.append(time.perf_counter() - sent)
+                    sent = None
+            if message['game_over'] or plies >= self.max_plies:
+                return plies
+            if message['turn'] == self.color and sent is None:
+                move = await self.choose_move(Board.from_fen(message['fen']))
+                sent = time.perf_counter()
+                await self.send(cmd='move', move=move)
+
+    async def close(self):
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+async def _connect(host, port, seed, depth, max_plies):
+    reader, writer = await asyncio.open_connection(host, port)
+    return Bot(reader, writer, random.Random(seed), depth, max_plies)
+
+
+async def _play_game(host, port, seed, depth, max_plies):
+    white = await _connect(host, port, seed, depth, max_plies)
+    await white.seat()
+    black = await _connect(host, port, seed + 1, depth, max_plies)
+    await black.seat(white.game_id)
+    plies, _ = await asyncio.gather(white.play(), black.play())
+    return white, black, plies
+
+
+async def run_load_test(players=20, max_plies=DEFAULT_PLIES, depth=None, host='127.0.0.1',
+                        port=None, workers=None, seed=0):
+    """Play ``players // 2`` concurrent games and return a LoadReport.
+
+    Without ``port`` a server is started in this process, which also makes
+    the validation times and memory per game available.
+    """
+    if players < 2:
+        raise ValueError("players must be at least 2")
+    server = None
+    if port is None:
+        server = GameServer(executor=TimingExecutor(workers))
+        await server.start(host, 0)
+        port = server.port
+
+    try:
+        start = time.perf_counter()
+        results = await asyncio.gather(*(_play_game(host, port, seed + 2 * number, depth, max_plies)
+                                         for number in range(players // 2)))
+        elapsed = time.perf_counter() - start
+
+        # Measure while every game is still seated; leaving frees it.
+        game_memory = []
+        if server is not None:
+            game_memory = [deep_size(game.board) for game in server.games.values()]
+        bots = [bot for white, black, _ in results for bot in (white, black)]
+        for bot in bots:
+            await bot.close()
+    finally:
+        if server is not None:
+            await server.close()
+
+    return LoadReport(len(bots), len(results), sum(plies for _, _, plies in results), elapsed,
+                      [latency for bot in bots for latency in bot.latencies],
+                      server.executor.durations if server is not None else (),
+                      game_memory, sum(bot.errors for bot in bots))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the chess server with simulated players.")
+    parser.add_argument('--players', type=int, default=20)
+    parser.add_argument('--plies', type=int, default=DEFAULT_PLIES, help="ply limit per game")
+    parser.add_argument('--depth', type=int, default=None,
+                        help="choose moves with the engine at this depth (default: random)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=None,
+                        help="use a running server (default: start one in this process)")
+    parser.add_argument('--workers', type=int, default=None, help="rules worker threads")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    report = asyncio.run(run_load_test(args.players, args.plies, args.depth, args.host,
+                                       args.port, args.workers, args.seed))
+    print(report.summary())
+    return 1 if report.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""Perft node counting and move-generation throughput measurement.
+
+Run ``python Chess_perft.py --help`` for the command line interface.
+"""
+import argparse
+import sys
+import time
+
+from Chess_rules import Board, Pawn, PROMOTION_LETTERS, expand_promotions, move_to_uci
+
+# Standard perft positions with their published node counts by depth.
+REFERENCE_POSITIONS = {
+    'start': ('rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1',
+              [20, 400, 8902, 197281, 4865609]),
+    'kiwipete': ('r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+                 [48, 2039, 97862, 4085603]),
+    'position3': ('8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1',
+                  [14, 191, 2812, 43238, 674624]),
+    'position4': ('r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1',
+                  [6, 264, 9467, 422333]),
+    'position5': ('rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8',
+                  [44, 1486, 62379, 2103487]),
+}
+
+
+def _moves(board):
+    return expand_promotions(board, board.legal_moves(board.current_turn))
+
+
+def _count_leaves(board):
+    count = 0
+    for start, end in board.legal_moves(board.current_turn):
+        piece = board.grid[start[0]][start[1]]
+        count += len(PROMOTION_LETTERS) if isinstance(piece, Pawn) and end[0] in (0, 7) else 1
+    return count
+
+
+def perft(board, depth):
+    """Count the leaf nodes of the legal move tree ``depth`` plies deep."""
+    if depth == 0:
+        return 1
+    if depth == 1:
+        return _count_leaves(board)
+    nodes = 0
+    for move in _moves(board):
+        record = board.make_move(move)
+        nodes += perft(board, depth - 1)
+        board.unmake_move(record)
+    return nodes
+
+
+def divide(board, depth):
+    """Return ``{uci_move: perft(child, depth - 1)}`` for each root move."""
+    counts = {}
+    for move in _moves(board):
+        record = board.make_move(move)
+        counts[move_to_uci(move)] = perft(board, depth - 1)
+        board.unmake_move(record)
+    return counts
+
+
+def run_perft(board, max_depth):
+    """Return ``(depth, nodes, seconds)`` for every depth up to ``max_depth``."""
+    results = []
+    for depth in range(1, max_depth + 1):
+        started = time.perf_counter()
+        nodes = perft(board, depth)
+        results.append((depth, nodes, time.perf_counter() - started))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Count move-generation nodes with perft.")
+    parser.add_argument('--position', choices=sorted(REFERENCE_POSITIONS), default='start')
+    parser.add_argument('--fen', help="FEN to use instead of a reference position")
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--divide', action='store_true', help="print node counts per root move")
+    args = parser.parse_args(argv)
+
+    if args.fen:
+        fen, expected = args.fen, []
+    else:
+        fen, expected = REFERENCE_POSITIONS[args.position]
+    board = Board.from_fen(fen)
+
+    if args.divide:
+        total = 0
+        for move, nodes in sorted(divide(board, args.depth).items()):
+            print(f"{move}: {nodes}")
+            total += nodes
+        print(f"\nNodes searched: {total}")
+        return 0
+
+    status = 0
+    for depth, nodes, seconds in run_perft(board, args.depth):
+        rate = nodes / seconds if seconds else float('inf')
+        line = f"depth {depth}: {nodes} nodes in {seconds:.3f}s ({rate:,.0f} nodes/s)"
+        if depth <= len(expected) and nodes != expected[depth - 1]:
+            line += f"  MISMATCH, expected {expected[depth - 1]}"
+            status = 1
+        print(line)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,289 @@
+"""Streaming PGN reading and writing with SAN move text.
+
+``read_games`` walks a text stream line by line and yields one PgnGame at a
+time, so memory use does not grow with the size of the archive. Moves are
+resolved against ``Board.legal_moves`` and replayed through
+select_piece/move_piece/promote_pawn, the same path the UI uses.
+
+Run ``python Chess_pgn.py --help`` for the command line interface.
+"""
+import argparse
+import re
+import sys
+
+from Chess_rules import (Board, King, Pawn, PROMOTION_LETTERS, FILES, move_to_uci,
+                         parse_square, square_name)
+
+RESULTS = ('1-0', '0-1', '1/2-1/2', '*')
+SEVEN_TAG_ROSTER = ('Event', 'Site', 'Date', 'Round', 'White', 'Black', 'Result')
+LINE_LENGTH = 80
+
+_HEADER = re.compile(r'^\[(\w+)\s+"((?:[^"\\]|\\.)*)"\]\s*$')
+_HEADER_ESCAPE = re.compile(r'\\(.)')
+_TOKEN = re.compile(r'[{}();]|\$\d+|[^\s{}();]+')
+_MOVE_NUMBER = re.compile(r'^\d+\.+')
+_SAN = re.compile(r'^([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])(?:=?([NBRQ]))?$')
+_PROMOTION_NAMES = {letter.upper(): name for name, letter in PROMOTION_LETTERS.items()}
+
+
+class PgnGame:
+    def __init__(self, headers=None, moves=None, result='*'):
+        self.headers = headers if headers is not None else {}
+        self.moves = moves if moves is not None else []
+        self.result = result
+
+    def __repr__(self):
+        return (f"PgnGame({self.headers.get('White', '?')} - {self.headers.get('Black', '?')}, "
+                f"{len(self.moves)} moves, {self.result})")
+
+
+def move_to_san(board, move):
+    """Format a legal ``(start, end[, promotion])`` move in SAN for ``board``."""
+    start, end = move[0], move[1]
+    piece = board.grid[start[0]][start[1]]
+    if piece is None:
+        raise ValueError(f"No piece on {square_name(start)}")
+
+    if isinstance(piece, King) and abs(end[1] - start[1]) == 2:
+        san = 'O-O' if end[1] > start[1] else 'O-O-O'
+    else:
+        capture = board.grid[end[0]][end[1]] is not None
+        if isinstance(piece, Pawn):
+            capture = capture or end[1] != start[1]
+            san = FILES[start[1]] + 'x' if capture else ''
+        else:
+            rivals = [other for other, target in board.legal_moves(piece.color)
+                      if target == end and other != start and
+                      type(board.grid[other[0]][other[1]]) is type(piece)]
+            disambiguation = ''
+            if rivals:
+                if all(other[1] != start[1] for other in rivals):
+                    disambiguation = FILES[start[1]]
+                elif all(other[0] != start[0] for other in rivals):
+                    disambiguation = str(8 - start[0])
+                else:
+                    disambiguation = square_name(start)
+            san = piece.symbol + disambiguation + ('x' if capture else '')
+        san += square_name(end)
+        if isinstance(piece, Pawn) and end[0] in (0, 7):
+            promotion = move[2] if len(move) > 2 and move[2] else 'queen'
+            san += '=' + PROMOTION_LETTERS[promotion].upper()
+
+    record = board.make_move(move)
+    try:
+        if board.is_in_check(board.current_turn):
+            san += '#' if not board.legal_moves(board.current_turn) else '+'
+    finally:
+        board.unmake_move(record)
+    return san
+
+
+def parse_san(board, san):
+    """Resolve a SAN string to the matching legal move on ``board``."""
+    text = san.rstrip('+#!?')
+    color = board.current_turn
+    legal = board.legal_moves(color)
+    if text in ('O-O', '0-0', 'O-O-O', '0-0-0'):
+        king = board.king_position(color)
+        if king is not None and king[1] == 4:
+            end = (king[0], 6 if len(text) == 3 else 2)
+            if (king, end) in legal:
+                return king, end
+        raise ValueError(f"Illegal castling {san!r} in {board.to_fen()}")
+
+    match = _SAN.match(text)
+    if match is None:
+        raise ValueError(f"Bad SAN move {san!r}")
+    letter, from_file, from_rank, destination, promotion = match.groups()
+    symbol = letter or 'p'
+    end = parse_square(destination)
+    candidates = []
+    for start, target in legal:
+        if target != end:
+            continue
+        piece = board.grid[start[0]][start[1]]
+        if piece.symbol != symbol:
+            continue
+        if from_file and FILES[start[1]] != from_file:
+            continue
+        if from_rank and 8 - start[0] != int(from_rank):
+            continue
+        candidates.append(start)
+    if len(candidates) != 1:
+        problem = 'Ambiguous' if candidates else 'Illegal'
+        raise ValueError(f"{problem} move {san!r} in {board.to_fen()}")
+
+    if symbol == 'p' and end[0] in (0, 7):
+        if promotion is None:
+            raise ValueError(f"Missing promotion piece in {san!r}")
+        return candidates[0], end, _PROMOTION_NAMES[promotion]
+    if promotion is not None:
+        raise ValueError(f"Unexpected promotion in {san!r}")
+    return candidates[0], end
+
+
+def play_move(board, move):
+    """Play a legal move through select_piece/move_piece/promote_pawn."""
+    if not board.select_piece(move[0]) or not board.move_piece(move[1]):
+        raise ValueError(f"Illegal move {move_to_uci(move)} in {board.to_fen()}")
+    if board.promoting_pawn:
+        board.promote_pawn(move[2] if len(move) > 2 and move[2] else 'queen')
+
+
+def start_board(headers):
+    fen = headers.get('FEN')
+    return Board.from_fen(fen) if fen else Board()
+
+
+def replay_game(game):
+    """Play ``game`` out on a fresh board and return the board.
+
+    Raises ValueError naming the offending move if the move text is illegal.
+    """
+    board = start_board(game.headers)
+    for ply, san in enumerate(game.moves):
+        try:
+            play_move(board, parse_san(board, san))
+        except ValueError as e:
+            raise ValueError(f"Move {ply // 2 + 1} ({san}): {e}") from None
+    return board
+
+
+def read_games(stream):
+    """Yield a PgnGame for every game in a text stream, one at a time.
+
+    Comments, variations and numeric annotation glyphs are skipped.
+    """
+    game = PgnGame()
+    comment = False
+    depth = 0
+    for line in stream:
+        if line.startswith('%'):
+            continue
+        if not comment and depth == 0:
+            header = _HEADER.match(line.strip())
+            if header:
+                if game.moves:
+                    yield game
+                    game = PgnGame()
+                game.headers[header.group(1)] = _HEADER_ESCAPE.sub(r'\1', header.group(2))
+                continue
+
+        for token in _TOKEN.findall(line):
+            if comment:
+                comment = token != '}'
+            elif token == '{':
+                comment = True
+            elif token == ';':
+                break
+            elif token == '(':
+                depth += 1
+            elif token == ')':
+                depth = max(depth - 1, 0)
+            elif depth or token.startswith('$'):
+                continue
+            elif token in RESULTS:
+                game.result = token
+                yield game
+                game = PgnGame()
+            else:
+                san = _MOVE_NUMBER.sub('', token)
+                if san:
+                    game.moves.append(san)
+    if game.moves or game.headers:
+        yield game
+
+
+def game_result(board):
+    if not board.game_over:
+        return '*'
+    if board.winner is None:
+        return '1/2-1/2'
+    return '1-0' if board.winner == 'white' else '0-1'
+
+
+def recorded_moves(board):
+    """Return the moves on ``board.move_stack`` as ``(start, end[, promotion])``.
+
+    A pawn still waiting for its promotion choice is left out.
+    """
+    moves = []
+    for record in board.move_stack:
+        if record.promoted is not None:
+            moves.append((record.start, record.end, type(record.promoted).__name__.lower()))
+        elif isinstance(record.piece, Pawn) and record.end[0] in (0, 7):
+            break
+        else:
+            moves.append((record.start, record.end))
+    return moves
+
+
+def format_game(moves, headers=None, fen=None):
+    """Return PGN text for ``moves`` played from ``fen`` (default: initial position)."""
+    headers = dict(headers or {})
+    board = Board.from_fen(fen) if fen else Board()
+    text = []
+    for move in moves:
+        san = move_to_san(board, move)
+        if board.current_turn == 'white':
+            text.append(f"{board.fullmove_number}.")
+        elif not text:
+            text.append(f"{board.fullmove_number}...")
+        text.append(san)
+        play_move(board, move)
+    result = headers.get('Result') or game_result(board)
+    text.append(result)
+
+    tags = {name: '?' for name in SEVEN_TAG_ROSTER}
+    tags['Date'] = '????.??.??'
+    tags.update(headers)
+    tags['Result'] = result
+    if fen:
+        tags['SetUp'] = '1'
+        tags['FEN'] = fen
+    lines = [f'[{name} "{_escape(str(value))}"]' for name, value in tags.items()]
+    lines.append('')
+    line = ''
+    for token in text:
+        if line and len(line) + 1 + len(token) > LINE_LENGTH:
+            lines.append(line)
+            line = token
+        else:
+            line = f"{line} {token}" if line else token
+    lines.append(line)
+    return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def write_game(stream, moves, headers=None, fen=None):
+    """Append one game to a text stream, followed by a blank line."""
+    stream.write(format_game(moves, headers, fen))
+    stream.write('\n')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check that every game in a PGN file replays.")
+    parser.add_argument('file', help="PGN file ('-' for stdin)")
+    args = parser.parse_args(argv)
+
+    stream = sys.stdin if args.file == '-' else open(args.file)
+    games = errors = 0
+    try:
+        for games, game in enumerate(read_games(stream), start=1):
+            try:
+                replay_game(game)
+            except ValueError as e:
+                errors += 1
+                print(f"game {games}: {e}")
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    print(f"{games} games, {errors} with errors")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,250 @@
+"""Opt-in call counters and timers for the hot paths of Chess_rules.
+
+A Profiler wraps the methods in PROFILED while it is enabled and puts the
+originals back when it is disabled, so nothing is measured, and nothing is
+slower, unless a profiler is running::
+
+    with Profiler() as profiler:
+        board.select_piece((6, 4))
+        board.move_piece((4, 4))
+    print(profiler.report())
+
+``Board._update_game_status`` is the check/checkmate/stalemate detection
+run by move_piece and promote_pawn. Results can be written as JSON or in
+the marshal format read by ``pstats.Stats``; ``pstats.Stats(profiler)``
+also works directly.
+
+Run ``python Chess_profiling.py --help`` for the command line interface.
+"""
+import argparse
+import json
+import marshal
+import random
+import sys
+import threading
+import time
+
+from Chess_pgn import parse_san, play_move, read_games, start_board
+from Chess_rules import Bishop, Board, King, Knight, Pawn, Queen, Rook, move_to_uci
+
+PROFILED = [(Board, 'is_square_under_attack'), (Board, 'is_in_check'), (Board, 'legal_moves'),
+            (Board, '_update_game_status'), (Board, 'move_piece'), (Board, 'promote_pawn')]
+PROFILED += [(piece_type, 'valid_moves') for piece_type in (Pawn, Knight, Bishop, Rook, Queen, King)]
+
+_active = None
+
+
+def _label(owner, name):
+    return f"{owner.__name__}.{name}"
+
+
+class FunctionStats:
+    __slots__ = ('calls', 'total', 'own', 'max')
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.own = 0.0
+        self.max = 0.0
+
+    def as_dict(self):
+        return {'calls': self.calls, 'total': self.total, 'own': self.own, 'max': self.max}
+
+
+class Profiler:
+    """Counts calls and times each method in PROFILED while enabled.
+
+    ``total`` includes time spent in profiled callees, ``own`` does not.
+    Only one profiler can be enabled at a time.
+    """
+
+    def __init__(self, targets=None):
+        self.targets = list(targets if targets is not None else PROFILED)
+        self.functions = {_label(owner, name): FunctionStats() for owner, name in self.targets}
+        self.elapsed = 0.0
+        self.stats = {}
+        self._originals = []
+        self._local = threading.local()
+        self._started = None
+
+    @property
+    def enabled(self):
+        return _active is self
+
+    def enable(self):
+        global _active
+        if _active is not None:
+            raise RuntimeError("A profiler is already enabled")
+        _active = self
+        for owner, name in self.targets:
+            original = owner.__dict__[name]
+            self._originals.append((owner, name, original))
+            setattr(owner, name, self._wrap(original, self.functions[_label(owner, name)]))
+        self._started = time.perf_counter()
+
+    def disable(self):
+        global _active
+        if _active is not self:
+            return
+        self.elapsed += time.perf_counter() - self._started
+        for owner, name, original in reversed(self._originals):
+            setattr(owner, name, original)
+        self._originals = []
+        _active = None
+
+    def __enter__(self):
+        self.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.disable()
+
+    def _wrap(self, function, entry):
+        local = self._local
+        clock = time.perf_counter
+
+        def profiled(*args, **kwargs):
+            # Each frame on the stack collects the time of its profiled callees.
+            stack = local.__dict__.setdefault('stack', [])
+            stack.append(0.0)
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = clock() - start
+                callees = stack.pop()
+                if stack:
+                    stack[-1] += elapsed
+                entry.calls += 1
+                entry.total += elapsed
+                entry.own += elapsed - callees
+                if elapsed > entry.max:
+                    entry.max = elapsed
+
+        profiled.__wrapped__ = function
+        profiled.__name__ = function.__name__
+        profiled.__qualname__ = function.__qualname__
+        profiled.__doc__ = function.__doc__
+        return profiled
+
+    def reset(self):
+        for entry in self.functions.values():
+            entry.__init__()
+        self.elapsed = 0.0
+
+    def merge(self, other):
+        """Add the counts and times of ``other`` to this profiler."""
+        for label, theirs in other.functions.items():
+            entry = self.functions.setdefault(label, FunctionStats())
+            entry.calls += theirs.calls
+            entry.total += theirs.total
+            entry.own += theirs.own
+            entry.max = max(entry.max, theirs.max)
+        self.elapsed += other.elapsed
+
+    def calls(self, label):
+        return self.functions[label].calls
+
+    def as_dict(self):
+        return {'elapsed': self.elapsed,
+                'functions': {label: entry.as_dict() for label, entry in self.functions.items()}}
+
+    def write_json(self, path):
+        with open(path, 'w') as stream:
+            json.dump(self.as_dict(), stream, indent=2)
+
+    def create_stats(self):
+        """Fill ``self.stats`` in the layout cProfile uses, for ``pstats.Stats``."""
+        self.stats = {}
+        for owner, name in self.targets:
+            function = owner.__dict__[name]
+            code = getattr(function, '__wrapped__', function).__code__
+            entry = self.functions[_label(owner, name)]
+            key = (code.co_filename, code.co_firstlineno, _label(owner, name))
+            self.stats[key] = (entry.calls, entry.calls, entry.own, entry.total, {})
+
+    def dump_stats(self, path):
+        """Write a file that ``pstats.Stats(path)`` can load."""
+        self.create_stats()
+        with open(path, 'wb') as stream:
+            marshal.dump(self.stats, stream)
+
+    def report(self):
+        lines = [f"{'function':<30} {'calls':>8} {'total ms':>10} {'own ms':>10} {'max ms':>9}"]
+        for label, entry in sorted(self.functions.items(), key=lambda item: -item[1].total):
+            if entry.calls:
+                lines.append(f"{label:<30} {entry.calls:>8} {entry.total * 1000:>10.3f} "
+                             f"{entry.own * 1000:>10.3f} {entry.max * 1000:>9.3f}")
+        lines.append(f"elapsed {self.elapsed * 1000:.3f} ms")
+        return '\n'.join(lines)
+
+
+def profile_moves(board, moves):
+    """Play ``moves`` on ``board`` and yield ``(move, fen, Profiler)`` for each.
+
+    Each move is played through select_piece/move_piece/promote_pawn under
+    its own profiler; ``fen`` is the position before the move.
+    """
+    for move in moves:
+        fen = board.to_fen()
+        with Profiler() as profiler:
+            play_move(board, move)
+        yield move, fen, profiler
+
+
+def _random_moves(board, count, seed):
+    rng = random.Random(seed)
+    for _ in range(count):
+        if board.game_over:
+            return
+        yield rng.choice(sorted(board.legal_moves(board.current_turn)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile the rules code move by move.")
+    parser.add_argument('--pgn', help="replay the first game of this PGN file")
+    parser.add_argument('--moves', type=int, default=200, help="random moves to play without --pgn")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--top', type=int, default=5, help="slowest moves to show")
+    parser.add_argument('--json', help="write the totals as JSON")
+    parser.add_argument('--pstats', help="write the totals for pstats.Stats")
+    args = parser.parse_args(argv)
+
+    if args.pgn:
+        with open(args.pgn) as stream:
+            game = next(read_games(stream), None)
+        if game is None:
+            parser.error(f"no game in {args.pgn}")
+        board = start_board(game.headers)
+        # Resolve SAN on a second board so the profiled one only sees the moves.
+        replay = start_board(game.headers)
+        moves = []
+        for san in game.moves:
+            moves.append(parse_san(replay, san))
+            play_move(replay, moves[-1])
+    else:
+        board = Board()
+        moves = _random_moves(board, args.moves, args.seed)
+
+    totals = Profiler()
+    slowest = []
+    for move, fen, profiler in profile_moves(board, moves):
+        totals.merge(profiler)
+        slowest.append((profiler.elapsed, move_to_uci(move), fen, profiler))
+    slowest.sort(key=lambda item: -item[0])
+
+    for _, uci, fen, profiler in slowest[:args.top]:
+        print(f"{uci} in {fen}")
+        print(profiler.report())
+        print()
+    print(f"totals over {len(slowest)} moves")
+    print(totals.report())
+    if args.json:
+        totals.write_json(args.json)
+    if args.pstats:
+        totals.dump_stats(args.pstats)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
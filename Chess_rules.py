@@ -0,0 +1,1135 @@
+"""Chess rules core: pieces, piece factories and the Board.
+
+This module has no pygame dependency so it can be imported by headless
+workers; rendering lives in ``Two_player_chess``.
+"""
+import random
+from abc import ABC, abstractmethod
+
+from Chess_evaluation import PHASE_WEIGHTS, SQUARE_SCORES_EG, SQUARE_SCORES_MG, material_terms
+
+KNIGHT_OFFSETS = ((2, 1), (2, -1), (-2, 1), (-2, -1), (1, 2), (1, -2), (-1, 2), (-1, -2))
+KING_OFFSETS = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+ROOK_DIRECTIONS = ((0, 1), (1, 0), (0, -1), (-1, 0))
+BISHOP_DIRECTIONS = ((1, 1), (1, -1), (-1, 1), (-1, -1))
+FILES = 'abcdefgh'
+WHITE, BLACK = 0, 1
+COLOR_CODES = {'white': WHITE, 'black': BLACK}
+COLOR_NAMES = ('white', 'black')
+
+
+def _step_table(offsets):
+    return [[tuple((row + dr, col + dc) for dr, dc in offsets
+                   if 0 <= row + dr < 8 and 0 <= col + dc < 8)
+             for col in range(8)] for row in range(8)]
+
+
+def _ray_table(directions):
+    table = [[[] for _ in range(8)] for _ in range(8)]
+    for row in range(8):
+        for col in range(8):
+            for dr, dc in directions:
+                ray = []
+                r, c = row + dr, col + dc
+                while 0 <= r < 8 and 0 <= c < 8:
+                    ray.append((r, c))
+                    r, c = r + dr, c + dc
+                if ray:
+                    table[row][col].append(tuple(ray))
+            table[row][col] = tuple(table[row][col])
+    return table
+
+
+def _pawn_tables():
+    pushes = [[[()] * 8 for _ in range(8)] for _ in range(2)]
+    captures = [[[()] * 8 for _ in range(8)] for _ in range(2)]
+    for code, direction, start_row in ((WHITE, -1, 6), (BLACK, 1, 1)):
+        for row in range(8):
+            forward = row + direction
+            if not 0 <= forward < 8:
+                continue
+            for col in range(8):
+                squares = [(forward, col)]
+                if row == start_row:
+                    squares.append((forward + direction, col))
+                pushes[code][row][col] = tuple(squares)
+                captures[code][row][col] = tuple((forward, c) for c in (col - 1, col + 1) if 0 <= c < 8)
+    return pushes, captures
+
+
+# Per-square move tables, indexed ``[row][col]`` (pawns ``[color_code][row][col]``),
+# so move generation never recomputes offsets or checks board edges.
+KNIGHT_TARGETS = _step_table(KNIGHT_OFFSETS)
+KING_TARGETS = _step_table(KING_OFFSETS)
+ROOK_RAYS = _ray_table(ROOK_DIRECTIONS)
+BISHOP_RAYS = _ray_table(BISHOP_DIRECTIONS)
+QUEEN_RAYS = [[ROOK_RAYS[row][col] + BISHOP_RAYS[row][col] for col in range(8)] for row in range(8)]
+PAWN_PUSHES, PAWN_CAPTURES = _pawn_tables()
+
+
+def square_name(position):
+    """Algebraic name of a ``(row, col)`` square, e.g. ``(6, 4)`` -> ``'e2'``."""
+    row, col = position
+    return f"{FILES[col]}{8 - row}"
+
+
+def parse_square(name):
+    """``(row, col)`` of an algebraic square name such as ``'e2'``."""
+    if len(name) != 2 or name[0] not in FILES or name[1] not in '12345678':
+        raise ValueError(f"Bad square {name!r}")
+    return 8 - int(name[1]), FILES.index(name[0])
+
+
+PROMOTION_LETTERS = {'queen': 'q', 'rook': 'r', 'bishop': 'b', 'knight': 'n'}
+
+
+def move_to_uci(move):
+    """Format ``(start, end[, promotion])`` as a UCI string such as ``'e7e8q'``."""
+    text = square_name(move[0]) + square_name(move[1])
+    if len(move) > 2 and move[2]:
+        text += PROMOTION_LETTERS[move[2]]
+    return text
+
+
+def parse_uci(text):
+    """Parse a UCI move string into ``(start, end, promotion)``."""
+    promotion = None
+    if len(text) == 5:
+        promotion = {letter: name for name, letter in PROMOTION_LETTERS.items()}.get(text[4])
+        if promotion is None:
+            raise ValueError(f"Bad promotion piece in {text!r}")
+    elif len(text) != 4:
+        raise ValueError(f"Bad UCI move {text!r}")
+    return parse_square(text[0:2]), parse_square(text[2:4]), promotion
+
+
+PROMOTION_CODES = {None: 0, 'queen': 1, 'rook': 2, 'bishop': 3, 'knight': 4}
+PROMOTION_NAMES = {code: name for name, code in PROMOTION_CODES.items()}
+
+
+def encode_move(move):
+    """Pack ``(start, end[, promotion])`` into 16 bits: from, to, promotion piece."""
+    (from_row, from_col), (to_row, to_col) = move[0], move[1]
+    promotion = move[2] if len(move) > 2 else None
+    return (from_row * 8 + from_col) | (to_row * 8 + to_col) << 6 | PROMOTION_CODES[promotion] << 12
+
+
+def decode_move(code):
+    start = divmod(code & 63, 8)
+    end = divmod(code >> 6 & 63, 8)
+    promotion = PROMOTION_NAMES[code >> 12 & 7]
+    return (start, end, promotion) if promotion else (start, end)
+
+
+STARTING_FEN = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+FEN_PIECES = {'p': 'pawn', 'r': 'rook', 'n': 'knight', 'b': 'bishop', 'q': 'queen', 'k': 'king'}
+# Castling flag -> (king row, rook column).
+CASTLING_FLAGS = {'K': (7, 7), 'Q': (7, 0), 'k': (0, 7), 'q': (0, 0)}
+
+# Packed positions: one byte per square, ``PACKED_TYPES.index(name) | colour << 3``
+# (0 is empty), then side to move, castling bits in CASTLING_FLAGS order,
+# en passant file + 1, halfmove clock and a two-byte fullmove number.
+PACKED_TYPES = (None, 'pawn', 'knight', 'bishop', 'rook', 'queen', 'king')
+PACKED_SIZE = 70
+
+# Zobrist keys, generated from a fixed seed so hashes are stable across runs.
+_zobrist_random = random.Random(0x5AC4)
+ZOBRIST_PIECES = {(color, symbol): [_zobrist_random.getrandbits(64) for _ in range(64)]
+                  for color in ('white', 'black') for symbol in 'pRNBQK'}
+ZOBRIST_BLACK_TO_MOVE = _zobrist_random.getrandbits(64)
+ZOBRIST_CASTLING = {flag: _zobrist_random.getrandbits(64) for flag in CASTLING_FLAGS}
+ZOBRIST_EN_PASSANT = [_zobrist_random.getrandbits(64) for _ in range(8)]
+
+
+class Piece(ABC):
+    # Slots and an integer colour keep each piece small; ``color`` and
+    # ``image_key`` are derived on access.
+    __slots__ = ('color_code', 'position', 'has_moved')
+
+    def __init__(self, color, position):
+        self.color_code = COLOR_CODES[color]
+        self.position = position
+        self.has_moved = False
+
+    @property
+    def color(self):
+        return COLOR_NAMES[self.color_code]
+
+    @property
+    def image_key(self):
+        return 'wb'[self.color_code] + self.symbol
+
+    def __str__(self):
+        return f"{self.color[0]}{self.symbol}"
+
+    @abstractmethod
+    def valid_moves(self, board):
+        raise NotImplementedError("Subclasses must implement this method")
+
+    def move(self, new_position, board):
+        valid_moves = self.valid_moves(board)
+        if new_position in valid_moves:
+            self.position = new_position
+            self.has_moved = True
+            return True
+        return False
+
+    def _slide(self, board, rays):
+        moves = []
+        grid = board.grid
+        color_code = self.color_code
+        for ray in rays:
+            for target in ray:
+                piece = grid[target[0]][target[1]]
+                if piece is None:
+                    moves.append(target)
+                else:
+                    if piece.color_code != color_code:
+                        moves.append(target)
+                    break
+        return moves
+
+    def _step(self, board, targets):
+        grid = board.grid
+        color_code = self.color_code
+        return [target for target in targets
+                if grid[target[0]][target[1]] is None or
+                grid[target[0]][target[1]].color_code != color_code]
+
+
+class Pawn(Piece):
+    __slots__ = ()
+    symbol = 'p'
+
+    def valid_moves(self, board):
+        moves = []
+        grid = board.grid
+        row, col = self.position
+        color_code = self.color_code
+
+        pushes = PAWN_PUSHES[color_code][row][col]
+        if pushes and grid[pushes[0][0]][col] is None:
+            moves.append(pushes[0])
+            if len(pushes) > 1 and grid[pushes[1][0]][col] is None:
+                moves.append(pushes[1])
+
+        for capture_pos in PAWN_CAPTURES[color_code][row][col]:
+            piece = grid[capture_pos[0]][capture_pos[1]]
+            if piece is not None and piece.color_code != color_code:
+                moves.append(capture_pos)
+            elif piece is None and board.en_passant_target == capture_pos:
+                adjacent_piece = grid[row][capture_pos[1]]
+                if (adjacent_piece is not None and isinstance(adjacent_piece, Pawn) and
+                        adjacent_piece.color_code != color_code):
+                    moves.append(capture_pos)
+
+        return moves
+
+    def get_symbol(self):
+        return 'wb'[self.color_code]
+
+
+class Rook(Piece):
+    __slots__ = ()
+    symbol = 'R'
+
+    def valid_moves(self, board):
+        row, col = self.position
+        return self._slide(board, ROOK_RAYS[row][col])
+
+    def get_symbol(self):
+        return 'wb'[self.color_code]
+
+
+class Knight(Piece):
+    __slots__ = ()
+    symbol = 'N'
+
+    def valid_moves(self, board):
+        row, col = self.position
+        return self._step(board, KNIGHT_TARGETS[row][col])
+
+    def get_symbol(self):
+        return 'wb'[self.color_code]
+
+
+class Bishop(Piece):
+    __slots__ = ()
+    symbol = 'B'
+
+    def valid_moves(self, board):
+        row, col = self.position
+        return self._slide(board, BISHOP_RAYS[row][col])
+
+    def get_symbol(self):
+        return 'wb'[self.color_code]
+
+
+class Queen(Piece):
+    __slots__ = ()
+    symbol = 'Q'
+
+    def valid_moves(self, board):
+        row, col = self.position
+        return self._slide(board, QUEEN_RAYS[row][col])
+
+    def get_symbol(self):
+        return 'wb'[self.color_code]
+
+
+class King(Piece):
+    __slots__ = ()
+    symbol = 'K'
+
+    def valid_moves(self, board, check_check=True):
+        row, col = self.position
+        moves = self._step(board, KING_TARGETS[row][col])
+
+        if check_check and not self.has_moved and not board.is_in_check(self.color):
+            if (board.get_piece((row, 5)) is None and
+                    board.get_piece((row, 6)) is None and
+                    isinstance(board.get_piece((row, 7)), Rook) and
+                    not board.get_piece((row, 7)).has_moved):
+                if (not board.is_square_under_attack((row, 5), self.color) and
+                        not board.is_square_under_attack((row, 6), self.color)):
+                    moves.append((row, 6))
+
+            if (board.get_piece((row, 1)) is None and
+                    board.get_piece((row, 2)) is None and
+                    board.get_piece((row, 3)) is None and
+                    isinstance(board.get_piece((row, 0)), Rook) and
+                    not board.get_piece((row, 0)).has_moved):
+                if (not board.is_square_under_attack((row, 2), self.color) and
+                        not board.is_square_under_attack((row, 3), self.color)):
+                    moves.append((row, 2))
+
+        return moves
+
+    def get_symbol(self):
+        return 'wb'[self.color_code]
+
+
+class PieceFactory(ABC):
+    @abstractmethod
+    def create_piece(self, color, position):
+        pass
+
+
+class PawnFactory(PieceFactory):
+    def create_piece(self, color, position):
+        return Pawn(color, position)
+
+
+class RookFactory(PieceFactory):
+    def create_piece(self, color, position):
+        return Rook(color, position)
+
+
+class KnightFactory(PieceFactory):
+    def create_piece(self, color, position):
+        return Knight(color, position)
+
+
+class BishopFactory(PieceFactory):
+    def create_piece(self, color, position):
+        return Bishop(color, position)
+
+
+class QueenFactory(PieceFactory):
+    def create_piece(self, color, position):
+        return Queen(color, position)
+
+
+class KingFactory(PieceFactory):
+    def create_piece(self, color, position):
+        return King(color, position)
+
+
+_PACKED_CODES = {Pawn: 1, Knight: 2, Bishop: 3, Rook: 4, Queen: 5, King: 6}
+
+
+def expand_promotions(board, moves):
+    """Return ``moves`` with each promotion expanded into the four piece choices."""
+    expanded = []
+    grid = board.grid
+    for start, end in moves:
+        if end[0] in (0, 7) and isinstance(grid[start[0]][start[1]], Pawn):
+            expanded.extend((start, end, piece_type) for piece_type in PROMOTION_LETTERS)
+        else:
+            expanded.append((start, end))
+    return expanded
+
+
+class UndoRecord:
+    """Everything unmake_move needs to restore the position before a move."""
+
+    def __init__(self, board, piece, start, end):
+        self.piece = piece
+        self.start = start
+        self.end = end
+        self.had_moved = piece.has_moved
+        self.captured = None
+        self.captured_pos = None
+        self.rook = None
+        self.rook_start = None
+        self.rook_end = None
+        self.promoted = None
+        self.en_passant_target = board.en_passant_target
+        self.halfmove_clock = board.halfmove_clock
+        self.fullmove_number = board.fullmove_number
+        self.current_turn = board.current_turn
+        self.zobrist_key = board.zobrist_key
+        self.eval_mg = board.eval_mg
+        self.eval_eg = board.eval_eg
+        self.phase = board.phase
+        self.check = board.check
+        self.checkmate = board.checkmate
+        self.stalemate = board.stalemate
+        self.draw_reason = board.draw_reason
+        self.game_over = board.game_over
+        self.winner = board.winner
+
+
+class Board:
+    def __init__(self, fen=None, packed=None):
+        self.grid = [[None for _ in range(8)] for _ in range(8)]
+        self.current_turn = 'white'
+        self.game_over = False
+        self.winner = None
+        self.selected_piece = None
+        self.valid_moves = []
+        self.en_passant_target = None
+        self.check = False
+        self.checkmate = False
+        self.stalemate = False
+        self.draw_reason = None
+        self.promoting_pawn = None
+        self.halfmove_clock = 0
+        self.fullmove_number = 1
+        self.piece_factories = {
+            'pawn': PawnFactory(),
+            'rook': RookFactory(),
+            'knight': KnightFactory(),
+            'bishop': BishopFactory(),
+            'queen': QueenFactory(),
+            'king': KingFactory()
+        }
+        self._attack_maps = {}
+        self._legal_moves = {}
+        self.move_stack = []
+        if packed is not None:
+            self._load_packed(packed)
+        elif fen is not None:
+            self._load_fen(fen)
+        else:
+            self._setup_board()
+        self.refresh_piece_tracking()
+        # Zobrist key -> times the position has occurred, for repetition draws.
+        self.position_counts = {self.zobrist_key: 1}
+        if fen is not None or packed is not None:
+            self._update_game_status()
+            self.clear_caches()
+
+    def _setup_board(self):
+        for col in range(8):
+            self.grid[6][col] = self.piece_factories['pawn'].create_piece('white', (6, col))
+            self.grid[1][col] = self.piece_factories['pawn'].create_piece('black', (1, col))
+
+            self.grid[0][0] = self.piece_factories['rook'].create_piece('black', (0, 0))
+            self.grid[0][7] = self.piece_factories['rook'].create_piece('black', (0, 7))
+            self.grid[7][0] = self.piece_factories['rook'].create_piece('white', (7, 0))
+            self.grid[7][7] = self.piece_factories['rook'].create_piece('white', (7, 7))
+
+            self.grid[0][1] = Knight('black', (0, 1))
+            self.grid[0][6] = Knight('black', (0, 6))
+            self.grid[7][1] = Knight('white', (7, 1))
+            self.grid[7][6] = Knight('white', (7, 6))
+
+            self.grid[0][2] = Bishop('black', (0, 2))
+            self.grid[0][5] = Bishop('black', (0, 5))
+            self.grid[7][2] = Bishop('white', (7, 2))
+            self.grid[7][5] = Bishop('white', (7, 5))
+
+            self.grid[0][3] = Queen('black', (0, 3))
+            self.grid[7][3] = Queen('white', (7, 3))
+
+            self.grid[0][4] = King('black', (0, 4))
+            self.grid[7][4] = King('white', (7, 4))
+
+    @classmethod
+    def from_fen(cls, fen):
+        """Create a board from a FEN string.
+
+        Castling rights become ``has_moved`` on the kings and rooks.
+        """
+        return cls(fen)
+
+    def _load_fen(self, fen):
+        fields = fen.split()
+        if len(fields) == 4:
+            fields += ['0', '1']
+        if len(fields) != 6:
+            raise ValueError(f"FEN needs 4 or 6 fields: {fen!r}")
+        placement, turn, castling, en_passant, halfmove, fullmove = fields
+
+        ranks = placement.split('/')
+        if len(ranks) != 8:
+            raise ValueError(f"FEN placement needs 8 ranks: {placement!r}")
+        for row, rank in enumerate(ranks):
+            col = 0
+            for char in rank:
+                if char.isdigit():
+                    col += int(char)
+                    continue
+                if char.lower() not in FEN_PIECES or col > 7:
+                    raise ValueError(f"Bad FEN rank {rank!r}")
+                self._place(FEN_PIECES[char.lower()], 'white' if char.isupper() else 'black', row, col)
+                col += 1
+            if col != 8:
+                raise ValueError(f"Bad FEN rank {rank!r}")
+
+        if turn not in ('w', 'b'):
+            raise ValueError(f"Bad side to move {turn!r}")
+        self.current_turn = 'white' if turn == 'w' else 'black'
+
+        for flag in castling.replace('-', ''):
+            if flag not in CASTLING_FLAGS:
+                raise ValueError(f"Bad castling field {castling!r}")
+            self._grant_castling(flag)
+
+        if en_passant != '-':
+            # Only the side to move can take en passant, behind a pawn that just moved.
+            expected_row = 2 if self.current_turn == 'white' else 5
+            if parse_square(en_passant)[0] != expected_row:
+                raise ValueError(f"Bad en passant square {en_passant!r} for {self.current_turn} to move")
+            self.en_passant_target = parse_square(en_passant)
+
+        if not (halfmove.isdigit() and fullmove.isdigit()):
+            raise ValueError(f"FEN move counters must be non-negative integers: {fen!r}")
+        self.halfmove_clock = int(halfmove)
+        self.fullmove_number = int(fullmove)
+
+    def _place(self, piece_type, color, row, col):
+        # Kings and rooks count as moved until a castling right says otherwise.
+        piece = self.piece_factories[piece_type].create_piece(color, (row, col))
+        if isinstance(piece, (King, Rook)):
+            piece.has_moved = True
+        elif isinstance(piece, Pawn):
+            piece.has_moved = row != (6 if color == 'white' else 1)
+        self.grid[row][col] = piece
+
+    def _grant_castling(self, flag):
+        row, rook_col = CASTLING_FLAGS[flag]
+        color = 'white' if flag.isupper() else 'black'
+        king, rook = self.grid[row][4], self.grid[row][rook_col]
+        if (isinstance(king, King) and king.color == color and
+                isinstance(rook, Rook) and rook.color == color):
+            king.has_moved = False
+            rook.has_moved = False
+
+    @classmethod
+    def from_packed(cls, data):
+        """Create a board from the bytes returned by ``pack``."""
+        return cls(packed=data)
+
+    def pack(self):
+        """Return the position as PACKED_SIZE bytes.
+
+        Far smaller than a Board, so large numbers of positions can be held
+        in memory and turned back into boards with ``from_packed`` on demand.
+        """
+        data = bytearray(PACKED_SIZE)
+        for row in range(8):
+            for col in range(8):
+                piece = self.grid[row][col]
+                if piece is not None:
+                    data[row * 8 + col] = _PACKED_CODES[type(piece)] | piece.color_code << 3
+        data[64] = COLOR_CODES[self.current_turn]
+        rights = self.castling_rights()
+        data[65] = sum(1 << i for i, flag in enumerate(CASTLING_FLAGS) if flag in rights)
+        data[66] = self.en_passant_target[1] + 1 if self.en_passant_target is not None else 0
+        data[67] = min(self.halfmove_clock, 255)
+        data[68:70] = min(self.fullmove_number, 0xFFFF).to_bytes(2, 'big')
+        return bytes(data)
+
+    def _load_packed(self, data):
+        if len(data) != PACKED_SIZE:
+            raise ValueError(f"Packed position must be {PACKED_SIZE} bytes, got {len(data)}")
+        for index in range(64):
+            code = data[index]
+            if code:
+                piece_type = code & 7
+                if not 0 < piece_type < len(PACKED_TYPES) or code >> 4:
+                    raise ValueError(f"Bad packed piece code {code}")
+                self._place(PACKED_TYPES[piece_type], COLOR_NAMES[code >> 3], index // 8, index % 8)
+        if data[64] > 1:
+            raise ValueError(f"Bad packed side to move {data[64]}")
+        self.current_turn = COLOR_NAMES[data[64]]
+        for i, flag in enumerate(CASTLING_FLAGS):
+            if data[65] >> i & 1:
+                self._grant_castling(flag)
+        if data[66]:
+            self.en_passant_target = (2 if self.current_turn == 'white' else 5, data[66] - 1)
+        self.halfmove_clock = data[67]
+        self.fullmove_number = int.from_bytes(data[68:70], 'big')
+
+    def castling_rights(self):
+        rights = ''
+        for flag, (row, rook_col) in CASTLING_FLAGS.items():
+            color = 'white' if flag.isupper() else 'black'
+            king, rook = self.grid[row][4], self.grid[row][rook_col]
+            if (isinstance(king, King) and king.color == color and not king.has_moved and
+                    isinstance(rook, Rook) and rook.color == color and not rook.has_moved):
+                rights += flag
+        return rights or '-'
+
+    def to_fen(self):
+        ranks = []
+        for row in range(8):
+            rank = ''
+            empty = 0
+            for col in range(8):
+                piece = self.grid[row][col]
+                if piece is None:
+                    empty += 1
+                    continue
+                if empty:
+                    rank += str(empty)
+                    empty = 0
+                letter = piece.symbol.lower()
+                rank += letter.upper() if piece.color == 'white' else letter
+            if empty:
+                rank += str(empty)
+            ranks.append(rank)
+        en_passant = square_name(self.en_passant_target) if self.en_passant_target else '-'
+        return ' '.join(['/'.join(ranks), self.current_turn[0], self.castling_rights(),
+                         en_passant, str(self.halfmove_clock), str(self.fullmove_number)])
+
+    def get_piece(self, position):
+        row, col = position
+        if 0 <= row < 8 and 0 <= col < 8:
+            return self.grid[row][col]
+        return None
+
+    def refresh_piece_tracking(self):
+        """Rebuild king squares, piece lists, hash and evaluation terms from ``grid``.
+
+        Board methods keep these up to date incrementally; call this after
+        writing pieces into ``grid`` directly.
+        """
+        self.king_positions = {'white': None, 'black': None}
+        self.piece_lists = {'white': {}, 'black': {}}
+        self.clear_caches()
+        for row in range(8):
+            for col in range(8):
+                piece = self.grid[row][col]
+                if piece is not None:
+                    self.piece_lists[piece.color][piece] = None
+                    if isinstance(piece, King):
+                        self.king_positions[piece.color] = (row, col)
+        self.zobrist_key = self.compute_zobrist()
+        self.eval_mg, self.eval_eg, self.phase = material_terms(self.grid)
+
+    def compute_zobrist(self):
+        """Hash the position from scratch; ``zobrist_key`` is kept equal to this."""
+        key = 0
+        for row in range(8):
+            for col in range(8):
+                piece = self.grid[row][col]
+                if piece is not None:
+                    key ^= ZOBRIST_PIECES[piece.color, piece.symbol][row * 8 + col]
+        if self.current_turn == 'black':
+            key ^= ZOBRIST_BLACK_TO_MOVE
+        for flag in self.castling_rights().strip('-'):
+            key ^= ZOBRIST_CASTLING[flag]
+        return key ^ self._en_passant_hash(COLOR_CODES[self.current_turn])
+
+    def _en_passant_hash(self, code):
+        """Hash of the en passant file, or 0 unless a pawn of ``code`` can take there.
+
+        Otherwise positions that repeat after a double push would hash apart.
+        """
+        target = self.en_passant_target
+        if target is None:
+            return 0
+        for r, c in PAWN_CAPTURES[1 - code][target[0]][target[1]]:
+            piece = self.grid[r][c]
+            if isinstance(piece, Pawn) and piece.color_code == code:
+                return ZOBRIST_EN_PASSANT[target[1]]
+        return 0
+
+    def _piece_on(self, piece, position):
+        # Keep the hash and the material/piece-square terms in step with the grid.
+        sq = position[0] * 8 + position[1]
+        key = (piece.color_code, piece.symbol)
+        self.zobrist_key ^= ZOBRIST_PIECES[piece.color, piece.symbol][sq]
+        self.eval_mg += SQUARE_SCORES_MG[key][sq]
+        self.eval_eg += SQUARE_SCORES_EG[key][sq]
+        self.phase += PHASE_WEIGHTS[piece.symbol]
+
+    def _piece_off(self, piece, position):
+        sq = position[0] * 8 + position[1]
+        key = (piece.color_code, piece.symbol)
+        self.zobrist_key ^= ZOBRIST_PIECES[piece.color, piece.symbol][sq]
+        self.eval_mg -= SQUARE_SCORES_MG[key][sq]
+        self.eval_eg -= SQUARE_SCORES_EG[key][sq]
+        self.phase -= PHASE_WEIGHTS[piece.symbol]
+
+    def king_position(self, color):
+        pos = self.king_positions[color]
+        if pos is not None:
+            piece = self.grid[pos[0]][pos[1]]
+            if isinstance(piece, King) and piece.color == color:
+                return pos
+        # The grid was edited directly; resynchronise the tracked pieces.
+        self.refresh_piece_tracking()
+        return self.king_positions[color]
+
+    def get_pieces(self, color):
+        pieces = []
+        for piece in self.piece_lists[color]:
+            row, col = piece.position
+            if self.grid[row][col] is piece:
+                pieces.append(piece)
+        return pieces
+
+    def _track_capture(self, piece):
+        if piece is not None:
+            self.piece_lists[piece.color].pop(piece, None)
+
+    def clear_caches(self):
+        """Forget the cached legal moves and attack maps."""
+        self._attack_maps.clear()
+        self._legal_moves.clear()
+
+    def _iter_attackers(self, position, color):
+        """Yield squares of opponent pieces attacking ``position``.
+
+        Looks outward from the square instead of generating opponent moves.
+        """
+        row, col = position
+        grid = self.grid
+        opponent = 1 - COLOR_CODES[color]
+
+        # An opponent pawn attacks this square from where our own pawn would capture.
+        for r, c in PAWN_CAPTURES[1 - opponent][row][col]:
+            piece = grid[r][c]
+            if isinstance(piece, Pawn) and piece.color_code == opponent:
+                yield (r, c)
+
+        for r, c in KNIGHT_TARGETS[row][col]:
+            piece = grid[r][c]
+            if isinstance(piece, Knight) and piece.color_code == opponent:
+                yield (r, c)
+
+        for r, c in KING_TARGETS[row][col]:
+            piece = grid[r][c]
+            if isinstance(piece, King) and piece.color_code == opponent:
+                yield (r, c)
+
+        for rays, slider in ((ROOK_RAYS, Rook), (BISHOP_RAYS, Bishop)):
+            for ray in rays[row][col]:
+                for r, c in ray:
+                    piece = grid[r][c]
+                    if piece is not None:
+                        if piece.color_code == opponent and isinstance(piece, (slider, Queen)):
+                            yield (r, c)
+                        break
+
+    def is_square_under_attack(self, position, color):
+        """Return True if a piece of the opponent of ``color`` attacks ``position``."""
+        for _ in self._iter_attackers(position, color):
+            return True
+        return False
+
+    def attackers(self, position, color):
+        return list(self._iter_attackers(position, color))
+
+    def attacked_squares(self, piece):
+        """Squares ``piece`` attacks, including squares held by its own side."""
+        row, col = piece.position
+        grid = self.grid
+        if isinstance(piece, Pawn):
+            return list(PAWN_CAPTURES[piece.color_code][row][col])
+        if isinstance(piece, Knight):
+            return list(KNIGHT_TARGETS[row][col])
+        if isinstance(piece, King):
+            return list(KING_TARGETS[row][col])
+        if isinstance(piece, Rook):
+            rays = ROOK_RAYS[row][col]
+        elif isinstance(piece, Bishop):
+            rays = BISHOP_RAYS[row][col]
+        else:
+            rays = QUEEN_RAYS[row][col]
+        squares = []
+        for ray in rays:
+            for r, c in ray:
+                squares.append((r, c))
+                if grid[r][c] is not None:
+                    break
+        return squares
+
+    def attack_map(self, color):
+        """Return the set of squares attacked by ``color``'s pieces.
+
+        The map is cached until the next move_piece or promote_pawn.
+        """
+        squares = self._attack_maps.get(color)
+        if squares is None:
+            squares = set()
+            for piece in self.get_pieces(color):
+                squares.update(self.attacked_squares(piece))
+            self._attack_maps[color] = squares
+        return squares
+
+    def is_in_check(self, color):
+        king_pos = self.king_position(color)
+        if not king_pos:
+            return False
+        return self.is_square_under_attack(king_pos, color)
+
+    def _pins(self, king_pos, color):
+        """Map each pinned piece's square to the squares it may still move to."""
+        pins = {}
+        row, col = king_pos
+        grid = self.grid
+        code = COLOR_CODES[color]
+        for rays, slider in ((ROOK_RAYS, Rook), (BISHOP_RAYS, Bishop)):
+            for ray in rays[row][col]:
+                pinned = None
+                for i, (r, c) in enumerate(ray):
+                    piece = grid[r][c]
+                    if piece is not None:
+                        if piece.color_code == code:
+                            if pinned is not None:
+                                break
+                            pinned = (r, c)
+                        else:
+                            if pinned is not None and isinstance(piece, (slider, Queen)):
+                                pins[pinned] = set(ray[:i + 1])
+                            break
+        return pins
+
+    def _check_block_squares(self, king_pos, checker_pos):
+        """Squares that resolve a single check: the checker and, for sliders, the line to it."""
+        squares = {checker_pos}
+        checker = self.get_piece(checker_pos)
+        if isinstance(checker, (Rook, Bishop, Queen)):
+            dr = (checker_pos[0] > king_pos[0]) - (checker_pos[0] < king_pos[0])
+            dc = (checker_pos[1] > king_pos[1]) - (checker_pos[1] < king_pos[1])
+            r, c = king_pos[0] + dr, king_pos[1] + dc
+            while (r, c) != checker_pos:
+                squares.add((r, c))
+                r, c = r + dr, c + dc
+        return squares
+
+    def _en_passant_is_safe(self, pawn, end, king_pos):
+        # En passant removes two pieces from one rank, which pin detection
+        # cannot see, so try it on the grid instead.
+        start = pawn.position
+        captured = self.grid[start[0]][end[1]]
+        self.grid[start[0]][start[1]] = None
+        self.grid[start[0]][end[1]] = None
+        self.grid[end[0]][end[1]] = pawn
+        safe = not self.is_square_under_attack(king_pos, pawn.color)
+        self.grid[end[0]][end[1]] = None
+        self.grid[start[0]][end[1]] = captured
+        self.grid[start[0]][start[1]] = pawn
+        return safe
+
+    def _generate_legal_moves(self, color):
+        king_pos = self.king_position(color)
+        pieces = self.get_pieces(color)
+        if king_pos is None:
+            return [(piece.position, end) for piece in pieces for end in piece.valid_moves(self)]
+
+        checkers = self.attackers(king_pos, color)
+        pins = self._pins(king_pos, color)
+        block = self._check_block_squares(king_pos, checkers[0]) if len(checkers) == 1 else None
+        moves = []
+        for piece in pieces:
+            start = piece.position
+            if isinstance(piece, King):
+                targets = piece.valid_moves(self)
+                # Lift the king so sliding attacks see through its old square.
+                self.grid[start[0]][start[1]] = None
+                for end in targets:
+                    if not self.is_square_under_attack(end, color):
+                        moves.append((start, end))
+                self.grid[start[0]][start[1]] = piece
+                continue
+            if len(checkers) > 1:
+                continue
+            allowed = pins.get(start)
+            for end in piece.valid_moves(self):
+                if isinstance(piece, Pawn) and end == self.en_passant_target and end[1] != start[1]:
+                    if self._en_passant_is_safe(piece, end, king_pos):
+                        moves.append((start, end))
+                    continue
+                if allowed is not None and end not in allowed:
+                    continue
+                if block is not None and end not in block:
+                    continue
+                moves.append((start, end))
+        return moves
+
+    def legal_moves(self, color=None):
+        """Return every legal move for ``color`` as ``(start, end)`` pairs.
+
+        The list is cached until the next move_piece or promote_pawn, so
+        selection and game-end detection share one computation.
+        """
+        color = color or self.current_turn
+        moves = self._legal_moves.get(color)
+        if moves is None:
+            moves = self._legal_moves[color] = self._generate_legal_moves(color)
+        return moves
+
+    def is_checkmate(self, color):
+        return self.is_in_check(color) and not self.legal_moves(color)
+
+    def is_stalemate(self, color):
+        return not self.is_in_check(color) and not self.legal_moves(color)
+
+    def _switch_turn(self):
+        if self.current_turn == 'black':
+            self.fullmove_number += 1
+        self.current_turn = 'black' if self.current_turn == 'white' else 'white'
+        self.zobrist_key ^= ZOBRIST_BLACK_TO_MOVE
+        counts = self.position_counts
+        counts[self.zobrist_key] = counts.get(self.zobrist_key, 0) + 1
+
+    def repetition_count(self):
+        """How many times the current position has occurred, including now."""
+        return self.position_counts.get(self.zobrist_key, 0)
+
+    def is_threefold_repetition(self):
+        return self.repetition_count() >= 3
+
+    def is_fifty_move_rule(self):
+        return self.halfmove_clock >= 100
+
+    def _update_game_status(self):
+        """Work out check, checkmate, stalemate and draws once, after a move.
+
+        The results are stored on the board so that drawing code only reads
+        attributes and never runs the rules.
+        """
+        self.check = self.is_in_check(self.current_turn)
+        no_moves = not self.legal_moves(self.current_turn)
+        self.checkmate = self.check and no_moves
+        self.stalemate = not self.check and no_moves
+        if self.game_over:
+            return
+        if no_moves:
+            self.game_over = True
+            if self.check:
+                self.winner = 'white' if self.current_turn == 'black' else 'black'
+            else:
+                self.winner = None
+                self.draw_reason = 'stalemate'
+        elif self.is_fifty_move_rule() or self.is_threefold_repetition():
+            self.game_over = True
+            self.winner = None
+            self.draw_reason = ('fifty-move rule' if self.is_fifty_move_rule()
+                                else 'threefold repetition')
+
+    def select_piece(self, position):
+        piece = self.get_piece(position)
+        if piece is not None and piece.color == self.current_turn:
+            self.selected_piece = piece
+            self.valid_moves = [end for start, end in self.legal_moves(self.current_turn)
+                                if start == position]
+            return True
+        return False
+
+    def _make(self, start, end):
+        """Move the piece on ``start`` to ``end`` and return its UndoRecord.
+
+        Handles captures, en passant and the castling rook; promotion and the
+        change of turn are left to the caller.
+        """
+        piece = self.grid[start[0]][start[1]]
+        record = UndoRecord(self, piece, start, end)
+        rights_before = self.castling_rights()
+        grid = self.grid
+        # Taken out before the grid changes, while it still matches the hash.
+        self.zobrist_key ^= self._en_passant_hash(piece.color_code)
+
+        captured_pos = end
+        if isinstance(piece, Pawn) and end == self.en_passant_target and end[1] != start[1]:
+            captured_pos = (start[0], end[1])
+        captured = grid[captured_pos[0]][captured_pos[1]]
+        if captured is not None:
+            record.captured = captured
+            record.captured_pos = captured_pos
+            self._track_capture(captured)
+            self._piece_off(captured, captured_pos)
+            grid[captured_pos[0]][captured_pos[1]] = None
+            if isinstance(captured, King):
+                self.game_over = True
+                self.winner = piece.color
+                self.king_positions[captured.color] = None
+
+        if isinstance(piece, Pawn) or captured is not None:
+            self.halfmove_clock = 0
+        else:
+            self.halfmove_clock += 1
+
+        if isinstance(piece, King) and abs(start[1] - end[1]) == 2:
+            rook_col, rook_to = (7, 5) if end[1] > start[1] else (0, 3)
+            rook = grid[start[0]][rook_col]
+            record.rook = rook
+            record.rook_start = (start[0], rook_col)
+            record.rook_end = (start[0], rook_to)
+            grid[start[0]][rook_to] = rook
+            grid[start[0]][rook_col] = None
+            rook.position = record.rook_end
+            rook.has_moved = True
+            self._piece_off(rook, record.rook_start)
+            self._piece_on(rook, record.rook_end)
+
+        grid[start[0]][start[1]] = None
+        grid[end[0]][end[1]] = piece
+        piece.position = end
+        piece.has_moved = True
+        if isinstance(piece, King):
+            self.king_positions[piece.color] = end
+        self._piece_off(piece, start)
+        self._piece_on(piece, end)
+
+        for flag in set(rights_before.strip('-')) ^ set(self.castling_rights().strip('-')):
+            self.zobrist_key ^= ZOBRIST_CASTLING[flag]
+        if isinstance(piece, Pawn) and abs(start[0] - end[0]) == 2:
+            self.en_passant_target = ((start[0] + end[0]) // 2, start[1])
+            self.zobrist_key ^= self._en_passant_hash(1 - piece.color_code)
+        else:
+            self.en_passant_target = None
+
+        self.clear_caches()
+        self.move_stack.append(record)
+        return record
+
+    def _promote(self, record, piece_type):
+        pawn = record.piece
+        pos = record.end
+        new_piece = self.piece_factories[piece_type].create_piece(pawn.color, pos)
+        new_piece.has_moved = True
+        record.promoted = new_piece
+        self._track_capture(pawn)
+        self.piece_lists[pawn.color][new_piece] = None
+        self._piece_off(pawn, pos)
+        self._piece_on(new_piece, pos)
+        self.grid[pos[0]][pos[1]] = new_piece
+        self.clear_caches()
+        return new_piece
+
+    def make_move(self, move):
+        """Play ``(start, end[, promotion])`` without legality checks.
+
+        Returns the UndoRecord to pass to unmake_move. Pawns reaching the last
+        rank promote to ``promotion`` (a factory name, default ``'queen'``).
+        Unlike move_piece this does not look for checkmate or stalemate.
+        """
+        start, end = move[0], move[1]
+        record = self._make(start, end)
+        if isinstance(record.piece, Pawn) and end[0] in (0, 7):
+            piece_type = move[2] if len(move) > 2 and move[2] else 'queen'
+            if piece_type not in PROMOTION_LETTERS:
+                self.unmake_move(record)
+                raise ValueError(f"Cannot promote to {piece_type!r}")
+            self._promote(record, piece_type)
+        self._switch_turn()
+        return record
+
+    def unmake_move(self, record=None):
+        """Take back the last move made with make_move or move_piece."""
+        if record is None:
+            record = self.move_stack[-1]
+        elif record is not self.move_stack[-1]:
+            raise ValueError("Moves must be unmade in reverse order")
+        self.move_stack.pop()
+        if self.current_turn != record.current_turn:
+            # The move was completed, so its position was counted.
+            count = self.position_counts.get(self.zobrist_key, 0) - 1
+            if count > 0:
+                self.position_counts[self.zobrist_key] = count
+            else:
+                self.position_counts.pop(self.zobrist_key, None)
+        grid = self.grid
+        piece = record.piece
+        start, end = record.start, record.end
+
+        if record.promoted is not None:
+            self._track_capture(record.promoted)
+            self.piece_lists[piece.color][piece] = None
+
+        grid[end[0]][end[1]] = None
+        grid[start[0]][start[1]] = piece
+        piece.position = start
+        piece.has_moved = record.had_moved
+        if isinstance(piece, King):
+            self.king_positions[piece.color] = start
+
+        if record.rook is not None:
+            rook = record.rook
+            grid[record.rook_end[0]][record.rook_end[1]] = None
+            grid[record.rook_start[0]][record.rook_start[1]] = rook
+            rook.position = record.rook_start
+            rook.has_moved = False
+
+        captured = record.captured
+        if captured is not None:
+            grid[record.captured_pos[0]][record.captured_pos[1]] = captured
+            self.piece_lists[captured.color][captured] = None
+            if isinstance(captured, King):
+                self.king_positions[captured.color] = record.captured_pos
+
+        self.en_passant_target = record.en_passant_target
+        self.halfmove_clock = record.halfmove_clock
+        self.fullmove_number = record.fullmove_number
+        self.current_turn = record.current_turn
+        self.zobrist_key = record.zobrist_key
+        self.eval_mg = record.eval_mg
+        self.eval_eg = record.eval_eg
+        self.phase = record.phase
+        self.check = record.check
+        self.checkmate = record.checkmate
+        self.stalemate = record.stalemate
+        self.draw_reason = record.draw_reason
+        self.game_over = record.game_over
+        self.winner = record.winner
+        self.promoting_pawn = None
+        self.clear_caches()
+
+    def move_piece(self, end_pos):
+        if self.selected_piece is None:
+            return False
+
+        if end_pos in self.valid_moves:
+            self._make(self.selected_piece.position, end_pos)
+
+            if isinstance(self.selected_piece, Pawn) and (end_pos[0] == 0 or end_pos[0] == 7):
+                self.promoting_pawn = self.selected_piece
+                self.selected_piece = None
+                self.valid_moves = []
+                return True
+
+            self._switch_turn()
+            self.selected_piece = None
+            self.valid_moves = []
+
+            self._update_game_status()
+            return True
+        return False
+
+    def promote_pawn(self, piece_type):
+        if not self.promoting_pawn or piece_type not in PROMOTION_LETTERS:
+            return False
+
+        self._promote(self.move_stack[-1], piece_type)
+        self.promoting_pawn = None
+        self._switch_turn()
+
+        self._update_game_status()
+        return True
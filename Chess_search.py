@@ -0,0 +1,296 @@
+"""Alpha-beta search on top of ``Chess_rules.Board``.
+
+Negamax with iterative deepening, a transposition table, quiescence search
+and move ordering (principal variation or hash move, MVV-LVA captures,
+killer moves, history heuristic). The board is searched in place with
+make_move/unmake_move.
+
+Run ``python Chess_search.py --help`` for the command line interface.
+"""
+import argparse
+import sys
+import time
+
+from Chess_evaluation import evaluate as evaluate_position
+from Chess_rules import Board, Pawn, expand_promotions, move_to_uci
+from Chess_transposition import (BOUND_EXACT, BOUND_LOWER, BOUND_UPPER, DEFAULT_SIZE_MB,
+                                 TranspositionTable)
+
+PIECE_VALUES = {'p': 100, 'N': 320, 'B': 330, 'R': 500, 'Q': 900, 'K': 0}
+PROMOTION_VALUES = {'queen': 900, 'rook': 500, 'bishop': 330, 'knight': 320}
+MATE_SCORE = 100000
+INFINITY = 10 ** 9
+MAX_PLY = 128
+
+# Move ordering bands; captures are ordered inside theirs by MVV-LVA.
+PV_BONUS = 10 ** 8
+CAPTURE_BONUS = 10 ** 7
+KILLER_BONUS = 10 ** 6
+
+
+class SearchAborted(Exception):
+    pass
+
+
+class SearchResult:
+    def __init__(self, best_move, score, depth, nodes, pv, elapsed):
+        self.best_move = best_move
+        self.score = score
+        self.depth = depth
+        self.nodes = nodes
+        self.pv = pv
+        self.elapsed = elapsed
+
+    def __repr__(self):
+        pv = ' '.join(move_to_uci(move) for move in self.pv)
+        return (f"SearchResult(depth={self.depth}, score={self.score}, nodes={self.nodes}, "
+                f"pv='{pv}')")
+
+
+def evaluate(board):
+    """Material and piece-square score from the side to move's point of view.
+
+    Read from the terms Board keeps up to date as moves are made, so a leaf
+    costs no scan of the grid.
+    """
+    return evaluate_position(board, full=False)
+
+
+def _score_to_tt(score, ply):
+    # Mate scores are stored relative to the node, not the root.
+    if score >= MATE_SCORE - MAX_PLY:
+        return score + ply
+    if score <= -MATE_SCORE + MAX_PLY:
+        return score - ply
+    return score
+
+
+def _score_from_tt(score, ply):
+    if score >= MATE_SCORE - MAX_PLY:
+        return score - ply
+    if score <= -MATE_SCORE + MAX_PLY:
+        return score + ply
+    return score
+
+
+class Searcher:
+    def __init__(self, board, max_depth=64, time_limit=None, node_limit=None, tt=None):
+        self.board = board
+        self.tt = tt if tt is not None else TranspositionTable(DEFAULT_SIZE_MB)
+        self.max_depth = max_depth
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.nodes = 0
+        self.deadline = None
+        self.killers = [[None, None] for _ in range(MAX_PLY)]
+        self.history = {}
+        self.pv_table = [[] for _ in range(MAX_PLY + 1)]
+
+    def _captured_value(self, move):
+        board = self.board
+        start, end = move[0], move[1]
+        target = board.grid[end[0]][end[1]]
+        if target is not None:
+            return PIECE_VALUES[target.symbol]
+        piece = board.grid[start[0]][start[1]]
+        if isinstance(piece, Pawn) and end == board.en_passant_target and end[1] != start[1]:
+            return PIECE_VALUES['p']
+        return 0
+
+    def _order(self, moves, ply, pv_move=None):
+        board = self.board
+        killers = self.killers[ply]
+        history = self.history
+        scored = []
+        for move in moves:
+            start = move[0]
+            piece = board.grid[start[0]][start[1]]
+            captured = self._captured_value(move)
+            if move == pv_move:
+                score = PV_BONUS
+            elif captured or len(move) > 2:
+                promotion = PROMOTION_VALUES[move[2]] if len(move) > 2 else 0
+                score = CAPTURE_BONUS + 10 * (captured + promotion) - PIECE_VALUES[piece.symbol] // 10
+            elif move == killers[0] or move == killers[1]:
+                score = KILLER_BONUS
+            else:
+                score = history.get((piece.color, piece.symbol, move[1]), 0)
+            scored.append((score, move))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [move for _, move in scored]
+
+    def _tick(self):
+        self.nodes += 1
+        if self.node_limit is not None and self.nodes >= self.node_limit:
+            raise SearchAborted
+        if self.deadline is not None and self.nodes & 1023 == 0 and time.perf_counter() >= self.deadline:
+            raise SearchAborted
+
+    def _store_killer(self, move, ply):
+        killers = self.killers[ply]
+        if move != killers[0]:
+            killers[1] = killers[0]
+            killers[0] = move
+
+    def _quiescence(self, alpha, beta, ply):
+        self._tick()
+        board = self.board
+        stand_pat = evaluate(board)
+        if stand_pat >= beta or ply >= MAX_PLY:
+            return stand_pat
+        if stand_pat > alpha:
+            alpha = stand_pat
+
+        moves = [move for move in expand_promotions(board, board.legal_moves(board.current_turn))
+                 if len(move) > 2 or self._captured_value(move)]
+        for move in self._order(moves, ply):
+            record = board.make_move(move)
+            try:
+                score = -self._quiescence(-beta, -alpha, ply + 1)
+            finally:
+                board.unmake_move(record)
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+        return alpha
+
+    def _negamax(self, depth, alpha, beta, ply, pv_move=None):
+        self.pv_table[ply] = []
+        board = self.board
+        if depth <= 0:
+            return self._quiescence(alpha, beta, ply)
+        self._tick()
+
+        key = board.zobrist_key
+        # A position seen before on this line or in the game is scored as a draw.
+        if ply > 0 and (board.halfmove_clock >= 100 or board.position_counts.get(key, 0) > 1):
+            return 0
+        entry = self.tt.probe(key)
+        hash_move = None
+        if entry is not None:
+            entry_depth, bound, entry_score, hash_move = entry
+            if ply > 0 and entry_depth >= depth:
+                entry_score = _score_from_tt(entry_score, ply)
+                if (bound == BOUND_EXACT or
+                        (bound == BOUND_LOWER and entry_score >= beta) or
+                        (bound == BOUND_UPPER and entry_score <= alpha)):
+                    return entry_score
+
+        moves = expand_promotions(board, board.legal_moves(board.current_turn))
+        if not moves:
+            return -MATE_SCORE + ply if board.is_in_check(board.current_turn) else 0
+
+        original_alpha = alpha
+        best = -INFINITY
+        best_move = None
+        for move in self._order(moves, ply, pv_move or hash_move):
+            record = board.make_move(move)
+            try:
+                score = -self._negamax(depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                board.unmake_move(record)
+            if score > best:
+                best = score
+                best_move = move
+            if score > alpha:
+                alpha = score
+                self.pv_table[ply] = [move] + self.pv_table[ply + 1]
+            if alpha >= beta:
+                if not self._captured_value(move) and len(move) == 2:
+                    self._store_killer(move, ply)
+                    piece = board.grid[move[0][0]][move[0][1]]
+                    history_key = (piece.color, piece.symbol, move[1])
+                    self.history[history_key] = self.history.get(history_key, 0) + depth * depth
+                break
+
+        if best <= original_alpha:
+            bound = BOUND_UPPER
+        elif best >= beta:
+            bound = BOUND_LOWER
+        else:
+            bound = BOUND_EXACT
+        self.tt.store(key, depth, bound, _score_to_tt(best, ply), best_move)
+        return best
+
+    def search(self):
+        """Iteratively deepen until the depth, time or node budget runs out."""
+        started = time.perf_counter()
+        self.nodes = 0
+        self.deadline = started + self.time_limit if self.time_limit is not None else None
+        self.tt.new_search()
+        result = SearchResult(None, 0, 0, 0, [], 0.0)
+        pv = []
+        for depth in range(1, self.max_depth + 1):
+            try:
+                score = self._negamax(depth, -INFINITY, INFINITY, 0, pv[0] if pv else None)
+            except SearchAborted:
+                # Keep a move from the unfinished iteration only if nothing finished.
+                if result.best_move is None and self.pv_table[0]:
+                    result = SearchResult(self.pv_table[0][0], None, depth, self.nodes,
+                                          list(self.pv_table[0]), time.perf_counter() - started)
+                break
+            pv = list(self.pv_table[0])
+            result = SearchResult(pv[0] if pv else None, score, depth, self.nodes, pv,
+                                  time.perf_counter() - started)
+            if not pv or abs(score) >= MATE_SCORE - MAX_PLY:
+                break
+        result.nodes = self.nodes
+        result.elapsed = time.perf_counter() - started
+        return result
+
+
+def find_best_move(board, max_depth=4, time_limit=None, node_limit=None, tt=None):
+    """Search ``board`` and return a SearchResult; the board is left unchanged.
+
+    Pass a TranspositionTable as ``tt`` to reuse it between searches.
+    """
+    return Searcher(board, max_depth, time_limit, node_limit, tt).search()
+
+
+def play_engine_game(board=None, max_depth=3, time_limit=None, node_limit=None, max_plies=300,
+                     tt_size_mb=DEFAULT_SIZE_MB):
+    """Let the engine play both sides through select_piece/move_piece.
+
+    Returns the list of moves played; ``board`` holds the final position.
+    """
+    board = board if board is not None else Board()
+    tt = TranspositionTable(tt_size_mb)
+    moves = []
+    while not board.game_over and len(moves) < max_plies:
+        result = find_best_move(board, max_depth, time_limit, node_limit, tt)
+        if result.best_move is None:
+            break
+        board.select_piece(result.best_move[0])
+        board.move_piece(result.best_move[1])
+        if board.promoting_pawn:
+            board.promote_pawn(result.best_move[2])
+        moves.append(result.best_move)
+    return moves
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search a position for the best move.")
+    parser.add_argument('--fen', default=None, help="position to search (default: initial position)")
+    parser.add_argument('--depth', type=int, default=None,
+                        help="maximum depth (default: 4 without a time or node budget)")
+    parser.add_argument('--time', type=float, default=None, help="time budget in seconds")
+    parser.add_argument('--nodes', type=int, default=None, help="node budget")
+    parser.add_argument('--hash', type=float, default=DEFAULT_SIZE_MB,
+                        help="transposition table size in MB")
+    args = parser.parse_args(argv)
+
+    board = Board.from_fen(args.fen) if args.fen else Board()
+    depth = args.depth
+    if depth is None:
+        depth = 4 if args.time is None and args.nodes is None else MAX_PLY
+    result = Searcher(board, depth, args.time, args.nodes, TranspositionTable(args.hash)).search()
+    print(f"depth {result.depth} score {result.score} nodes {result.nodes} "
+          f"time {result.elapsed:.2f}s pv {' '.join(move_to_uci(move) for move in result.pv)}")
+    if result.best_move is not None:
+        print(f"bestmove {move_to_uci(result.best_move)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
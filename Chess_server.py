@@ -0,0 +1,239 @@
+"""Asyncio server hosting many concurrent two-player games.
+
+The protocol is one JSON object per line in each direction.
+
+Client requests:
+
+* ``{"cmd": "new"}`` creates a game and seats the client as white;
+* ``{"cmd": "join", "game": <id>}`` takes the free seat of a game;
+* ``{"cmd": "move", "move": "e2e4"}`` plays a UCI move (``"e7e8q"`` promotes);
+* ``{"cmd": "state"}`` asks for the current state;
+* ``{"cmd": "quit"}`` leaves the game and closes the connection.
+
+Server messages have a ``type``: ``joined`` (game id and colour),
+``state`` (FEN, side to move, status flags and the last move), ``left``
+(a player disconnected) or ``error``. Every move is sent to both players
+as a ``state`` message.
+
+Moves are checked and applied in a worker pool, so rules work never blocks
+the event loop.
+
+Run ``python Chess_server.py --help`` for the command line interface.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from Chess_pgn import play_move
+from Chess_rules import Board, move_to_uci, parse_uci
+
+DEFAULT_PORT = 8765
+COLORS = ('white', 'black')
+
+
+def board_state(board, game_id=None, last_move=None):
+    """The ``state`` message for ``board``; only stored attributes are read."""
+    return {'type': 'state', 'game': game_id, 'fen': board.to_fen(), 'turn': board.current_turn,
+            'check': board.check, 'checkmate': board.checkmate, 'stalemate': board.stalemate,
+            'game_over': board.game_over, 'winner': board.winner,
+            'draw_reason': board.draw_reason, 'last_move': last_move}
+
+
+def apply_move(board, text, game_id=None):
+    """Validate and play a UCI move; runs in the worker pool.
+
+    Returns the new state message, or raises ValueError for a bad move.
+    """
+    move = parse_uci(text)
+    if (move[0], move[1]) not in board.legal_moves(board.current_turn):
+        raise ValueError(f"Illegal move {text}")
+    play_move(board, move)
+    return board_state(board, game_id, move_to_uci(move))
+
+
+class ServerGame:
+    def __init__(self, game_id):
+        self.id = game_id
+        self.board = Board()
+        self.players = {}
+        # Moves of one game are applied one at a time; games run in parallel.
+        self.lock = asyncio.Lock()
+
+    def free_color(self):
+        for color in COLORS:
+            if color not in self.players:
+                return color
+        return None
+
+
+class GameServer:
+    def __init__(self, executor=None, workers=None):
+        self.executor = executor if executor is not None else ThreadPoolExecutor(workers)
+        self.games = {}
+        self._ids = itertools.count(1)
+        self.server = None
+
+    async def start(self, host='127.0.0.1', port=DEFAULT_PORT):
+        self.server = await asyncio.start_server(self.handle_client, host, port)
+        return self.server
+
+    @property
+    def port(self):
+        return self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        self.executor.shutdown(wait=False)
+
+    async def _send(self, writer, message):
+        writer.write(json.dumps(message).encode() + b'\n')
+        await writer.drain()
+
+    async def _broadcast(self, game, message):
+        for writer in list(game.players.values()):
+            try:
+                await self._send(writer, message)
+            except ConnectionError:
+                pass
+
+    async def handle_client(self, reader, writer):
+        game = None
+        color = None
+        try:
+            while True:
+                line = await self._read_line(reader)
+                if line is None:
+                    await self._send(writer, {'type': 'error', 'message': 'Request too long'})
+                    continue
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    command = request['cmd'] if isinstance(request, dict) else None
+                except (ValueError, KeyError):
+                    command = None
+                if not isinstance(command, str):
+                    await self._send(writer, {'type': 'error', 'message': 'Bad request'})
+                    continue
+
+                if command == 'quit':
+                    break
+                if command in ('new', 'join'):
+                    if game is not None:
+                        await self._send(writer, {'type': 'error', 'message': 'Already in a game'})
+                        continue
+                    game, color = self._seat(writer, request.get('game') if command == 'join' else None)
+                    if game is None:
+                        await self._send(writer, {'type': 'error', 'message': 'No free seat in that game'})
+                        continue
+                    await self._send(writer, {'type': 'joined', 'game': game.id, 'color': color})
+                    await self._send_state(game, writer)
+                elif game is None:
+                    await self._send(writer, {'type': 'error', 'message': 'Not in a game'})
+                elif command == 'state':
+                    await self._send_state(game, writer)
+                elif command == 'move':
+                    await self._move(game, color, writer, request.get('move'))
+                else:
+                    await self._send(writer, {'type': 'error', 'message': f"Unknown command {command!r}"})
+        except ConnectionError:
+            pass
+        finally:
+            if game is not None:
+                self._leave(game, color)
+                await self._broadcast(game, {'type': 'left', 'game': game.id, 'color': color})
+            writer.close()
+
+    async def _read_line(self, reader):
+        """Next request line; b'' at end of stream, None for a skipped over-long line."""
+        too_long = False
+        while True:
+            try:
+                line = await reader.readuntil(b'\n')
+            except asyncio.IncompleteReadError as e:
+                return b'' if too_long else e.partial
+            except asyncio.LimitOverrunError as e:
+                too_long = True
+                try:
+                    await reader.readexactly(e.consumed)
+                except asyncio.IncompleteReadError:
+                    return b''
+                continue
+            return None if too_long else line
+
+    async def _send_state(self, game, writer):
+        # The lock keeps a move being applied in the pool from changing the board mid-read.
+        async with game.lock:
+            state = board_state(game.board, game.id)
+        await self._send(writer, state)
+
+    def _seat(self, writer, game_id):
+        if game_id is None:
+            game = ServerGame(next(self._ids))
+            self.games[game.id] = game
+        else:
+            game = self.games.get(game_id) if isinstance(game_id, int) else None
+        color = game.free_color() if game is not None else None
+        if color is None:
+            return None, None
+        game.players[color] = writer
+        return game, color
+
+    def _leave(self, game, color):
+        game.players.pop(color, None)
+        if not game.players:
+            self.games.pop(game.id, None)
+
+    async def _move(self, game, color, writer, text):
+        if not isinstance(text, str):
+            await self._send(writer, {'type': 'error', 'message': 'Move must be a UCI string'})
+            return
+        error = None
+        async with game.lock:
+            board = game.board
+            if board.game_over:
+                error = 'The game is over'
+            elif board.current_turn != color:
+                error = 'Not your turn'
+            else:
+                loop = asyncio.get_running_loop()
+                try:
+                    state = await loop.run_in_executor(self.executor, apply_move, board, text, game.id)
+                except ValueError as e:
+                    error = str(e)
+        if error is not None:
+            await self._send(writer, {'type': 'error', 'message': error})
+        else:
+            await self._broadcast(game, state)
+
+
+async def serve(host, port, workers=None):
+    server = GameServer(workers=workers)
+    await server.start(host, port)
+    print(f"Serving on {host}:{server.port}")
+    try:
+        await server.server.serve_forever()
+    finally:
+        await server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Host chess games over TCP.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, default=None, help="rules worker threads")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
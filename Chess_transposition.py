@@ -0,0 +1,87 @@
+"""Fixed-size transposition table for the search.
+
+Entries live in two flat ``array('Q')`` columns (keys and packed data), so
+memory is fixed when the table is created. Each bucket has two slots: the
+first keeps the deepest result of the current search, the second is
+always overwritten.
+"""
+from array import array
+
+from Chess_rules import decode_move, encode_move
+
+BOUND_EXACT, BOUND_LOWER, BOUND_UPPER = 1, 2, 3
+
+ENTRY_BYTES = 16
+SLOTS_PER_BUCKET = 2
+DEFAULT_SIZE_MB = 16
+
+# Layout of a data word: bound (2 bits), depth (8), move (16), score (32),
+# generation (6). A bound of 0 marks an empty slot.
+_DEPTH_SHIFT = 2
+_MOVE_SHIFT = 10
+_SCORE_SHIFT = 26
+_GENERATION_SHIFT = 58
+_SCORE_OFFSET = 1 << 31
+
+
+class TranspositionTable:
+    def __init__(self, size_mb=DEFAULT_SIZE_MB):
+        entries = max(SLOTS_PER_BUCKET, int(size_mb * 1024 * 1024) // ENTRY_BYTES)
+        buckets = 1
+        while buckets * 2 * SLOTS_PER_BUCKET <= entries:
+            buckets *= 2
+        self.mask = buckets - 1
+        self.keys = array('Q', bytes(8 * buckets * SLOTS_PER_BUCKET))
+        self.data = array('Q', bytes(8 * buckets * SLOTS_PER_BUCKET))
+        self.generation = 0
+        self.hits = 0
+        self.probes = 0
+
+    @property
+    def size_bytes(self):
+        return len(self.keys) * self.keys.itemsize + len(self.data) * self.data.itemsize
+
+    def clear(self):
+        for column in (self.keys, self.data):
+            column[:] = array('Q', bytes(8 * len(column)))
+        self.generation = 0
+
+    def new_search(self):
+        """Age existing entries so the depth-preferred slots can be reused."""
+        self.generation = (self.generation + 1) & 63
+
+    def probe(self, key):
+        """Return ``(depth, bound, score, move)`` stored for ``key`` or None."""
+        self.probes += 1
+        index = (key & self.mask) * SLOTS_PER_BUCKET
+        for slot in (index, index + 1):
+            if self.keys[slot] == key:
+                data = self.data[slot]
+                if data & 3:
+                    self.hits += 1
+                    code = data >> _MOVE_SHIFT & 0xFFFF
+                    return (data >> _DEPTH_SHIFT & 0xFF, data & 3,
+                            (data >> _SCORE_SHIFT & 0xFFFFFFFF) - _SCORE_OFFSET,
+                            decode_move(code) if code else None)
+        return None
+
+    def store(self, key, depth, bound, score, move=None):
+        index = (key & self.mask) * SLOTS_PER_BUCKET
+        data = (bound | min(depth, 255) << _DEPTH_SHIFT |
+                (encode_move(move) if move else 0) << _MOVE_SHIFT |
+                (score + _SCORE_OFFSET) << _SCORE_SHIFT |
+                self.generation << _GENERATION_SHIFT)
+        current = self.data[index]
+        if (self.keys[index] == key or not current & 3 or
+                current >> _GENERATION_SHIFT != self.generation or
+                depth >= (current >> _DEPTH_SHIFT & 0xFF)):
+            self.keys[index] = key
+            self.data[index] = data
+        else:
+            self.keys[index + 1] = key
+            self.data[index + 1] = data
+
+    def usage(self):
+        """Fraction of slots filled during the current search."""
+        used = sum(1 for data in self.data if data & 3 and data >> _GENERATION_SHIFT == self.generation)
+        return used / len(self.data)
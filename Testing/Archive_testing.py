@@ -0,0 +1,79 @@
+import io
+import os
+import tempfile
+import unittest
+from Chess_archive import ArchiveReader, ArchiveWriter, convert_pgn
+from Chess_pgn import play_move, read_games, replay_game
+from Chess_rules import Board
+from Pgn_testing import SAMPLE
+
+
+class TestArchive(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'games.sca')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_pgn_games_round_trip(self):
+        self.assertEqual(convert_pgn(io.StringIO(SAMPLE), self.path), (2, 0))
+        expected = [replay_game(game) for game in read_games(io.StringIO(SAMPLE))]
+        with ArchiveReader(self.path) as reader:
+            self.assertEqual(len(reader), 2)
+            self.assertEqual([game.result for game in reader], ['1-0', '*'])
+            for game, board in zip(reader, expected):
+                self.assertEqual(len(game), len(board.move_stack))
+                self.assertEqual(game.replay().to_fen(), board.to_fen())
+
+    def test_game_from_fen_keeps_its_start(self):
+        fen = '4k3/8/8/8/8/8/4P3/4K3 w - - 0 1'
+        pgn = f'[FEN "{fen}"]\n[SetUp "1"]\n\n1. e4 Kd7 *\n'
+        self.assertEqual(convert_pgn(io.StringIO(pgn), self.path), (1, 0))
+        with ArchiveReader(self.path) as reader:
+            self.assertEqual(reader[0].board().to_fen(), fen)
+            self.assertEqual(reader[0].replay().to_fen(), '8/3k4/8/8/4P3/8/8/4K3 w - - 1 2')
+
+    def test_pgn_result_is_kept(self):
+        pgn = '[Result "0-1"]\n\n1. e4 e5 2. Qh5 Nc6 0-1\n\n[Result "1/2-1/2"]\n\n1. d4 1/2-1/2\n'
+        self.assertEqual(convert_pgn(io.StringIO(pgn), self.path), (2, 0))
+        with ArchiveReader(self.path) as reader:
+            self.assertEqual([game.result for game in reader], ['0-1', '1/2-1/2'])
+            self.assertEqual(len(reader[0]), 4)
+
+    def test_add_board_stores_the_given_start(self):
+        fen = '4k3/8/8/8/8/8/4P3/4K3 w - - 0 1'
+        board = Board.from_fen(fen)
+        play_move(board, ((6, 4), (4, 4)))
+        with ArchiveWriter(self.path) as writer:
+            writer.add_board(board, Board.from_fen(fen))
+        with ArchiveReader(self.path) as reader:
+            self.assertEqual(reader[0].replay().to_fen(), board.to_fen())
+
+    def test_random_access_and_positions(self):
+        board = Board()
+        with ArchiveWriter(self.path) as writer:
+            for start, end in [((6, 4), (4, 4)), ((1, 4), (3, 4)), ((7, 6), (5, 5))]:
+                play_move(board, (start, end))
+                writer.add_position(board)
+            writer.add_board(board, Board())
+        with ArchiveReader(self.path) as reader:
+            self.assertEqual(len(reader), 4)
+            self.assertEqual(reader[1].board().to_fen(),
+                             'rnbqkbnr/pppp1ppp/8/4p3/4P3/8/PPPP1PPP/RNBQKBNR w KQkq e6 0 2')
+            last = reader[-1]
+            self.assertEqual(last.board().to_fen(), Board().to_fen())
+            self.assertEqual(last.decoded_moves()[2], ((7, 6), (5, 5)))
+            with self.assertRaises(IndexError):
+                reader[4]
+
+    def test_rejects_incomplete_archive(self):
+        writer = ArchiveWriter(self.path)
+        writer.stream.flush()
+        with self.assertRaises(ValueError):
+            ArchiveReader(self.path)
+        writer.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+from Chess_batch import analyse_batch, analyse_position
+from Chess_perft import REFERENCE_POSITIONS
+
+FOOLS_MATE = ['f2f3', 'e7e5', 'g2g4', 'd8h4']
+STALEMATE = '7k/5Q2/6K1/8/8/8/8/8 b - - 0 1'
+
+
+class TestBatch(unittest.TestCase):
+    def test_single_position_report(self):
+        report = analyse_position(0, FOOLS_MATE)
+        self.assertEqual(report.status, 'checkmate')
+        self.assertEqual(report.legal_moves, 0)
+        self.assertEqual(analyse_position(1, STALEMATE).status, 'stalemate')
+        self.assertEqual(analyse_position(2, ['e2e5']).status, 'error')
+
+    def test_in_process_batch_with_search(self):
+        reports = list(analyse_batch(['6k1/5ppp/8/8/8/8/5PPP/R5K1 w - - 0 1'], workers=0,
+                                     search_depth=2))
+        self.assertEqual(len(reports), 1)
+        self.assertEqual(reports[0].best_move, ((7, 0), (0, 0)))
+
+    def test_process_pool_matches_in_process(self):
+        positions = [fen for fen, _ in REFERENCE_POSITIONS.values()] + [FOOLS_MATE, STALEMATE]
+        pooled = sorted(analyse_batch(positions, workers=2, chunk_size=2), key=lambda r: r.index)
+        self.assertEqual([r.index for r in pooled], list(range(len(positions))))
+        for report, (_, counts) in zip(pooled, REFERENCE_POSITIONS.values()):
+            self.assertEqual(report.legal_moves, counts[0])
+        self.assertEqual([r.status for r in pooled[-2:]], ['checkmate', 'stalemate'])
+
+    def test_malformed_positions_are_reported(self):
+        positions = ['8/8/8/8/8/8/8/8 w - a 0 1', [((6, 4),)], FOOLS_MATE]
+        reports = sorted(analyse_batch(positions, workers=2, chunk_size=1), key=lambda r: r.index)
+        self.assertEqual([r.status for r in reports], ['error', 'error', 'checkmate'])
+        self.assertIn("'a'", reports[0].error)
+
+
+if __name__ == '__main__':
+    unittest.main()
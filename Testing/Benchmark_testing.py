@@ -0,0 +1,45 @@
+"""Move-generation throughput benchmarks.
+
+Needs the pytest-benchmark plugin; save a baseline with
+``pytest Testing/Benchmark_testing.py --benchmark-autosave`` and gate on it
+with ``--benchmark-compare --benchmark-compare-fail=mean:10%``.
+"""
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from Chess_perft import REFERENCE_POSITIONS, perft
+from Chess_rules import Board
+
+
+@pytest.fixture(params=['start', 'kiwipete', 'position4'])
+def board(request):
+    return Board.from_fen(REFERENCE_POSITIONS[request.param][0])
+
+
+def test_valid_moves(benchmark, board):
+    pieces = board.get_pieces(board.current_turn)
+    benchmark(lambda: [piece.valid_moves(board) for piece in pieces])
+
+
+def test_is_in_check(benchmark, board):
+    benchmark(board.is_in_check, board.current_turn)
+
+
+def test_is_checkmate(benchmark, board):
+    def run():
+        board.clear_caches()
+        return board.is_checkmate(board.current_turn)
+    benchmark(run)
+
+
+def test_select_piece(benchmark, board):
+    def run():
+        board.clear_caches()
+        for piece in board.get_pieces(board.current_turn):
+            board.select_piece(piece.position)
+    benchmark(run)
+
+
+def test_perft_depth_2(benchmark, board):
+    benchmark(perft, board, 2)
@@ -0,0 +1,92 @@
+import random
+import unittest
+from Chess_rules import Board, Pawn, Queen, Rook, King
+from Chess_bitboard import BitBoard
+
+
+def board_legal_moves(board):
+    moves = set()
+    for row in range(8):
+        for col in range(8):
+            piece = board.grid[row][col]
+            if piece is not None and piece.color == board.current_turn:
+                board.select_piece((row, col))
+                moves.update(((row, col), end) for end in board.valid_moves)
+    board.selected_piece = None
+    board.valid_moves = []
+    return moves
+
+
+class TestBitBoard(unittest.TestCase):
+    def test_initial_position(self):
+        bitboard = BitBoard()
+        self.assertEqual(len(bitboard.legal_moves()), 20)
+        self.assertIsInstance(bitboard.get_piece((7, 4)), King)
+        self.assertEqual(bitboard.get_piece((0, 3)).color, 'black')
+        self.assertIsNone(bitboard.get_piece((4, 4)))
+        self.assertFalse(bitboard.is_in_check('white'))
+
+    def test_matches_object_board_in_random_games(self):
+        rng = random.Random(7)
+        for _ in range(4):
+            board = Board()
+            for _ply in range(40):
+                bitboard = BitBoard.from_board(board)
+                expected = board_legal_moves(board)
+                self.assertEqual(set(bitboard.legal_moves()), expected)
+                self.assertEqual(bitboard.is_in_check(board.current_turn),
+                                 board.is_in_check(board.current_turn))
+                if not expected:
+                    break
+                start, end = rng.choice(sorted(expected))
+                board.select_piece(start)
+                board.move_piece(end)
+                if board.promoting_pawn:
+                    board.promote_pawn('queen')
+
+    def test_castling_and_en_passant(self):
+        bitboard = BitBoard()
+        for start, end in [((6, 4), (4, 4)), ((1, 0), (2, 0)), ((7, 6), (5, 5)),
+                           ((2, 0), (3, 0)), ((7, 5), (6, 4)), ((3, 0), (4, 0)),
+                           ((6, 1), (4, 1))]:
+            self.assertTrue(bitboard.select_piece(start))
+            self.assertTrue(bitboard.move_piece(end), f"{start}->{end} rejected")
+        self.assertEqual(bitboard.en_passant_target, (5, 1))
+        bitboard.select_piece((4, 0))
+        bitboard.move_piece((5, 1))
+        self.assertIsNone(bitboard.get_piece((4, 1)))
+        bitboard.select_piece((7, 4))
+        self.assertIn((7, 6), bitboard.valid_moves)
+        bitboard.move_piece((7, 6))
+        self.assertIsInstance(bitboard.get_piece((7, 5)), Rook)
+        self.assertIsInstance(bitboard.get_piece((7, 6)), King)
+
+    def test_promotion(self):
+        board = Board()
+        for i in range(8):
+            for j in range(8):
+                board.grid[i][j] = None
+        board.grid[1][0] = Pawn('white', (1, 0))
+        board.grid[7][4] = King('white', (7, 4))
+        board.grid[0][7] = King('black', (0, 7))
+        bitboard = BitBoard.from_board(board)
+        bitboard.select_piece((1, 0))
+        self.assertTrue(bitboard.move_piece((0, 0)))
+        self.assertIsNotNone(bitboard.promoting_pawn)
+        self.assertTrue(bitboard.promote_pawn('queen'))
+        self.assertIsInstance(bitboard.get_piece((0, 0)), Queen)
+        self.assertEqual(bitboard.current_turn, 'black')
+        self.assertTrue(bitboard.is_in_check('black'))
+
+    def test_checkmate(self):
+        bitboard = BitBoard()
+        for start, end in [((6, 5), (5, 5)), ((1, 4), (3, 4)), ((6, 6), (4, 6)), ((0, 3), (4, 7))]:
+            bitboard.select_piece(start)
+            bitboard.move_piece(end)
+        self.assertTrue(bitboard.game_over)
+        self.assertEqual(bitboard.winner, 'black')
+        self.assertTrue(bitboard.is_checkmate('white'))
+
+
+if __name__ == '__main__':
+    unittest.main()
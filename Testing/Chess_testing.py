@@ -1,5 +1,19 @@
+import os
+import random
+import subprocess
+import sys
 import unittest
 from Two_player_chess import Board, Pawn, Queen, Rook, Bishop, Knight, King
+from Chess_rules import (KING_TARGETS, KNIGHT_TARGETS, PACKED_SIZE, PAWN_CAPTURES, PAWN_PUSHES,
+                         QUEEN_RAYS, STARTING_FEN)
+
+
+class BoardTestCase(unittest.TestCase):
+    def play(self, board, *moves):
+        """Play ``(start, end)`` moves through select_piece/move_piece."""
+        for start, end in moves:
+            self.assertTrue(board.select_piece(start), f"Cannot select {start}")
+            self.assertTrue(board.move_piece(end), f"Cannot move {start} to {end}")
 
 
 class TestChessPieces(unittest.TestCase):
@@ -74,5 +88,432 @@ class TestChessPieces(unittest.TestCase):
         self.assertIsInstance(promoted_piece, Rook, "Piece not promoted to Rook")
 
 
+class TestPieceTracking(BoardTestCase):
+    def setUp(self):
+        self.board = Board()
+
+    def test_king_position_follows_moves(self):
+        self.assertEqual(self.board.king_position('white'), (7, 4))
+        self.assertEqual(self.board.king_position('black'), (0, 4))
+        self.play(self.board, ((6, 4), (4, 4)), ((1, 4), (3, 4)), ((7, 4), (6, 4)))
+        self.assertEqual(self.board.king_position('white'), (6, 4))
+        self.assertEqual(self.board.king_positions['white'], (6, 4))
+
+    def test_capture_removes_piece_from_list(self):
+        self.play(self.board, ((6, 4), (4, 4)), ((1, 3), (3, 3)), ((4, 4), (3, 3)))
+        self.assertEqual(len(self.board.get_pieces('black')), 15)
+        self.assertEqual(len(self.board.get_pieces('white')), 16)
+        self.assertNotIn((3, 3), [p.position for p in self.board.get_pieces('black')])
+
+    def test_promotion_replaces_piece_in_list(self):
+        for i in range(8):
+            for j in range(8):
+                self.board.grid[i][j] = None
+        self.board.grid[1][0] = Pawn('white', (1, 0))
+        self.board.grid[7][4] = King('white', (7, 4))
+        self.board.grid[0][7] = King('black', (0, 7))
+        self.board.refresh_piece_tracking()
+        self.play(self.board, ((1, 0), (0, 0)))
+        self.board.promote_pawn('queen')
+        white = self.board.get_pieces('white')
+        self.assertEqual(sorted(type(p).__name__ for p in white), ['King', 'Queen'])
+        self.assertTrue(self.board.is_in_check('black'))
+
+    def test_king_lookup_survives_direct_grid_edits(self):
+        self.board.grid[7][4] = None
+        self.board.grid[5][5] = King('white', (5, 5))
+        self.assertEqual(self.board.king_position('white'), (5, 5))
+
+
+class TestAttackQueries(unittest.TestCase):
+    def setUp(self):
+        self.board = Board()
+
+    def test_initial_attacks(self):
+        self.assertTrue(self.board.is_square_under_attack((5, 0), 'black'))
+        self.assertTrue(self.board.is_square_under_attack((5, 5), 'black'))
+        self.assertFalse(self.board.is_square_under_attack((4, 4), 'black'))
+        self.assertFalse(self.board.is_square_under_attack((4, 4), 'white'))
+
+    def test_pawn_push_square_is_not_attacked(self):
+        for i in range(8):
+            for j in range(8):
+                self.board.grid[i][j] = None
+        self.board.grid[3][3] = Pawn('black', (3, 3))
+        self.board.refresh_piece_tracking()
+        self.assertFalse(self.board.is_square_under_attack((4, 3), 'white'))
+        self.assertTrue(self.board.is_square_under_attack((4, 2), 'white'))
+        self.assertTrue(self.board.is_square_under_attack((4, 4), 'white'))
+
+    def test_sliders_are_blocked(self):
+        for i in range(8):
+            for j in range(8):
+                self.board.grid[i][j] = None
+        self.board.grid[0][0] = Queen('black', (0, 0))
+        self.board.grid[0][3] = Knight('white', (0, 3))
+        self.board.refresh_piece_tracking()
+        self.assertTrue(self.board.is_square_under_attack((0, 3), 'white'))
+        self.assertFalse(self.board.is_square_under_attack((0, 5), 'white'))
+        self.assertTrue(self.board.is_square_under_attack((7, 7), 'white'))
+
+    def test_attack_map_matches_reverse_query(self):
+        for start, end in [((6, 4), (4, 4)), ((1, 3), (3, 3)), ((7, 5), (3, 1))]:
+            self.board.select_piece(start)
+            self.board.move_piece(end)
+            for color, opponent in (('white', 'black'), ('black', 'white')):
+                attacked = self.board.attack_map(opponent)
+                for row in range(8):
+                    for col in range(8):
+                        self.assertEqual(self.board.is_square_under_attack((row, col), color),
+                                         (row, col) in attacked, f"{(row, col)} vs {opponent}")
+
+    def test_attack_map_invalidated_on_move(self):
+        before = self.board.attack_map('white')
+        self.board.select_piece((6, 4))
+        self.board.move_piece((4, 4))
+        self.assertIsNot(self.board.attack_map('white'), before)
+        self.assertIn((2, 0), self.board.attack_map('white'))
+
+
+class TestLegalMoves(unittest.TestCase):
+    def setUp(self):
+        self.board = Board()
+        for i in range(8):
+            for j in range(8):
+                self.board.grid[i][j] = None
+
+    def place(self, *pieces):
+        for piece in pieces:
+            self.board.grid[piece.position[0]][piece.position[1]] = piece
+        self.board.refresh_piece_tracking()
+
+    def test_initial_position_has_twenty_moves(self):
+        self.assertEqual(len(Board().legal_moves('white')), 20)
+        self.assertEqual(len(Board().legal_moves('black')), 20)
+
+    def test_pinned_piece_stays_on_pin_line(self):
+        self.place(King('white', (7, 4)), Bishop('white', (6, 4)), Rook('black', (0, 4)),
+                   King('black', (0, 0)))
+        self.assertEqual([end for start, end in self.board.legal_moves('white') if start == (6, 4)], [])
+        self.place(Rook('white', (6, 4)))
+        rook_moves = {end for start, end in self.board.legal_moves('white') if start == (6, 4)}
+        self.assertEqual(rook_moves, {(r, 4) for r in range(6)})
+
+    def test_single_check_must_be_blocked_or_captured(self):
+        self.place(King('white', (7, 4)), Rook('white', (7, 0)), Knight('white', (5, 3)),
+                   Rook('black', (0, 4)), King('black', (0, 0)))
+        moves = set(self.board.legal_moves('white'))
+        self.assertIn(((5, 3), (3, 4)), moves)
+        self.assertNotIn(((7, 0), (6, 0)), moves)
+        self.assertNotIn(((7, 4), (6, 4)), moves)
+        self.assertIn(((7, 4), (7, 5)), moves)
+
+    def test_en_passant_discovering_check_is_illegal(self):
+        self.place(King('white', (3, 0)), Pawn('white', (3, 1)), Pawn('black', (1, 2)),
+                   Rook('black', (3, 7)), King('black', (0, 7)))
+        self.board.current_turn = 'black'
+        self.board.select_piece((1, 2))
+        self.board.move_piece((3, 2))
+        self.assertEqual(self.board.en_passant_target, (2, 2))
+        self.assertNotIn(((3, 1), (2, 2)), self.board.legal_moves('white'))
+
+    def test_stalemate_is_detected(self):
+        self.place(King('black', (0, 0)), King('white', (7, 7)), Queen('white', (3, 1)))
+        self.board.select_piece((3, 1))
+        self.board.move_piece((2, 1))
+        self.assertTrue(self.board.is_stalemate('black'))
+        self.assertTrue(self.board.game_over)
+        self.assertIsNone(self.board.winner)
+
+    def test_legal_moves_are_cached_until_next_move(self):
+        board = Board()
+        moves = board.legal_moves('white')
+        self.assertIs(board.legal_moves('white'), moves)
+        board.select_piece((6, 4))
+        board.move_piece((4, 4))
+        self.assertIsNot(board.legal_moves('white'), moves)
+
+
+class TestFen(BoardTestCase):
+    def test_initial_position_round_trip(self):
+        self.assertEqual(Board().to_fen(), STARTING_FEN)
+        self.assertEqual(Board.from_fen(STARTING_FEN).to_fen(), STARTING_FEN)
+
+    def test_move_counters_and_en_passant(self):
+        board = Board()
+        self.play(board, ((6, 4), (4, 4)))
+        self.assertEqual(board.to_fen(), 'rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1')
+        self.play(board, ((1, 4), (3, 4)), ((7, 6), (5, 5)), ((0, 1), (2, 2)))
+        self.assertEqual(board.to_fen(), 'r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3')
+
+    def test_castling_rights_follow_has_moved(self):
+        board = Board.from_fen('r3k2r/8/8/8/8/8/8/R3K2R w Kq - 0 1')
+        self.assertFalse(board.grid[7][4].has_moved)
+        self.assertFalse(board.grid[7][7].has_moved)
+        self.assertTrue(board.grid[7][0].has_moved)
+        self.assertTrue(board.grid[0][7].has_moved)
+        board.select_piece((7, 4))
+        self.assertIn((7, 6), board.valid_moves)
+        self.assertNotIn((7, 2), board.valid_moves)
+        board.move_piece((7, 5))
+        self.assertEqual(board.castling_rights(), 'q')
+
+    def test_loaded_position_state(self):
+        board = Board.from_fen('4k3/8/8/3pP3/8/8/8/4K3 w - d6 4 30')
+        self.assertEqual(board.current_turn, 'white')
+        self.assertEqual(board.en_passant_target, (2, 3))
+        self.assertEqual((board.halfmove_clock, board.fullmove_number), (4, 30))
+        board.select_piece((3, 4))
+        self.assertIn((2, 3), board.valid_moves)
+
+    def test_invalid_fen(self):
+        for fen in ['8/8/8 w - - 0 1', 'rnbqkbnr/ppppxppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1',
+                    'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR x KQkq - 0 1',
+                    '8/8/8/8/8/8/8/8 w - a 0 1', '8/8/8/8/8/8/8/8 w - e9 0 1',
+                    '8/8/8/8/8/8/8/8 w - e3 0 1', '8/8/8/8/8/8/8/8 b - e6 0 1',
+                    '8/8/8/8/8/8/8/8 w - - -1 1', '8/8/8/8/8/8/8/8 w - - 0 x']:
+            with self.assertRaises(ValueError):
+                Board.from_fen(fen)
+        self.assertEqual(Board.from_fen('8/8/8/8/8/8/8/8 w - e6 0 1').en_passant_target, (2, 4))
+
+
+class TestCompactPieces(unittest.TestCase):
+    def test_pieces_use_slots_and_integer_colors(self):
+        piece = Queen('black', (0, 3))
+        self.assertFalse(hasattr(piece, '__dict__'))
+        self.assertEqual(piece.color_code, 1)
+        self.assertEqual((piece.color, piece.image_key), ('black', 'bQ'))
+
+    def test_packed_round_trip(self):
+        for fen in [STARTING_FEN, 'r3k2r/1P6/8/3pP3/8/8/8/R3K2R w Kq d6 3 41',
+                    '4k3/8/8/8/8/8/8/4K3 b - - 0 1']:
+            board = Board.from_fen(fen)
+            packed = board.pack()
+            self.assertEqual(len(packed), PACKED_SIZE)
+            restored = Board.from_packed(packed)
+            self.assertEqual(restored.to_fen(), fen)
+            self.assertEqual(restored.zobrist_key, board.zobrist_key)
+
+    def test_invalid_packed_data(self):
+        for data in [b'', bytes(PACKED_SIZE - 1), bytes([15]) + bytes(PACKED_SIZE - 1)]:
+            with self.assertRaises(ValueError):
+                Board.from_packed(data)
+
+
+class TestMoveTables(unittest.TestCase):
+    def test_tables_cover_the_board_edges(self):
+        self.assertEqual(sorted(KNIGHT_TARGETS[7][0]), [(5, 1), (6, 2)])
+        self.assertEqual(len(KING_TARGETS[0][7]), 3)
+        self.assertEqual(sum(len(ray) for ray in QUEEN_RAYS[4][3]), 27)
+        self.assertEqual(PAWN_PUSHES[0][6][4], ((5, 4), (4, 4)))
+        self.assertEqual(PAWN_PUSHES[1][3][4], ((4, 4),))
+        self.assertEqual(PAWN_PUSHES[0][0][4], ())
+        self.assertEqual(PAWN_CAPTURES[1][1][0], ((2, 1),))
+
+    def test_pieces_generate_from_the_tables(self):
+        board = Board.from_fen('4k3/8/8/3p4/2N5/8/8/R3K3 w Q - 0 1')
+        self.assertEqual(sorted(board.grid[4][2].valid_moves(board)),
+                         sorted(set(KNIGHT_TARGETS[4][2])))
+        self.assertIn((7, 2), board.grid[7][4].valid_moves(board))
+        self.assertNotIn((3, 3), board.grid[7][0].valid_moves(board))
+
+
+class TestZobrist(BoardTestCase):
+    def test_incremental_key_matches_full_hash(self):
+        rng = random.Random(3)
+        for fen in [STARTING_FEN, 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+                    'rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8']:
+            board = Board.from_fen(fen)
+            for _ in range(60):
+                moves = board.legal_moves(board.current_turn)
+                if not moves or board.game_over:
+                    break
+                start, end = rng.choice(moves)
+                self.play(board, (start, end))
+                if board.promoting_pawn:
+                    board.promote_pawn(rng.choice(['queen', 'rook', 'bishop', 'knight']))
+                self.assertEqual(board.zobrist_key, board.compute_zobrist(), board.to_fen())
+                self.assertEqual(board.zobrist_key, Board.from_fen(board.to_fen()).zobrist_key)
+
+    def test_transpositions_share_a_key(self):
+        first, second = Board(), Board()
+        self.play(first, ((7, 6), (5, 5)), ((0, 6), (2, 5)), ((7, 1), (5, 2)))
+        self.play(second, ((7, 1), (5, 2)), ((0, 6), (2, 5)), ((7, 6), (5, 5)))
+        self.assertEqual(first.zobrist_key, second.zobrist_key)
+
+    def test_side_to_move_and_rights_change_the_key(self):
+        keys = {Board.from_fen(fen).zobrist_key for fen in [
+            'r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1', 'r3k2r/8/8/8/8/8/8/R3K2R b KQkq - 0 1',
+            'r3k2r/8/8/8/8/8/8/R3K2R w Kkq - 0 1', 'r3k2r/8/8/8/8/8/8/R3K2R w - - 0 1']}
+        self.assertEqual(len(keys), 4)
+
+
+class TestMakeUnmake(unittest.TestCase):
+    def test_unmake_restores_every_move(self):
+        for fen in [STARTING_FEN, 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+                    'rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8',
+                    '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1']:
+            board = Board.from_fen(fen)
+            before = (board.to_fen(), board.zobrist_key)
+            for start, end in list(board.legal_moves()):
+                record = board.make_move((start, end))
+                self.assertEqual(board.zobrist_key, board.compute_zobrist())
+                for reply_start, reply_end in list(board.legal_moves()):
+                    reply = board.make_move((reply_start, reply_end))
+                    board.unmake_move(reply)
+                board.unmake_move(record)
+                self.assertEqual((board.to_fen(), board.zobrist_key), before, f"after {start}->{end}")
+            self.assertEqual(board.king_position('white'), Board.from_fen(fen).king_position('white'))
+
+    def test_castling_en_passant_and_promotion(self):
+        board = Board.from_fen('r3k2r/1P6/8/3pP3/8/8/8/R3K2R w KQkq d6 0 1')
+        fen = board.to_fen()
+        record = board.make_move(((7, 4), (7, 6)))
+        self.assertIsInstance(board.grid[7][5], Rook)
+        board.unmake_move(record)
+        record = board.make_move(((3, 4), (2, 3)))
+        self.assertIsNone(board.grid[3][3])
+        board.unmake_move(record)
+        record = board.make_move(((1, 1), (0, 0), 'knight'))
+        self.assertIsInstance(board.grid[0][0], Knight)
+        self.assertEqual(board.castling_rights(), 'KQk')
+        board.unmake_move(record)
+        self.assertEqual(board.to_fen(), fen)
+        self.assertIsInstance(board.grid[1][1], Pawn)
+        self.assertEqual(len(board.get_pieces('black')), 4)
+
+    def test_unmake_after_move_piece(self):
+        board = Board()
+        board.select_piece((6, 4))
+        board.move_piece((4, 4))
+        board.unmake_move()
+        self.assertEqual(board.to_fen(), STARTING_FEN)
+        self.assertEqual(board.move_stack, [])
+
+    def test_unmake_out_of_order(self):
+        board = Board()
+        first = board.make_move(((6, 4), (4, 4)))
+        board.make_move(((1, 4), (3, 4)))
+        with self.assertRaises(ValueError):
+            board.unmake_move(first)
+
+
+class TestHeadlessImport(unittest.TestCase):
+    def test_rules_module_does_not_import_pygame(self):
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        code = "import sys, Chess_rules; sys.exit('pygame' in sys.modules)"
+        result = subprocess.run([sys.executable, '-c', code], cwd=root)
+        self.assertEqual(result.returncode, 0, "Chess_rules pulled in pygame")
+
+
+class TestGameStatus(BoardTestCase):
+    def test_checkmate_is_stored_after_the_move(self):
+        board = Board()
+        self.play(board, ((6, 5), (5, 5)), ((1, 4), (3, 4)), ((6, 6), (4, 6)), ((0, 3), (4, 7)))
+        self.assertTrue(board.check)
+        self.assertTrue(board.checkmate)
+        self.assertFalse(board.stalemate)
+        self.assertEqual(board.winner, 'black')
+
+        board.unmake_move()
+        self.assertFalse(board.check or board.checkmate or board.game_over)
+
+    def test_threefold_repetition_is_a_draw(self):
+        board = Board()
+        shuffle = [((7, 6), (5, 5)), ((0, 6), (2, 5)), ((5, 5), (7, 6)), ((2, 5), (0, 6))]
+        self.play(board, *shuffle)
+        self.assertEqual(board.repetition_count(), 2)
+        self.assertFalse(board.game_over)
+        self.play(board, *shuffle)
+        self.assertTrue(board.game_over)
+        self.assertIsNone(board.winner)
+        self.assertEqual(board.draw_reason, 'threefold repetition')
+
+        board.unmake_move()
+        self.assertFalse(board.game_over)
+        self.assertIsNone(board.draw_reason)
+        self.assertEqual(board.position_counts[Board().zobrist_key], 2)
+
+    def test_repetition_counts_position_after_double_push(self):
+        # e4 Nf6 Nf3 Ng8 Ng1 Nf6 Nf3 Ng8 Ng1: no black pawn can take on e3,
+        # so the position after 1...Nf6 already counts.
+        board = Board()
+        knights = [((0, 6), (2, 5)), ((7, 6), (5, 5)), ((2, 5), (0, 6)), ((5, 5), (7, 6))]
+        self.play(board, ((6, 4), (4, 4)), *knights, *knights)
+        self.assertEqual(board.repetition_count(), 3)
+        self.assertTrue(board.game_over)
+        self.assertEqual(board.draw_reason, 'threefold repetition')
+
+    def test_en_passant_hashed_only_when_capturable(self):
+        quiet = 'rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1'
+        self.assertEqual(Board.from_fen(quiet).zobrist_key,
+                         Board.from_fen(quiet.replace('e3', '-')).zobrist_key)
+        capturable = 'rnbqkbnr/ppp1pppp/8/8/3pP3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1'
+        self.assertNotEqual(Board.from_fen(capturable).zobrist_key,
+                            Board.from_fen(capturable.replace('e3', '-')).zobrist_key)
+
+    def test_fifty_move_rule_is_a_draw(self):
+        board = Board.from_fen('4k3/8/8/8/8/8/8/R3K3 w - - 99 80')
+        self.play(board, ((7, 0), (6, 0)))
+        self.assertTrue(board.game_over)
+        self.assertEqual(board.draw_reason, 'fifty-move rule')
+
+        board = Board.from_fen('4k3/8/8/8/8/8/p7/R3K3 w - - 99 80')
+        self.play(board, ((7, 0), (6, 0)))
+        self.assertEqual(board.halfmove_clock, 0)
+        self.assertFalse(board.game_over)
+
+    def test_status_is_read_from_fen(self):
+        board = Board.from_fen('7k/5Q2/6K1/8/8/8/8/8 b - - 0 1')
+        self.assertTrue(board.stalemate)
+        self.assertTrue(board.game_over)
+        self.assertIsNone(board.winner)
+
+
+class TestRenderer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+        import Two_player_chess
+        cls.ui = Two_player_chess
+        cls.screen = Two_player_chess.init_display()
+
+    def test_only_changed_squares_are_redrawn(self):
+        game = self.ui.ChessGame()
+        renderer = self.ui.BoardRenderer(self.screen)
+        self.assertEqual(len(renderer.render(game.board)), 65)
+        self.assertEqual(renderer.render(game.board), [])
+
+        game.handle_click((6, 4))
+        self.assertEqual(len(renderer.render(game.board)), 3)
+
+    def test_render_cache_reuses_surfaces(self):
+        cache = self.ui.RenderCache()
+        self.assertIs(cache.background(), cache.background())
+        self.assertIs(cache.highlight(self.ui.HIGHLIGHT), cache.highlight(self.ui.HIGHLIGHT))
+        self.assertIs(cache.text("White's turn", self.ui.BLACK), cache.text("White's turn", self.ui.BLACK))
+
+    def test_piece_images_share_one_atlas(self):
+        images = self.ui.load_images()
+        self.assertEqual(sorted(images), sorted(self.ui.PIECE_KEYS))
+        atlas = images['wK'].get_parent()
+        self.assertTrue(all(image.get_parent() is atlas for image in images.values()))
+        self.assertEqual(images['bQ'].get_size(), (self.ui.SQUARE_SIZE, self.ui.SQUARE_SIZE))
+
+    def test_incremental_frame_matches_full_redraw(self):
+        import pygame
+        game = self.ui.ChessGame()
+        renderer = self.ui.BoardRenderer(self.screen)
+        renderer.render(game.board)
+        for square in [(6, 4), (4, 4), (1, 3), (3, 3), (4, 4), (3, 3)]:
+            game.handle_click(square)
+            renderer.render(game.board)
+
+        full = pygame.Surface(self.ui.WINDOW_SIZE)
+        self.ui.draw_game_state(full, game.board)
+        self.assertEqual(pygame.image.tobytes(full, 'RGB'),
+                         pygame.image.tobytes(self.screen, 'RGB'))
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,72 @@
+import importlib.util
+import os
+import random
+import subprocess
+import sys
+import unittest
+import Chess_evaluation
+from Chess_evaluation import (evaluate, evaluate_batch, king_safety, material_score,
+                              material_terms, pawn_structure)
+from Chess_perft import REFERENCE_POSITIONS
+from Chess_rules import Board
+
+
+class TestEvaluation(unittest.TestCase):
+    def test_start_position_is_balanced(self):
+        board = Board()
+        self.assertEqual(evaluate(board), 0)
+        self.assertEqual(material_terms(board.grid), (0, 0, 24))
+
+    def test_incremental_terms_match_a_rescan(self):
+        rng = random.Random(7)
+        board = Board()
+        for _ in range(150):
+            moves = board.legal_moves()
+            if not moves:
+                break
+            move = rng.choice(moves)
+            if board.grid[move[0][0]][move[0][1]].symbol == 'p' and move[1][0] in (0, 7):
+                move += (rng.choice(['queen', 'knight']),)
+            board.make_move(move)
+            self.assertEqual((board.eval_mg, board.eval_eg, board.phase), material_terms(board.grid))
+        while board.move_stack:
+            board.unmake_move()
+        self.assertEqual((board.eval_mg, board.eval_eg, board.phase), (0, 0, 24))
+
+    def test_terms_see_the_position(self):
+        up_a_queen = Board.from_fen('3qk3/8/8/8/8/8/8/4K3 b - - 0 1')
+        self.assertLess(material_score(up_a_queen), -800)
+        self.assertGreater(evaluate(up_a_queen), 800)
+
+        broken = Board.from_fen('4k3/pppppppp/8/8/8/P1P5/P1P5/4K3 w - - 0 1')
+        self.assertLess(pawn_structure(broken), 0)
+        sheltered = Board.from_fen('rnbq1rk1/ppppbppp/8/8/8/8/PPPPQ1PP/RNB1KBNR w KQ - 0 1')
+        self.assertLess(king_safety(sheltered), 0)
+
+    def test_batch_matches_single_scores(self):
+        boards = [Board.from_fen(fen) for fen, _ in REFERENCE_POSITIONS.values()]
+        expected = [material_score(board) for board in boards]
+        self.assertEqual(evaluate_batch(boards), expected)
+        self.assertEqual(evaluate_batch([board.pack() for board in boards]), expected)
+        self.assertEqual(evaluate_batch([]), [])
+
+    @unittest.skipIf(importlib.util.find_spec('numpy') is None, "NumPy is not installed")
+    def test_numpy_path_matches_scalar_evaluate(self):
+        self.assertIsNotNone(Chess_evaluation._load_numpy())
+        boards = [Board.from_fen(fen) for fen, _ in REFERENCE_POSITIONS.values()]
+        boards.append(Board.from_fen('3qk3/8/8/8/8/8/8/4K3 b - - 0 1'))
+        white_view = [evaluate(board, full=False) * (1 if board.current_turn == 'white' else -1)
+                      for board in boards]
+        self.assertEqual(evaluate_batch(boards), white_view)
+        self.assertEqual(white_view, [Chess_evaluation._evaluate_packed(board.pack())
+                                      for board in boards])
+
+    def test_rules_import_does_not_load_numpy(self):
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        code = "import sys, Chess_rules; sys.exit('numpy' in sys.modules)"
+        result = subprocess.run([sys.executable, '-c', code], cwd=root)
+        self.assertEqual(result.returncode, 0, "Chess_rules pulled in NumPy")
+
+
+if __name__ == '__main__':
+    unittest.main()
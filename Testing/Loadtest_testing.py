@@ -0,0 +1,37 @@
+import asyncio
+import unittest
+from Chess_loadtest import deep_size, percentile, run_load_test
+from Chess_rules import Board
+
+
+class TestLoadTest(unittest.TestCase):
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([3.0], 90), 3.0)
+        self.assertIsNone(percentile([], 50))
+
+    def test_deep_size_grows_with_moves(self):
+        board = Board()
+        before = deep_size(board)
+        board.make_move(((6, 4), (4, 4)))
+        self.assertGreater(deep_size(board), before)
+
+    def test_swarm_plays_every_game(self):
+        report = asyncio.run(run_load_test(players=6, max_plies=8, seed=3))
+        self.assertEqual((report.players, report.games, report.errors), (6, 3, 0))
+        self.assertEqual(report.moves, 24)
+        self.assertEqual(len(report.latencies), 24)
+        self.assertEqual(len(report.validations), 24)
+        self.assertEqual(len(report.game_memory), 3)
+        self.assertGreater(report.moves_per_second, 0)
+        self.assertIn('moves/s', report.summary())
+
+    def test_needs_two_players(self):
+        with self.assertRaises(ValueError):
+            asyncio.run(run_load_test(players=1))
+
+
+if __name__ == '__main__':
+    unittest.main()
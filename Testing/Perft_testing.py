@@ -0,0 +1,37 @@
+import unittest
+from Chess_rules import Board
+from Chess_perft import REFERENCE_POSITIONS, divide, perft
+
+# Keep the suite fast: only depths whose node count stays small.
+MAX_NODES = 10000
+
+
+class TestPerft(unittest.TestCase):
+    def test_reference_positions(self):
+        for name, (fen, expected) in REFERENCE_POSITIONS.items():
+            for depth, nodes in enumerate(expected, start=1):
+                if nodes > MAX_NODES:
+                    break
+                with self.subTest(position=name, depth=depth):
+                    self.assertEqual(perft(Board.from_fen(fen), depth), nodes)
+
+    def test_reference_positions_round_trip(self):
+        for fen, _ in REFERENCE_POSITIONS.values():
+            self.assertEqual(Board.from_fen(fen).to_fen(), fen)
+
+    def test_divide_sums_to_perft(self):
+        fen, expected = REFERENCE_POSITIONS['kiwipete']
+        counts = divide(Board.from_fen(fen), 2)
+        self.assertEqual(len(counts), expected[0])
+        self.assertEqual(sum(counts.values()), expected[1])
+        self.assertIn('e1g1', counts)
+
+    def test_promotions_are_expanded(self):
+        counts = divide(Board.from_fen('4k3/P7/8/8/8/8/8/4K3 w - - 0 1'), 1)
+        self.assertEqual(len(counts), 9)
+        self.assertIn('a7a8q', counts)
+        self.assertIn('a7a8n', counts)
+
+
+if __name__ == '__main__':
+    unittest.main()
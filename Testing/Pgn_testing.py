@@ -0,0 +1,100 @@
+import io
+import os
+import tempfile
+import unittest
+from Chess_rules import Board, parse_uci
+from Chess_pgn import format_game, move_to_san, parse_san, read_games, recorded_moves, replay_game
+
+SAMPLE = """[Event "Test"]
+[White "Morphy"]
+[Black "Duke"]
+[Result "1-0"]
+
+1. e4 e5 2. Nf3 d6 3. d4 Bg4 {This is a weak move} 4. dxe5 Bxf3 5. Qxf3 dxe5
+6. Bc4 Nf6 7. Qb3 Qe7 8. Nc3 c6 (8... Qb4+ 9. Qxb4) 9. Bg5 $2 b5 10. Nxb5 cxb5
+11. Bxb5+ Nbd7 12. O-O-O Rd8 13. Rxd7 Rxd7 14. Rd1 Qe6 15. Bxd7+ Nxd7
+16. Qb8+ Nxb8 17. Rd8# 1-0
+
+[Event "Second"]
+
+1. d4 ; rest of line ignored
+d5 *
+"""
+
+
+class TestPgn(unittest.TestCase):
+    def test_reads_games_one_at_a_time(self):
+        games = read_games(io.StringIO(SAMPLE))
+        first = next(games)
+        self.assertEqual(first.headers['White'], 'Morphy')
+        self.assertEqual(first.result, '1-0')
+        self.assertEqual(len(first.moves), 33)
+        board = replay_game(first)
+        self.assertTrue(board.checkmate)
+        self.assertEqual(board.winner, 'white')
+
+        second = next(games)
+        self.assertEqual(second.moves, ['d4', 'd5'])
+        self.assertEqual(list(games), [])
+
+    def test_san_disambiguation_and_special_moves(self):
+        board = Board.from_fen('r3k2r/1P6/8/8/8/8/8/R3K2R w KQkq - 0 1')
+        self.assertEqual(move_to_san(board, parse_uci('e1g1')), 'O-O')
+        self.assertEqual(move_to_san(board, parse_uci('a1d1')), 'Rd1')
+        self.assertEqual(move_to_san(board, ((1, 1), (0, 0), 'knight')), 'bxa8=N')
+        self.assertEqual(move_to_san(board, parse_uci('a1a8')), 'Rxa8+')
+        self.assertEqual(parse_san(board, 'bxa8=N'), ((1, 1), (0, 0), 'knight'))
+        self.assertEqual(parse_san(board, 'O-O-O'), ((7, 4), (7, 2)))
+        for bad in ['Rb8', 'b8', 'Kxe8', 'Qh5']:
+            with self.assertRaises(ValueError):
+                parse_san(board, bad)
+
+        board = Board.from_fen('4k3/8/8/R7/R6R/8/8/4K3 w - - 0 1')
+        self.assertEqual(move_to_san(board, parse_uci('h4d4')), 'Rhd4')
+        self.assertEqual(move_to_san(board, parse_uci('a4a3')), 'Ra3')
+        self.assertEqual(move_to_san(board, parse_uci('a5a6')), 'Ra6')
+        self.assertEqual(move_to_san(board, parse_uci('a4b4')), 'Rab4')
+        self.assertEqual(parse_san(board, 'R5a6'), ((3, 0), (2, 0)))
+        with self.assertRaises(ValueError):
+            parse_san(board, 'Rb4')
+
+    def test_written_game_reads_back(self):
+        board = replay_game(next(read_games(io.StringIO(SAMPLE))))
+        text = format_game(recorded_moves(board), {'Event': 'Round trip'})
+        game = next(read_games(io.StringIO(text)))
+        self.assertEqual(game.result, '1-0')
+        self.assertEqual(replay_game(game).to_fen(), board.to_fen())
+
+    def test_chess_game_saves_clicked_moves(self):
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+        from Two_player_chess import ChessGame
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'games.pgn')
+            game = ChessGame(path)
+            self.assertFalse(game.save_game())
+            for square in [(6, 4), (4, 4), (1, 4), (3, 4), (7, 6), (5, 5)]:
+                game.handle_click(square)
+            self.assertTrue(game.save_game())
+            with open(path) as stream:
+                saved = next(read_games(stream))
+        self.assertEqual(saved.moves, ['e4', 'e5', 'Nf3'])
+        self.assertEqual(saved.result, '*')
+
+    def test_chess_game_saves_to_the_working_directory(self):
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+        from Two_player_chess import ChessGame
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as directory:
+            os.chdir(directory)
+            try:
+                game = ChessGame()
+                game.handle_click((6, 4))
+                game.handle_click((4, 4))
+                self.assertTrue(game.save_game())
+                self.assertTrue(os.path.exists(os.path.join(directory, 'games.pgn')))
+            finally:
+                os.chdir(cwd)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import json
+import os
+import pstats
+import tempfile
+import unittest
+from Chess_profiling import PROFILED, Profiler, profile_moves
+from Chess_rules import Board
+
+
+class TestProfiler(unittest.TestCase):
+    def test_disabled_profiler_leaves_methods_untouched(self):
+        originals = [owner.__dict__[name] for owner, name in PROFILED]
+        with Profiler():
+            self.assertIsNot(Board.__dict__['is_in_check'], originals[1])
+        self.assertEqual([owner.__dict__[name] for owner, name in PROFILED], originals)
+
+    def test_counts_calls_of_one_move(self):
+        board = Board()
+        with Profiler() as profiler:
+            board.select_piece((6, 4))
+            board.move_piece((4, 4))
+        self.assertEqual(profiler.calls('Board.move_piece'), 1)
+        self.assertEqual(profiler.calls('Board._update_game_status'), 1)
+        self.assertGreaterEqual(profiler.calls('Board.is_in_check'), 1)
+        entry = profiler.functions['Board.move_piece']
+        self.assertGreaterEqual(entry.total, entry.own)
+        self.assertGreaterEqual(entry.total, profiler.functions['Board._update_game_status'].total)
+
+    def test_one_profiler_at_a_time(self):
+        with Profiler():
+            with self.assertRaises(RuntimeError):
+                Profiler().enable()
+
+    def test_profile_moves_and_exports(self):
+        board = Board()
+        totals = Profiler()
+        reports = list(profile_moves(board, [((6, 4), (4, 4)), ((1, 4), (3, 4))]))
+        self.assertEqual(len(reports), 2)
+        self.assertEqual(reports[0][1], Board().to_fen())
+        for _, _, profiler in reports:
+            totals.merge(profiler)
+        self.assertEqual(totals.calls('Board.move_piece'), 2)
+
+        stats = pstats.Stats(totals)
+        self.assertEqual(stats.total_calls, sum(entry.calls for entry in totals.functions.values()))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'moves.prof')
+            totals.dump_stats(path)
+            self.assertEqual(pstats.Stats(path).total_calls, stats.total_calls)
+            path = os.path.join(directory, 'moves.json')
+            totals.write_json(path)
+            with open(path) as stream:
+                data = json.load(stream)
+        self.assertEqual(data['functions']['Board.move_piece']['calls'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+from Chess_rules import Board
+from Chess_search import MATE_SCORE, Searcher, find_best_move, play_engine_game
+
+
+class TestSearch(unittest.TestCase):
+    def test_finds_mate_in_one(self):
+        board = Board.from_fen('r1bqkbnr/pppp1ppp/2n5/4p2Q/2B1P3/8/PPPP1PPP/RNB1K1NR w KQkq - 2 3')
+        result = find_best_move(board, max_depth=3)
+        self.assertEqual(result.best_move, ((3, 7), (1, 5)))
+        self.assertGreater(result.score, MATE_SCORE - 10)
+
+    def test_finds_back_rank_mate(self):
+        board = Board.from_fen('6k1/5ppp/8/8/8/8/5PPP/R5K1 w - - 0 1')
+        result = find_best_move(board, max_depth=3)
+        self.assertEqual(result.best_move, ((7, 0), (0, 0)))
+
+    def test_wins_hanging_queen(self):
+        board = Board.from_fen('4k3/8/8/3q4/8/8/3R4/4K3 w - - 0 1')
+        result = find_best_move(board, max_depth=2)
+        self.assertEqual(result.best_move, ((6, 3), (3, 3)))
+
+    def test_prefers_promotion_to_queen(self):
+        board = Board.from_fen('8/P6k/8/8/8/8/8/K7 w - - 0 1')
+        result = find_best_move(board, max_depth=3)
+        self.assertEqual(result.best_move, ((1, 0), (0, 0), 'queen'))
+
+    def test_board_is_unchanged_after_search(self):
+        board = Board.from_fen('r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1')
+        fen, key = board.to_fen(), board.zobrist_key
+        find_best_move(board, max_depth=2)
+        self.assertEqual((board.to_fen(), board.zobrist_key), (fen, key))
+        self.assertEqual(board.move_stack, [])
+
+    def test_node_budget_is_respected(self):
+        board = Board()
+        result = Searcher(board, max_depth=20, node_limit=500).search()
+        self.assertLessEqual(result.nodes, 500)
+        self.assertIsNotNone(result.best_move)
+        self.assertEqual(board.to_fen(), Board().to_fen())
+
+    def test_principal_variation_is_playable(self):
+        board = Board()
+        result = find_best_move(board, max_depth=3)
+        self.assertEqual(result.pv[0], result.best_move)
+        for move in result.pv:
+            self.assertIn(move[:2], board.legal_moves())
+            board.make_move(move)
+
+    def test_engine_game(self):
+        board = Board()
+        moves = play_engine_game(board, max_depth=1, max_plies=10)
+        self.assertEqual(len(moves), 10)
+        self.assertEqual(len(board.move_stack), 10)
+
+    def test_engine_game_ends_in_a_draw(self):
+        board = Board.from_fen('4k3/8/8/8/8/8/8/4K3 w - - 0 1')
+        moves = play_engine_game(board, max_depth=2, max_plies=300)
+        self.assertLess(len(moves), 300)
+        self.assertTrue(board.game_over)
+        self.assertIn(board.draw_reason, ('threefold repetition', 'fifty-move rule'))
+
+
+if __name__ == '__main__':
+    unittest.main()
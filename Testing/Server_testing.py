@@ -0,0 +1,144 @@
+import asyncio
+import json
+import os
+import unittest
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+from Chess_client import board_from_state
+from Chess_server import GameServer, apply_move, board_state
+from Chess_rules import Board
+
+
+class Client:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, port):
+        return cls(*await asyncio.open_connection('127.0.0.1', port))
+
+    async def send(self, **message):
+        self.writer.write(json.dumps(message).encode() + b'\n')
+        await self.writer.drain()
+
+    async def receive(self):
+        line = await asyncio.wait_for(self.reader.readline(), 5)
+        return json.loads(line)
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+class TestGameServer(unittest.TestCase):
+    def run_session(self, session):
+        async def main():
+            server = GameServer(workers=2)
+            await server.start('127.0.0.1', 0)
+            try:
+                await session(server)
+            finally:
+                await server.close()
+        asyncio.run(main())
+
+    async def start_game(self, server):
+        white = await Client.connect(server.port)
+        await white.send(cmd='new')
+        joined = await white.receive()
+        self.assertEqual(joined['color'], 'white')
+        await white.receive()
+        black = await Client.connect(server.port)
+        await black.send(cmd='join', game=joined['game'])
+        self.assertEqual((await black.receive())['color'], 'black')
+        state = await black.receive()
+        self.assertEqual(state['fen'], Board().to_fen())
+        return white, black
+
+    def test_move_is_sent_to_both_players(self):
+        async def session(server):
+            white, black = await self.start_game(server)
+            await white.send(cmd='move', move='e2e4')
+            for client in (white, black):
+                state = await client.receive()
+                self.assertEqual(state['last_move'], 'e2e4')
+                self.assertEqual(state['turn'], 'black')
+            await white.close()
+            self.assertEqual((await black.receive())['type'], 'left')
+            await black.close()
+        self.run_session(session)
+
+    def test_bad_moves_are_rejected(self):
+        async def session(server):
+            white, black = await self.start_game(server)
+            await black.send(cmd='move', move='e7e5')
+            self.assertEqual(await black.receive(), {'type': 'error', 'message': 'Not your turn'})
+            await white.send(cmd='move', move='e2e5')
+            self.assertEqual((await white.receive())['type'], 'error')
+            await white.send(cmd='move', move='zz')
+            self.assertEqual((await white.receive())['type'], 'error')
+            await white.send(cmd='state')
+            self.assertEqual((await white.receive())['fen'], Board().to_fen())
+            for client in (white, black):
+                await client.close()
+        self.run_session(session)
+
+    def test_checkmate_ends_the_game(self):
+        async def session(server):
+            white, black = await self.start_game(server)
+            for player, move in zip((white, black) * 2, ['f2f3', 'e7e5', 'g2g4', 'd8h4']):
+                await player.send(cmd='move', move=move)
+                await white.receive()
+                state = await black.receive()
+            self.assertTrue(state['checkmate'])
+            self.assertEqual(state['winner'], 'black')
+            await white.send(cmd='move', move='e2e4')
+            self.assertEqual((await white.receive())['message'], 'The game is over')
+            for client in (white, black):
+                await client.close()
+        self.run_session(session)
+
+    def test_full_game_cannot_be_joined(self):
+        async def session(server):
+            white, black = await self.start_game(server)
+            third = await Client.connect(server.port)
+            await third.send(cmd='join', game=1)
+            self.assertEqual((await third.receive())['type'], 'error')
+            await third.send(cmd='join', game='1')
+            self.assertEqual((await third.receive())['type'], 'error')
+            await third.send(cmd='move', move='e2e4')
+            self.assertEqual((await third.receive())['message'], 'Not in a game')
+            for client in (white, black, third):
+                await client.close()
+        self.run_session(session)
+
+    def test_malformed_requests_get_an_error(self):
+        async def session(server):
+            client = await Client.connect(server.port)
+            client.writer.write(b'{"cmd": "new", "pad": "' + b'x' * 200000 + b'"}\n')
+            await client.send(cmd='new')
+            self.assertEqual(await client.receive(), {'type': 'error', 'message': 'Request too long'})
+            self.assertEqual((await client.receive())['type'], 'joined')
+            await client.receive()
+            for payload in (b'[1, 2]\n', b'null\n', b'{"cmd": 5}\n', b'not json\n'):
+                client.writer.write(payload)
+                self.assertEqual(await client.receive(), {'type': 'error', 'message': 'Bad request'})
+            await client.send(cmd='state')
+            self.assertEqual((await client.receive())['type'], 'state')
+            await client.close()
+        self.run_session(session)
+
+    def test_client_mirrors_server_state(self):
+        board = Board()
+        for move in ['f2f3', 'e7e5', 'g2g4']:
+            apply_move(board, move)
+        state = apply_move(board, 'd8h4')
+        mirror = board_from_state(state)
+        self.assertEqual(mirror.to_fen(), board.to_fen())
+        self.assertTrue(mirror.game_over)
+        self.assertEqual(board_state(mirror), board_state(board))
+
+
+if __name__ == '__main__':
+    unittest.main()
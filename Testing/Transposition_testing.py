@@ -0,0 +1,54 @@
+import unittest
+from Chess_rules import Board
+from Chess_search import find_best_move
+from Chess_transposition import BOUND_EXACT, BOUND_LOWER, BOUND_UPPER, TranspositionTable
+
+
+class TestTranspositionTable(unittest.TestCase):
+    def setUp(self):
+        self.tt = TranspositionTable(size_mb=0.01)
+
+    def colliding_key(self, key):
+        return key + (self.tt.mask + 1)
+
+    def test_memory_cap(self):
+        for size_mb in (0.01, 1, 3):
+            self.assertLessEqual(TranspositionTable(size_mb).size_bytes, size_mb * 1024 * 1024)
+
+    def test_store_and_probe(self):
+        self.assertIsNone(self.tt.probe(42))
+        self.tt.store(42, 7, BOUND_LOWER, -31000, ((1, 0), (0, 0), 'knight'))
+        self.assertEqual(self.tt.probe(42), (7, BOUND_LOWER, -31000, ((1, 0), (0, 0), 'knight')))
+        self.tt.store(43, 0, BOUND_UPPER, 12, None)
+        self.assertEqual(self.tt.probe(43), (0, BOUND_UPPER, 12, None))
+
+    def test_depth_preferred_and_always_replace_slots(self):
+        deep, shallow, newest = 5, self.colliding_key(5), self.colliding_key(self.colliding_key(5))
+        self.tt.store(deep, 8, BOUND_EXACT, 1)
+        self.tt.store(shallow, 2, BOUND_EXACT, 2)
+        self.assertEqual(self.tt.probe(deep)[2], 1)
+        self.assertEqual(self.tt.probe(shallow)[2], 2)
+        self.tt.store(newest, 3, BOUND_EXACT, 3)
+        self.assertIsNotNone(self.tt.probe(deep))
+        self.assertIsNone(self.tt.probe(shallow))
+        self.assertEqual(self.tt.probe(newest)[2], 3)
+
+    def test_new_search_frees_depth_preferred_slot(self):
+        self.tt.store(5, 8, BOUND_EXACT, 1)
+        self.tt.new_search()
+        self.tt.store(self.colliding_key(5), 1, BOUND_EXACT, 2)
+        self.assertIsNone(self.tt.probe(5))
+        self.assertEqual(self.tt.probe(self.colliding_key(5))[0], 1)
+
+    def test_search_reuses_table(self):
+        tt = TranspositionTable(size_mb=1)
+        board = Board.from_fen('r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1')
+        first = find_best_move(board, max_depth=3, tt=tt)
+        second = find_best_move(board, max_depth=3, tt=tt)
+        self.assertLess(second.nodes, first.nodes)
+        self.assertEqual(second.best_move, first.best_move)
+        self.assertGreater(tt.hits, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
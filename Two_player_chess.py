@@ -1,10 +1,13 @@
 import pygame
 import sys
 from pygame.locals import *
-from abc import ABC, abstractmethod
 import os
+import time
 
-pygame.init()
+from Chess_rules import (Piece, Pawn, Rook, Knight, Bishop, Queen, King,
+                         PieceFactory, PawnFactory, RookFactory, KnightFactory,
+                         BishopFactory, QueenFactory, KingFactory, Board)
+from Chess_pgn import recorded_moves, write_game
 
 WINDOW_SIZE = (800, 800)
 BOARD_SIZE = 8
@@ -17,598 +20,279 @@ HIGHLIGHT = (247, 247, 105, 150)
 MOVE_HIGHLIGHT = (106, 168, 79, 150)
 CHECK_HIGHLIGHT = (255, 0, 0, 150)
 FONT_SIZE = 32
-screen = pygame.display.set_mode(WINDOW_SIZE)
-pygame.display.set_caption('Two-Player Chess')
-font = pygame.font.SysFont('Arial', FONT_SIZE)
+screen = None
+font = None
 IMAGES = {}
 
 
-def load_images():
-    images = ['bR', 'bN', 'bB', 'bQ', 'bK', 'bB', 'bN', 'bR',
-              'wR', 'wN', 'wB', 'wQ', 'wK', 'wB', 'wN', 'wR',
-              'bp', 'wp']
-    print(f"Current working directory: {os.getcwd()}")
-    print(f"Looking for images in: {os.path.join(os.getcwd(), 'images')}")
+PIECE_KEYS = ['wp', 'wN', 'wB', 'wR', 'wQ', 'wK',
+              'bp', 'bN', 'bB', 'bR', 'bQ', 'bK']
+IMAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'images')
+IMAGE_CACHE_DIR = os.path.join(IMAGE_DIR, '.cache')
+# Relative, so games are saved where the player starts the game, not in the source tree.
+SAVED_GAMES = 'games.pgn'
 
-    for piece in images:
-        try:
-            image_path = os.path.join("images", f"{piece}.png")
-            print(f"Trying to load: {image_path}")
-            image = pygame.image.load(image_path)
-            IMAGES[piece] = pygame.transform.scale(image, (SQUARE_SIZE, SQUARE_SIZE))
-            print(f"Successfully loaded {piece}")
-        except Exception as e:
-            print(f"Error loading {piece}: {str(e)}")
-
-
-load_images()
-
-
-def draw_pieces(screen, board):
-    for row in range(8):
-        for col in range(8):
-            piece = board[row][col]
-            if piece != "--":
-                piece_surface = IMAGES.get(piece)
-                if piece_surface:
-                    piece_rect = piece_surface.get_rect()
-                    piece_rect.center = (col * SQUARE_SIZE + SQUARE_SIZE // 2,
-                                         row * SQUARE_SIZE + SQUARE_SIZE // 2)
-                    screen.blit(piece_surface, piece_rect)
-
-
-def draw_board(screen):
-    colors = [pygame.Color("white"), pygame.Color("gray")]
-    for r in range(BOARD_SIZE):
-        for c in range(BOARD_SIZE):
-            color = colors[((r + c) % 2)]
-            pygame.draw.rect(screen, color, pygame.Rect(c * SQUARE_SIZE, r * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE))
-
-
-class Piece(ABC):
-    def __init__(self, color, position):
-        self.color = color
-        self.position = position
-        self.has_moved = False
-
-        color_code = 'w' if color == 'white' else 'b'
-        self.image_key = f"{color_code}{self.symbol}"
-
-    def __str__(self):
-        return f"{self.color[0]}{self.symbol}"
-
-    def draw(self, screen):
-        if self.image_key in IMAGES:
-            image = IMAGES[self.image_key]
-            x = self.position[1] * SQUARE_SIZE
-            y = self.position[0] * SQUARE_SIZE
-            piece_rect = image.get_rect()
-            piece_rect.topleft = (x, y)
-            screen.blit(image, piece_rect)
-        else:
-            print(f"Warning: Image not found for {self.image_key}")
-
-    @abstractmethod
-    def valid_moves(self, board):
-        raise NotImplementedError("Subclasses must implement this method")
-
-    def move(self, new_position, board):
-        valid_moves = self.valid_moves(board)
-        if new_position in valid_moves:
-            self.position = new_position
-            self.has_moved = True
-            return True
-        return False
-
-
-class Pawn(Piece):
-    symbol = 'p'
-
-    def valid_moves(self, board):
-        moves = []
-        direction = 1 if self.color == 'black' else -1
-        start_row = 1 if self.color == 'black' else 6
-
-        forward = (self.position[0] + direction, self.position[1])
-        if 0 <= forward[0] < 8 and board.get_piece(forward) is None:
-            moves.append(forward)
-
-            if self.position[0] == start_row:
-                double_forward = (self.position[0] + 2 * direction, self.position[1])
-                if board.get_piece(double_forward) is None:
-                    moves.append(double_forward)
-
-        for col_offset in [-1, 1]:
-            capture_pos = (self.position[0] + direction, self.position[1] + col_offset)
-            if 0 <= capture_pos[1] < 8:
-                piece = board.get_piece(capture_pos)
-                if piece is not None and piece.color != self.color:
-                    moves.append(capture_pos)
-                elif piece is None and board.en_passant_target == capture_pos:
-                    adjacent_pos = (self.position[0], self.position[1] + col_offset)
-                    adjacent_piece = board.get_piece(adjacent_pos)
-                    if (adjacent_piece is not None and isinstance(adjacent_piece, Pawn) and
-                            adjacent_piece.color != self.color):
-                        moves.append(capture_pos)
-
-        return moves
-
-    def get_symbol(self):
-        return 'b' if self.color == 'black' else 'w'
-
-
-class Rook(Piece):
-    symbol = 'R'
-
-    def valid_moves(self, board):
-        moves = []
-        row, col = self.position
-        directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]
-
-        for dr, dc in directions:
-            for i in range(1, 8):
-                new_row, new_col = row + i * dr, col + i * dc
-                if 0 <= new_row < 8 and 0 <= new_col < 8:
-                    piece = board.get_piece((new_row, new_col))
-                    if piece is None:
-                        moves.append((new_row, new_col))
-                    else:
-                        if piece.color != self.color:
-                            moves.append((new_row, new_col))
-                        break
-                else:
-                    break
-        return moves
-
-    def get_symbol(self):
-        return 'b' if self.color == 'black' else 'w'
-
-
-class Knight(Piece):
-    symbol = 'N'
-
-    def valid_moves(self, board):
-        moves = []
-        row, col = self.position
-
-        offsets = [
-            (2, 1), (2, -1), (-2, 1), (-2, -1),
-            (1, 2), (1, -2), (-1, 2), (-1, -2)
-        ]
-        for dr, dc in offsets:
-            new_row, new_col = row + dr, col + dc
-            if 0 <= new_row < 8 and 0 <= new_col < 8:
-                piece = board.get_piece((new_row, new_col))
-                if piece is None or piece.color != self.color:
-                    moves.append((new_row, new_col))
-        return moves
-
-    def get_symbol(self):
-        return 'b' if self.color == 'black' else 'w'
-
-
-class Bishop(Piece):
-    symbol = 'B'
-
-    def valid_moves(self, board):
-        moves = []
-        row, col = self.position
-
-        directions = [(1, 1), (1, -1), (-1, 1), (-1, -1)]
-        for dr, dc in directions:
-            for i in range(1, 8):
-                new_row, new_col = row + i * dr, col + i * dc
-                if 0 <= new_row < 8 and 0 <= new_col < 8:
-                    piece = board.get_piece((new_row, new_col))
-                    if piece is None:
-                        moves.append((new_row, new_col))
-                    else:
-                        if piece.color != self.color:
-                            moves.append((new_row, new_col))
-                        break
-                else:
-                    break
-        return moves
-
-    def get_symbol(self):
-        return 'b' if self.color == 'black' else 'w'
-
-
-class Queen(Piece):
-    symbol = 'Q'
-
-    def valid_moves(self, board):
-        moves = []
-        row, col = self.position
-
-        directions = [
-            (0, 1), (1, 0), (0, -1), (-1, 0),
-            (1, 1), (1, -1), (-1, 1), (-1, -1)
-        ]
-        for dr, dc in directions:
-            for i in range(1, 8):
-                new_row, new_col = row + i * dr, col + i * dc
-                if 0 <= new_row < 8 and 0 <= new_col < 8:
-                    piece = board.get_piece((new_row, new_col))
-                    if piece is None:
-                        moves.append((new_row, new_col))
-                    else:
-                        if piece.color != self.color:
-                            moves.append((new_row, new_col))
-                        break
-                else:
-                    break
-        return moves
-
-    def get_symbol(self):
-        return 'b' if self.color == 'black' else 'w'
-
-
-class King(Piece):
-    symbol = 'K'
-
-    def valid_moves(self, board, check_check=True):
-        moves = []
-        row, col = self.position
-
-        for dr in [-1, 0, 1]:
-            for dc in [-1, 0, 1]:
-                if dr == 0 and dc == 0:
-                    continue
-                new_row, new_col = row + dr, col + dc
-                if 0 <= new_row < 8 and 0 <= new_col < 8:
-                    piece = board.get_piece((new_row, new_col))
-                    if piece is None or piece.color != self.color:
-                        moves.append((new_row, new_col))
-
-        if check_check and not self.has_moved and not board.is_in_check(self.color):
-            if (board.get_piece((row, 5)) is None and
-                    board.get_piece((row, 6)) is None and
-                    isinstance(board.get_piece((row, 7)), Rook) and
-                    not board.get_piece((row, 7)).has_moved):
-                if (not board.is_square_under_attack((row, 5), self.color) and
-                        not board.is_square_under_attack((row, 6), self.color)):
-                    moves.append((row, 6))
-
-            if (board.get_piece((row, 1)) is None and
-                    board.get_piece((row, 2)) is None and
-                    board.get_piece((row, 3)) is None and
-                    isinstance(board.get_piece((row, 0)), Rook) and
-                    not board.get_piece((row, 0)).has_moved):
-                if (not board.is_square_under_attack((row, 2), self.color) and
-                        not board.is_square_under_attack((row, 3), self.color)):
-                    moves.append((row, 2))
-
-        return moves
-
-    def get_symbol(self):
-        return 'b' if self.color == 'black' else 'w'
-
-
-class PieceFactory(ABC):
-    @abstractmethod
-    def create_piece(self, color, position):
-        pass
-
-
-class PawnFactory(PieceFactory):
-    def create_piece(self, color, position):
-        return Pawn(color, position)
-
-
-class RookFactory(PieceFactory):
-    def create_piece(self, color, position):
-        return Rook(color, position)
-
-
-class KnightFactory(PieceFactory):
-    def create_piece(self, color, position):
-        return Knight(color, position)
-
-
-class BishopFactory(PieceFactory):
-    def create_piece(self, color, position):
-        return Bishop(color, position)
-
-
-class QueenFactory(PieceFactory):
-    def create_piece(self, color, position):
-        return Queen(color, position)
-
-
-class KingFactory(PieceFactory):
-    def create_piece(self, color, position):
-        return King(color, position)
 
+def _build_atlas(square_size):
+    """Decode every piece PNG once and pack the scaled images side by side."""
+    atlas = pygame.Surface((square_size * len(PIECE_KEYS), square_size), pygame.SRCALPHA)
+    for i, key in enumerate(PIECE_KEYS):
+        try:
+            image = pygame.image.load(os.path.join(IMAGE_DIR, f"{key}.png"))
+        except (pygame.error, FileNotFoundError) as e:
+            print(f"Error loading {key}: {e}")
+            continue
+        atlas.blit(pygame.transform.scale(image, (square_size, square_size)), (i * square_size, 0))
+    return atlas
+
+
+def load_atlas(square_size=SQUARE_SIZE):
+    """Return the piece atlas scaled to ``square_size``, using the disk cache.
+
+    The cached atlas is rebuilt when any source PNG is newer than it.
+    """
+    cache_path = os.path.join(IMAGE_CACHE_DIR, f"atlas_{square_size}.png")
+    sources = [os.path.join(IMAGE_DIR, f"{key}.png") for key in PIECE_KEYS]
+    newest = max((os.path.getmtime(path) for path in sources if os.path.exists(path)), default=0)
+    atlas = None
+    if os.path.exists(cache_path) and os.path.getmtime(cache_path) >= newest:
+        try:
+            atlas = pygame.image.load(cache_path)
+        except pygame.error:
+            atlas = None
+    if atlas is None:
+        atlas = _build_atlas(square_size)
+        try:
+            os.makedirs(IMAGE_CACHE_DIR, exist_ok=True)
+            pygame.image.save(atlas, cache_path)
+        except (OSError, pygame.error):
+            pass
+    if pygame.display.get_surface() is not None:
+        atlas = atlas.convert_alpha()
+    return atlas
+
+
+def load_images(square_size=SQUARE_SIZE):
+    """Fill IMAGES with views into the piece atlas for ``square_size``.
+
+    Call again with a new size after resizing the window.
+    """
+    atlas = load_atlas(square_size)
+    IMAGES.clear()
+    for i, key in enumerate(PIECE_KEYS):
+        IMAGES[key] = atlas.subsurface((i * square_size, 0, square_size, square_size))
+    return IMAGES
+
+
+def init_display():
+    """Open the window, load the font and piece images on first use."""
+    global screen, font
+    if screen is None:
+        pygame.init()
+        screen = pygame.display.set_mode(WINDOW_SIZE)
+        pygame.display.set_caption('Two-Player Chess')
+        font = pygame.font.SysFont('Arial', FONT_SIZE)
+        load_images()
+    return screen
+
+
+class RenderCache:
+    """Surfaces that never change between frames, built once and reused."""
 
-class Board:
     def __init__(self):
-        self.grid = [[None for _ in range(8)] for _ in range(8)]
-        self.current_turn = 'white'
-        self.game_over = False
-        self.winner = None
-        self.selected_piece = None
-        self.valid_moves = []
-        self.en_passant_target = None
-        self.check = False
-        self.promoting_pawn = None
-        self.piece_factories = {
-            'pawn': PawnFactory(),
-            'rook': RookFactory(),
-            'knight': KnightFactory(),
-            'bishop': BishopFactory(),
-            'queen': QueenFactory(),
-            'king': KingFactory()
-        }
-        self._setup_board()
-
-    def _setup_board(self):
-        for col in range(8):
-            self.grid[6][col] = self.piece_factories['pawn'].create_piece('white', (6, col))
-            self.grid[1][col] = self.piece_factories['pawn'].create_piece('black', (1, col))
-
-            self.grid[0][0] = self.piece_factories['rook'].create_piece('black', (0, 0))
-            self.grid[0][7] = self.piece_factories['rook'].create_piece('black', (0, 7))
-            self.grid[7][0] = self.piece_factories['rook'].create_piece('white', (7, 0))
-            self.grid[7][7] = self.piece_factories['rook'].create_piece('white', (7, 7))
-
-            self.grid[0][1] = Knight('black', (0, 1))
-            self.grid[0][6] = Knight('black', (0, 6))
-            self.grid[7][1] = Knight('white', (7, 1))
-            self.grid[7][6] = Knight('white', (7, 6))
-
-            self.grid[0][2] = Bishop('black', (0, 2))
-            self.grid[0][5] = Bishop('black', (0, 5))
-            self.grid[7][2] = Bishop('white', (7, 2))
-            self.grid[7][5] = Bishop('white', (7, 5))
-
-            self.grid[0][3] = Queen('black', (0, 3))
-            self.grid[7][3] = Queen('white', (7, 3))
-
-            self.grid[0][4] = King('black', (0, 4))
-            self.grid[7][4] = King('white', (7, 4))
-
-    def get_piece(self, position):
-        row, col = position
-        if 0 <= row < 8 and 0 <= col < 8:
-            return self.grid[row][col]
-        return None
-
-    def is_square_under_attack(self, position, color):
-        opponent_color = 'black' if color == 'white' else 'white'
-        for row in range(8):
-            for col in range(8):
-                piece = self.grid[row][col]
-                if piece and piece.color == opponent_color:
-                    if isinstance(piece, King):
-                        if position in piece.valid_moves(self, check_check=False):
-                            return True
-                    else:
-                        if position in piece.valid_moves(self):
-                            return True
-        return False
-
-    def is_in_check(self, color):
-        king_pos = None
-        for row in range(8):
-            for col in range(8):
-                piece = self.grid[row][col]
-                if isinstance(piece, King) and piece.color == color:
-                    king_pos = (row, col)
-                    break
-            if king_pos:
-                break
-        if not king_pos:
-            return False
-        return self.is_square_under_attack(king_pos, color)
-
-    def is_checkmate(self, color):
-        if not self.is_in_check(color):
-            return False
-        for row in range(8):
-            for col in range(8):
-                piece = self.grid[row][col]
-                if piece and piece.color == color:
-                    for move in piece.valid_moves(self):
-                        original_pos = piece.position
-                        captured_piece = self.get_piece(move)
-                        self.grid[original_pos[0]][original_pos[1]] = None
-                        self.grid[move[0]][move[1]] = piece
-                        piece.position = move
-                        still_in_check = self.is_in_check(color)
-                        self.grid[original_pos[0]][original_pos[1]] = piece
-                        self.grid[move[0]][move[1]] = captured_piece
-                        piece.position = original_pos
-                        if not still_in_check:
-                            return False
-        return True
-
-    def is_stalemate(self, color):
-        if self.is_in_check(color):
-            return False
-        for row in range(8):
-            for col in range(8):
-                piece = self.grid[row][col]
-                if piece and piece.color == color:
-                    if piece.valid_moves(self):
-                        return False
-        return True
-
-    def select_piece(self, position):
-        piece = self.get_piece(position)
-        if piece is not None and piece.color == self.current_turn:
-            print(f"Selected {piece} at {position}. Possible moves (before filtering): {piece.valid_moves(self)}")
-            self.selected_piece = piece
-            self.valid_moves = piece.valid_moves(self)
-            valid_moves_filtered = []
-            for move in self.valid_moves:
-                original_pos = piece.position
-                captured_piece = self.get_piece(move)
-                self.grid[original_pos[0]][original_pos[1]] = None
-                self.grid[move[0]][move[1]] = piece
-                piece.position = move
-                if not self.is_in_check(self.current_turn):
-                    valid_moves_filtered.append(move)
-                self.grid[original_pos[0]][original_pos[1]] = piece
-                self.grid[move[0]][move[1]] = captured_piece
-                piece.position = original_pos
-            self.valid_moves = valid_moves_filtered
-            return True
-        return False
-
-    def move_piece(self, end_pos):
-        if self.selected_piece is None:
-            return False
-
-        if end_pos in self.valid_moves:
-            start_pos = self.selected_piece.position
-
-            if isinstance(self.selected_piece, Pawn) and end_pos == self.en_passant_target:
-                captured_row = start_pos[0]
-                captured_col = end_pos[1]
-                self.grid[captured_row][captured_col] = None
-
-            captured_piece = self.get_piece(end_pos)
-            if captured_piece is not None and isinstance(captured_piece, King):
-                self.game_over = True
-                self.winner = self.current_turn
-
-            if isinstance(self.selected_piece, King) and abs(start_pos[1] - end_pos[1]) == 2:
-                if end_pos[1] > start_pos[1]:
-                    rook_pos = (start_pos[0], 7)
-                    rook = self.get_piece(rook_pos)
-                    self.grid[start_pos[0]][5] = rook
-                    self.grid[start_pos[0]][7] = None
-                    rook.position = (start_pos[0], 5)
-                else:
-                    rook_pos = (start_pos[0], 0)
-                    rook = self.get_piece(rook_pos)
-                    self.grid[start_pos[0]][3] = rook
-                    self.grid[start_pos[0]][0] = None
-                    rook.position = (start_pos[0], 3)
-
-            self.grid[start_pos[0]][start_pos[1]] = None
-            self.grid[end_pos[0]][end_pos[1]] = self.selected_piece
-            self.selected_piece.position = end_pos
-            self.selected_piece.has_moved = True
-
-            if isinstance(self.selected_piece, Pawn) and (end_pos[0] == 0 or end_pos[0] == 7):
-                self.promoting_pawn = self.selected_piece
-                return True
-
-            if isinstance(self.selected_piece, Pawn) and abs(start_pos[0] - end_pos[0]) == 2:
-                self.en_passant_target = (start_pos[0] + (end_pos[0] - start_pos[0]) // 2, start_pos[1])
-            else:
-                self.en_passant_target = None
-
-            if not self.promoting_pawn:
-                self.current_turn = 'black' if self.current_turn == 'white' else 'white'
-
-            self.selected_piece = None
-            self.valid_moves = []
-
-            if self.is_checkmate(self.current_turn):
-                self.game_over = True
-                self.winner = 'white' if self.current_turn == 'black' else 'black'
-            elif self.is_stalemate(self.current_turn):
-                self.game_over = True
-                self.winner = None
-
-            return True
-        return False
-
-    def promote_pawn(self, piece_type):
-        if not self.promoting_pawn:
-            return False
-
-        pos = self.promoting_pawn.position
-        color = self.promoting_pawn.color
-
-        if piece_type == 'queen':
-            new_piece = Queen(color, pos)
-        elif piece_type == 'rook':
-            new_piece = Rook(color, pos)
-        elif piece_type == 'bishop':
-            new_piece = Bishop(color, pos)
-        elif piece_type == 'knight':
-            new_piece = Knight(color, pos)
-
-        if new_piece:
-            new_piece.position = pos
-            new_piece.has_moved = True
-            self.grid[pos[0]][pos[1]] = new_piece
-            self.valid_moves = new_piece.valid_moves(self)
-
-        self.promoting_pawn = None
-        self.current_turn = 'black' if self.current_turn == 'white' else 'white'
-
-        if self.is_checkmate(self.current_turn):
-            self.game_over = True
-            self.winner = 'white' if self.current_turn == 'black' else 'black'
-        elif self.is_stalemate(self.current_turn):
-            self.game_over = True
-            self.winner = None
-
-        return True
-
-    def draw(self, surface):
-        for row in range(BOARD_SIZE):
-            for col in range(BOARD_SIZE):
-                color = LIGHT_SQUARE if (row + col) % 2 == 0 else DARK_SQUARE
-                pygame.draw.rect(surface, color, (col * SQUARE_SIZE, row * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE))
-
-                if self.selected_piece and (row, col) == self.selected_piece.position:
-                    highlight = pygame.Surface((SQUARE_SIZE, SQUARE_SIZE), pygame.SRCALPHA)
-                    highlight.fill(HIGHLIGHT)
-                    surface.blit(highlight, (col * SQUARE_SIZE, row * SQUARE_SIZE))
-                elif (row, col) in self.valid_moves:
-                    highlight = pygame.Surface((SQUARE_SIZE, SQUARE_SIZE), pygame.SRCALPHA)
-                    highlight.fill(MOVE_HIGHLIGHT)
-                    surface.blit(highlight, (col * SQUARE_SIZE, row * SQUARE_SIZE))
-
-        king_pos = None
-        for row in range(8):
-            for col in range(8):
-                piece = self.grid[row][col]
-                if isinstance(piece, King) and piece.color == self.current_turn and self.is_in_check(self.current_turn):
-                    highlight = pygame.Surface((SQUARE_SIZE, SQUARE_SIZE), pygame.SRCALPHA)
-                    highlight.fill(CHECK_HIGHLIGHT)
-                    surface.blit(highlight, (col * SQUARE_SIZE, row * SQUARE_SIZE))
-
+        self._background = None
+        self._highlights = {}
+        self._text = {}
+
+    def background(self):
+        """The empty board, pre-rendered at full window size."""
+        if self._background is None:
+            background = pygame.Surface(WINDOW_SIZE)
+            if pygame.display.get_surface() is not None:
+                background = background.convert()
+            for row in range(BOARD_SIZE):
+                for col in range(BOARD_SIZE):
+                    color = LIGHT_SQUARE if (row + col) % 2 == 0 else DARK_SQUARE
+                    pygame.draw.rect(background, color,
+                                     (col * SQUARE_SIZE, row * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE))
+            self._background = background
+        return self._background
+
+    def highlight(self, color):
+        surface = self._highlights.get(color)
+        if surface is None:
+            surface = pygame.Surface((SQUARE_SIZE, SQUARE_SIZE), pygame.SRCALPHA)
+            surface.fill(color)
+            self._highlights[color] = surface
+        return surface
+
+    def text(self, text, color):
+        key = (text, color)
+        surface = self._text.get(key)
+        if surface is None:
+            surface = font.render(text, True, color)
+            self._text[key] = surface
+        return surface
+
+
+render_cache = RenderCache()
+
+
+class BoardRenderer:
+    """Draws a Board and redraws only the squares whose contents changed.
+
+    ``render`` returns the rectangles it touched so the caller can pass them
+    to ``pygame.display.update`` instead of flipping the whole window.
+    """
+
+    def __init__(self, surface, cache=None):
+        self.surface = surface
+        self.cache = cache if cache is not None else render_cache
+        self.invalidate()
+
+    def invalidate(self):
+        """Forget what is on screen so the next render redraws everything."""
+        self.squares = [[None] * BOARD_SIZE for _ in range(BOARD_SIZE)]
+        self.overlays = None
+
+    def _square_states(self, board):
+        highlights = {move: MOVE_HIGHLIGHT for move in board.valid_moves}
+        if board.selected_piece:
+            highlights[board.selected_piece.position] = HIGHLIGHT
+        # Only stored game state is read here; the rules are never run.
+        check_color = board.current_turn if board.check else None
+
+        states = []
         for row in range(BOARD_SIZE):
+            states_row = []
             for col in range(BOARD_SIZE):
-                piece = self.grid[row][col]
-                if piece:
-                    piece.draw(surface)
-
-        turn_text = f"{self.current_turn.capitalize()}'s turn"
-        text_surface = font.render(turn_text, True, BLACK)
-        surface.blit(text_surface, (10, 10))
-
-        if self.promoting_pawn:
+                piece = board.grid[row][col]
+                states_row.append((piece.image_key if piece else None,
+                                   highlights.get((row, col)),
+                                   isinstance(piece, King) and piece.color == check_color))
+            states.append(states_row)
+        return states
+
+    def _overlay_items(self, board):
+        items = []
+        turn_text = f"{board.current_turn.capitalize()}'s turn"
+        items.append(('turn', turn_text, pygame.Rect((10, 10), font.size(turn_text))))
+
+        if board.promoting_pawn:
+            items.append(('promotion', None,
+                          pygame.Rect(0, WINDOW_SIZE[1] - SQUARE_SIZE, 4 * SQUARE_SIZE, SQUARE_SIZE)))
+
+        if board.game_over:
+            if board.winner:
+                game_over_text = f"Game Over! {board.winner.capitalize()} wins!"
+            elif board.stalemate:
+                game_over_text = "Game Over! Stalemate - it's a draw!"
+            else:
+                game_over_text = f"Game Over! Draw by {board.draw_reason}!"
+            text_rect = pygame.Rect((0, 0), font.size(game_over_text))
+            text_rect.center = (WINDOW_SIZE[0] // 2, WINDOW_SIZE[1] // 2)
+            items.append(('game_over', game_over_text, text_rect.inflate(20, 20)))
+        return items
+
+    @staticmethod
+    def _square_rect(row, col):
+        return pygame.Rect(col * SQUARE_SIZE, row * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE)
+
+    @staticmethod
+    def _squares_under(rect):
+        rect = rect.clip(pygame.Rect((0, 0), WINDOW_SIZE))
+        return {(row, col)
+                for row in range(rect.top // SQUARE_SIZE, (rect.bottom - 1) // SQUARE_SIZE + 1)
+                for col in range(rect.left // SQUARE_SIZE, (rect.right - 1) // SQUARE_SIZE + 1)}
+
+    def _draw_square(self, row, col, state):
+        image_key, highlight_color, in_check = state
+        cache = self.cache
+        x, y = col * SQUARE_SIZE, row * SQUARE_SIZE
+        self.surface.blit(cache.background(), (x, y), (x, y, SQUARE_SIZE, SQUARE_SIZE))
+        if highlight_color:
+            self.surface.blit(cache.highlight(highlight_color), (x, y))
+        if in_check:
+            self.surface.blit(cache.highlight(CHECK_HIGHLIGHT), (x, y))
+        if image_key:
+            image = IMAGES.get(image_key)
+            if image:
+                self.surface.blit(image, (x, y))
+            else:
+                print(f"Warning: Image not found for {image_key}")
+
+    def _draw_overlay(self, kind, text, rect):
+        surface = self.surface
+        cache = self.cache
+        if kind == 'turn':
+            surface.blit(cache.text(text, BLACK), rect)
+        elif kind == 'promotion':
             options = ['queen', 'rook', 'bishop', 'knight']
             for i, option in enumerate(options):
                 pygame.draw.rect(surface, WHITE,
                                  (i * SQUARE_SIZE, WINDOW_SIZE[1] - SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE))
-                text = font.render(option[0].upper(), True, BLACK)
-                text_rect = text.get_rect(
+                letter = cache.text(option[0].upper(), BLACK)
+                letter_rect = letter.get_rect(
                     center=(i * SQUARE_SIZE + SQUARE_SIZE // 2, WINDOW_SIZE[1] - SQUARE_SIZE // 2))
-                surface.blit(text, text_rect)
-
-        if self.game_over:
-            if self.winner:
-                game_over_text = f"Game Over! {self.winner.capitalize()} wins!"
-            else:
-                game_over_text = "Game Over! Stalemate - it's a draw!"
-            text_surface = font.render(game_over_text, True, (255, 0, 0))
-            text_rect = text_surface.get_rect(center=(WINDOW_SIZE[0] // 2, WINDOW_SIZE[1] // 2))
-            pygame.draw.rect(surface, WHITE, text_rect.inflate(20, 20))
-            surface.blit(text_surface, text_rect)
+                surface.blit(letter, letter_rect)
+        elif kind == 'game_over':
+            pygame.draw.rect(surface, WHITE, rect)
+            text_surface = cache.text(text, (255, 0, 0))
+            surface.blit(text_surface, text_surface.get_rect(center=rect.center))
+
+    def render(self, board):
+        states = self._square_states(board)
+        overlays = self._overlay_items(board)
+
+        dirty = {(row, col) for row in range(BOARD_SIZE) for col in range(BOARD_SIZE)
+                 if states[row][col] != self.squares[row][col]}
+        if overlays != self.overlays:
+            for _, _, rect in overlays + (self.overlays or []):
+                dirty |= self._squares_under(rect)
+        # Overlays are drawn over the squares, so a touched overlay needs every
+        # square beneath it repainted before it is drawn again.
+        redraw = []
+        for item in overlays:
+            under = self._squares_under(item[2])
+            if under & dirty or overlays != self.overlays:
+                dirty |= under
+                redraw.append(item)
+        if not dirty:
+            return []
+
+        rects = []
+        for row, col in sorted(dirty):
+            self._draw_square(row, col, states[row][col])
+            rects.append(self._square_rect(row, col))
+        for kind, text, rect in redraw:
+            self._draw_overlay(kind, text, rect)
+            rects.append(rect)
+
+        self.squares = states
+        self.overlays = overlays
+        return rects
+
+
+def draw_game_state(surface, board):
+    """Draw the whole board and its overlays onto ``surface``."""
+    BoardRenderer(surface).render(board)
 
 
 class ChessGame:
-    def __init__(self):
+    def __init__(self, pgn_path=SAVED_GAMES):
         self.board = Board()
+        self.pgn_path = pgn_path
+
+    def save_game(self):
+        """Append the moves played so far to ``pgn_path``; returns False if none."""
+        moves = recorded_moves(self.board)
+        if not moves or self.pgn_path is None:
+            return False
+        headers = {'Event': 'Two-Player Chess', 'Date': time.strftime('%Y.%m.%d'),
+                   'White': 'White', 'Black': 'Black'}
+        with open(self.pgn_path, 'a') as stream:
+            write_game(stream, moves, headers)
+        return True
 
     def handle_click(self, position):
         row, col = position
@@ -627,28 +311,38 @@ class ChessGame:
         else:
             self.board.select_piece(position)
 
+    def handle_event(self, event):
+        """Hook for other events; return True if the board needs redrawing."""
+        return False
+
     def run(self):
         """Main game loop."""
+        screen = init_display()
+        renderer = BoardRenderer(screen)
+        renderer.render(self.board)
+        pygame.display.flip()
         running = True
-        clock = pygame.time.Clock()
 
         while running:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    running = False
-                elif event.type == pygame.MOUSEBUTTONDOWN:
-                    if event.button == 1:
-                        pos = pygame.mouse.get_pos()
-                        col = pos[0] // SQUARE_SIZE
-                        row = pos[1] // SQUARE_SIZE
-                        self.handle_click((row, col))
-
-            screen.fill(WHITE)
-            draw_board(screen)
-            self.board.draw(screen)
-            pygame.display.flip()
-            clock.tick(60)
-
+            # Sleep until something happens instead of polling every frame.
+            event = pygame.event.wait()
+            if event.type == pygame.QUIT:
+                running = False
+                continue
+            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                col = event.pos[0] // SQUARE_SIZE
+                row = event.pos[1] // SQUARE_SIZE
+                self.handle_click((row, col))
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                renderer.invalidate()
+            elif not self.handle_event(event):
+                continue
+
+            rects = renderer.render(self.board)
+            if rects:
+                pygame.display.update(rects)
+
+        self.save_game()
         pygame.quit()
         sys.exit()
 